@@ -0,0 +1,113 @@
+import threading
+import time
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+from concurrency import cooperative, thread_pool
+
+
+class HasherBusy(Exception):
+    """More password checks are queued than the hasher accepts."""
+
+
+def hash_parameters(method):
+    """(algorithm, parameters) of a werkzeug hash method, with werkzeug's defaults filled in.
+
+    Takes a configured method ('pbkdf2:sha256') as well as the method
+    prefix of a stored hash, which werkzeug always writes out in full
+    ('pbkdf2:sha256:260000', 'scrypt:32768:8:1').
+    """
+    algorithm, *parameters = method.split(':')
+    defaults = {
+        'pbkdf2': ('sha256', str(DEFAULT_PBKDF2_ITERATIONS)),
+        'scrypt': ('32768', '8', '1'),
+    }.get(algorithm, ())
+    return algorithm, tuple(parameters) + defaults[len(parameters):]
+
+
+class PasswordHasher:
+    """Password hashing, on a small bounded thread pool under gevent.
+
+    PBKDF2 in hashlib releases the GIL. Sync and threaded workers hash on
+    the request thread, which has nothing else to serve meanwhile. Under
+    gevent the hash would stall every greenlet of the worker, so it runs on
+    `workers` OS threads while the waiting greenlet yields; past
+    `max_pending` queued checks callers get HasherBusy instead of piling
+    up. Hashes made with other parameters than `method` (a lower iteration
+    count, say) are reported for rehashing on the next successful check.
+    """
+
+    def __init__(self, method, workers=2, max_pending=32):
+        self.method = method
+        self._parameters = hash_parameters(method)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = thread_pool(workers, 'password-hash') if cooperative() else None
+
+    def _run(self, function, *args):
+        if self._executor is None:
+            return function(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            return self._executor.submit(function, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def needs_rehash(self, password_hash):
+        return hash_parameters(password_hash.split('$', 1)[0]) != self._parameters
+
+    def check(self, password_hash, password):
+        """(matches, new hash or None), the new hash made when the stored one is outdated."""
+        return self._run(self._check, password_hash, password)
+
+    def _check(self, password_hash, password):
+        if not password_hash or not check_password_hash(password_hash, password):
+            return False, None
+        if self.needs_rehash(password_hash):
+            return True, generate_password_hash(password, self.method)
+        return True, None
+
+
+class UserCache:
+    """Signed-in users kept detached for `max_age` seconds, per worker.
+
+    Saves the user lookup on every authenticated request; callers attach
+    a cached user to their session with merge(load=False), which issues no
+    query. Entries are dropped on logout and password changes, so a stale
+    user outlives those only in other workers, and for at most `max_age`.
+    """
+
+    def __init__(self, max_age=30, max_entries=10000):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            cached = self._users.get(user_id)
+        if cached is None or cached[0] < time.monotonic():
+            return None
+        return cached[1]
+
+    def put(self, user):
+        """Cache a detached copy of `user`'s loaded columns; `user` stays in its session."""
+        if not self.max_age:
+            return
+        mapper = inspect(user).mapper
+        copy = mapper.class_(**{attr.key: getattr(user, attr.key) for attr in mapper.column_attrs})
+        make_transient_to_detached(copy)
+        now = time.monotonic()
+        with self._lock:
+            if len(self._users) >= self.max_entries:
+                self._users = {key: value for key, value in self._users.items() if value[0] >= now}
+            self._users[user.id] = (now + self.max_age, copy)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
@@ -0,0 +1,258 @@
+from flask import Blueprint, current_app, jsonify, request, abort, url_for
+from flask_login import login_required, current_user
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import is_resource_modified
+from functools import wraps
+import hashlib
+from models import db, Assessment, Response, IdempotencyKey, QuestionBank, question_catalog, upsert_responses
+from assessments import complete_assessment, advance_past_answered, assessment_report_data, cohort_benchmarks, \
+    results_cache
+from assessment_results import RESULTS_VERSION, results_json
+from simulator import score_matrix, simulate, simulation_json
+from catalog import DEFAULT_TENANT
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+@api.errorhandler(HTTPException)
+def json_error(error):
+    return jsonify(error=error.description), error.code
+
+
+def owned_assessment(assessment_id):
+    assessment = db.session.get(Assessment, assessment_id)
+    if assessment is None or assessment.user_id != current_user.id:
+        abort(404, 'Assessment not found.')
+    return assessment
+
+
+def assessment_json(assessment):
+    answers = db.session.query(Response.question_id, Response.option_index) \
+        .filter_by(assessment_id=assessment.id).all()
+    return {
+        'id': assessment.id,
+        'bank_id': assessment.bank_id,
+        'status': assessment.status,
+        'current_question': assessment.current_question,
+        'start_date': assessment.start_date.isoformat() if assessment.start_date else None,
+        'completion_date': assessment.completion_date.isoformat() if assessment.completion_date else None,
+        'answers': {str(question_id): option_index for question_id, option_index in answers},
+        'links': {
+            'catalog': url_for('api.catalog', bank_id=assessment.bank_id),
+            'answers': url_for('api.save_answers', assessment_id=assessment.id),
+            'complete': url_for('api.complete', assessment_id=assessment.id),
+            'result': url_for('api.result', assessment_id=assessment.id),
+        },
+    }
+
+
+def result_json(assessment):
+    results = results_cache().results(assessment_report_data(assessment))
+    return dict(
+        results_json(results),
+        id=assessment.id,
+        cohort_size=cohort_benchmarks().cohort_size(assessment.bank_id),
+        completion_date=assessment.completion_date.isoformat(),
+    )
+
+
+def write_endpoint(view):
+    """JSON write view: requires a JSON body, honours Idempotency-Key, owns the commit.
+
+    The wrapped view returns (payload, status) and leaves its changes
+    uncommitted; they are committed together with the stored idempotency
+    record, so a retried request either replays the stored response or
+    performs the write, never both.
+    """
+    @wraps(view)
+    @login_required
+    def wrapped(*args, **kwargs):
+        # Requiring application/json also keeps cross-site form posts out,
+        # as browsers cannot send it without a CORS preflight.
+        if not request.is_json:
+            abort(415, 'Expected an application/json body.')
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            payload, status = view(*args, **kwargs)
+            db.session.commit()
+            return jsonify(payload), status
+
+        fingerprint = hashlib.sha256(
+            request.method.encode() + b' ' + request.path.encode() + b'\n' + request.get_data()
+        ).hexdigest()
+        stored = replay(key, fingerprint)
+        if stored is not None:
+            return stored
+        payload, status = view(*args, **kwargs)
+        db.session.add(IdempotencyKey(user_id=current_user.id, key=key[:255], request_fingerprint=fingerprint,
+                                      status_code=status, response_body=payload))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent retry with the same key won the race.
+            db.session.rollback()
+            return replay(key, fingerprint)
+        return jsonify(payload), status
+    return wrapped
+
+
+def replay(key, fingerprint):
+    stored = IdempotencyKey.query.filter_by(user_id=current_user.id, key=key[:255]).first()
+    if stored is None:
+        return None
+    if stored.request_fingerprint != fingerprint:
+        abort(422, 'Idempotency-Key was already used for a different request.')
+    response = jsonify(stored.response_body)
+    response.status_code = stored.status_code
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def parse_answers(items, catalog):
+    if not isinstance(items, list) or not items:
+        abort(400, 'answers must be a non-empty list of {"question_id", "option_index"} objects.')
+    answers = {}
+    for item in items:
+        question_id = item.get('question_id') if isinstance(item, dict) else None
+        option_index = item.get('option_index') if isinstance(item, dict) else None
+        question = catalog.by_id.get(question_id) if isinstance(question_id, int) else None
+        if question is None:
+            abort(400, f'Unknown question_id: {question_id!r}.')
+        if not isinstance(option_index, int) or not 0 <= option_index < len(question.options):
+            abort(400, f'option_index for question {question_id} must be between 0 and {len(question.options) - 1}.')
+        answers[question_id] = option_index
+    return answers
+
+
+def save(assessment, answers):
+    if assessment.status == 'Complete':
+        abort(409, 'Assessment is already complete.')
+    upsert_responses([
+        {'assessment_id': assessment.id, 'question_id': question_id, 'option_index': option_index}
+        for question_id, option_index in answers.items()
+    ], question_catalog(assessment.bank_id))
+    advance_past_answered(assessment)
+    return assessment_json(assessment)
+
+
+@api.route('/catalog')
+@login_required
+def catalog():
+    """The signed-in user's current question bank, or an earlier one with ?bank_id=."""
+    bank_id = request.args.get('bank_id', type=int)
+    if bank_id is not None:
+        bank = db.session.get(QuestionBank, bank_id)
+        if bank is None or bank.tenant not in (current_user.tenant, DEFAULT_TENANT):
+            abort(404, 'Question bank not found.')
+    catalog = question_catalog(bank_id, tenant=current_user.tenant)
+    response = jsonify({
+        'version': catalog.version,
+        'bank_id': catalog.bank_id,
+        'tenant': catalog.tenant,
+        'bank_version': catalog.bank_version,
+        'questions_per_page': catalog.questions_per_page,
+        'categories': list(catalog.categories),
+        'questions': [
+            {'id': question.id, 'category': question.category, 'subcategory': question.subcategory,
+             'text': question.text, 'options': list(question.options)}
+            for question in catalog.questions
+        ],
+    })
+    response.set_etag(catalog.version)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@api.route('/assessments', methods=['POST'])
+@write_endpoint
+def create_assessment():
+    assessment = Assessment(user_id=current_user.id, bank_id=QuestionBank.latest_id(current_user.tenant))
+    db.session.add(assessment)
+    db.session.flush()
+    return assessment_json(assessment), 201
+
+
+@api.route('/assessments/<int:assessment_id>')
+@login_required
+def get_assessment(assessment_id):
+    return jsonify(assessment_json(owned_assessment(assessment_id)))
+
+
+@api.route('/assessments/<int:assessment_id>/answers', methods=['PATCH'])
+@write_endpoint
+def save_answers(assessment_id):
+    """Save a batch of answers in one transaction: {"answers": [{"question_id", "option_index"}, ...]}."""
+    assessment = owned_assessment(assessment_id)
+    answers = parse_answers((request.get_json(silent=True) or {}).get('answers'), question_catalog(assessment.bank_id))
+    return save(assessment, answers), 200
+
+
+@api.route('/assessments/<int:assessment_id>/answers/<int:question_id>', methods=['PUT'])
+@write_endpoint
+def save_answer(assessment_id, question_id):
+    """Autosave a single answer: {"option_index": n}."""
+    assessment = owned_assessment(assessment_id)
+    body = request.get_json(silent=True) or {}
+    answers = parse_answers([{'question_id': question_id, 'option_index': body.get('option_index')}],
+                            question_catalog(assessment.bank_id))
+    return save(assessment, answers), 200
+
+
+@api.route('/assessments/<int:assessment_id>/complete', methods=['POST'])
+@write_endpoint
+def complete(assessment_id):
+    assessment = owned_assessment(assessment_id)
+    complete_assessment(assessment)
+    return result_json(assessment), 200
+
+
+@api.route('/assessments/<int:assessment_id>/result')
+@login_required
+def result(assessment_id):
+    assessment = owned_assessment(assessment_id)
+    if assessment.status != 'Complete':
+        abort(409, 'Assessment is not complete yet.')
+    response = jsonify(result_json(assessment))
+    response.set_etag(f'{RESULTS_VERSION}-{assessment.id}-{assessment.total_score}-'
+                      f'{assessment.completion_date.timestamp()}-{cohort_benchmarks().version}')
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def int_arg(name, default, low, high):
+    value = request.args.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        abort(400, f'{name} must be a whole number.')
+    if not low <= value <= high:
+        abort(400, f'{name} must be between {low} and {high}.')
+    return value
+
+
+@api.route('/assessments/<int:assessment_id>/simulation')
+@login_required
+def simulation(assessment_id):
+    """What-if answer changes ranked by the score they add, and the cheapest path to the next level."""
+    assessment = owned_assessment(assessment_id)
+    if assessment.status != 'Complete':
+        abort(409, 'Assessment is not complete yet.')
+    max_changes = int_arg('max_changes', 2, 1, 3)
+    limit = int_arg('limit', 10, 1, 50)
+    catalog = question_catalog(assessment.bank_id)
+    etag = f'{assessment.id}-{assessment.total_score}-{assessment.completion_date.timestamp()}-' \
+           f'{catalog.version}-{max_changes}-{limit}'
+    if not is_resource_modified(request.environ, etag=etag):
+        response = current_app.response_class(status=304)
+    else:
+        answers = db.session.query(Response.question_id, Response.option_index, Response.score) \
+            .filter_by(assessment_id=assessment.id).all()
+        result = simulate(score_matrix(catalog), answers, max_changes=max_changes, limit=limit)
+        response = jsonify(dict(simulation_json(result), id=assessment.id))
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict, namedtuple
+
+from scoring import CATEGORIES, CATEGORY_MAX_SCORES, CATEGORY_SCORE_FIELDS
+
+# A category within this many points of its maximum counts as a strength.
+STRENGTH_GAP = 2
+
+# Category: (score below which the advice applies, advice).
+RECOMMENDATIONS = {
+    'Strategy': (15, 'Focus on developing a comprehensive AI strategy aligned with business goals.'),
+    'Governance': (13, 'Strengthen AI governance frameworks and ethical guidelines.'),
+    'Data & Infrastructure': (16, 'Invest in improving data quality and infrastructure to support AI initiatives.'),
+    'Organization (Talent & Culture)': (13, 'Enhance AI skills and promote a culture of innovation within the organization.'),
+}
+
+ORDINAL_SUFFIXES = {1: 'st', 2: 'nd', 3: 'rd'}
+
+CHART_LABELS = {category: category.split(' (')[0] for category in CATEGORIES}
+CHART_SCALE_MAX = 20
+
+# Bump whenever the results model or its fragments change shape.
+RESULTS_VERSION = 3
+
+Gap = namedtuple('Gap', ['category', 'score', 'max_score', 'gap', 'strength'])
+
+Results = namedtuple('Results', [
+    'total_score', 'readiness_level', 'category_scores', 'percentile_ranks', 'gaps', 'recommendations', 'chart'
+])
+
+
+def assessment_results(data):
+    """Gap analysis, recommendations and chart series of a ReportData."""
+    scores = {category: getattr(data, field) for category, field in CATEGORY_SCORE_FIELDS.items()}
+    caps = getattr(data, 'category_caps', None) or CATEGORY_MAX_SCORES
+    gaps = []
+    for category in CATEGORIES:
+        gap = round(caps[category] - scores[category], 1)
+        gaps.append(Gap(category, scores[category], caps[category], gap, gap <= STRENGTH_GAP))
+    return Results(
+        total_score=data.total_score,
+        readiness_level=data.readiness_level,
+        category_scores=scores,
+        percentile_ranks=getattr(data, 'percentile_ranks', None),
+        gaps=gaps,
+        recommendations=[advice for category, (threshold, advice) in RECOMMENDATIONS.items()
+                         if scores[category] < threshold],
+        chart={
+            'labels': [CHART_LABELS[category] for category in CATEGORIES],
+            'scores': [scores[category] for category in CATEGORIES],
+            'max_scores': [caps[category] for category in CATEGORIES],
+            'scale_max': max(CHART_SCALE_MAX, *caps.values()),
+        },
+    )
+
+
+def ordinal(number):
+    """`number` with its English ordinal suffix: 1st, 2nd, 3rd, 4th, 11th, 12th, 13th, 21st."""
+    suffix = 'th' if number % 100 in (11, 12, 13) else ORDINAL_SUFFIXES.get(number % 10, 'th')
+    return f'{number}{suffix}'
+
+
+def results_json(results):
+    return dict(results._asdict(), gaps=[gap._asdict() for gap in results.gaps])
+
+
+class ResultsCache:
+    """Results models and their rendered HTML fragments, in memory.
+
+    Keyed by report content like ReportCache, so a rescore or a cohort
+    update (which moves percentile ranks) is never served stale, and
+    assessments with identical scores share an entry. Beyond `max_entries`
+    the least recently used entries are dropped.
+    """
+
+    def __init__(self, max_entries=1024, metrics=None):
+        self.max_entries = max_entries
+        self.metrics = metrics
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, data):
+        payload = json.dumps([RESULTS_VERSION, list(data)], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry(self, data):
+        key = self.key(data)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._record('hit')
+                return entry
+        entry = {'results': assessment_results(data), 'fragments': None}
+        self._record('miss')
+        with self._lock:
+            entry = self._entries.setdefault(key, entry)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._record('eviction')
+        return entry
+
+    def results(self, data):
+        return self._entry(data)['results']
+
+    def fragments(self, data, render):
+        """{name: HTML} for `data`, from `render(results)` on first use."""
+        entry = self._entry(data)
+        if entry['fragments'] is None:
+            entry['fragments'] = render(entry['results'])
+        return entry['fragments']
+
+    def _record(self, event):
+        if self.metrics is not None:
+            self.metrics.increment('results_cache_events_total', (event,))
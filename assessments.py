@@ -0,0 +1,174 @@
+from flask import current_app
+from datetime import datetime, timezone
+from models import db, Assessment, CohortSnapshot, Response, ScoreBucket, UserStats, question_catalog
+from report_cache import report_data
+from scoring import score_assessments, apply_score, category_scores
+from benchmarking import METRICS, METRIC_FIELDS, SNAPSHOT_GROWTH, TOTAL, bucket_counts, get_benchmarks, \
+    invalidate_benchmarks, metric_caps
+from jobs import enqueue, job
+import numpy as np
+
+
+def report_cache():
+    return current_app.extensions['report_cache']
+
+
+def results_cache():
+    return current_app.extensions['results_cache']
+
+
+def rescore_assessments(assessments, chunk_size=500, commit=True):
+    # Each assessment is scored by the rules of the bank it was taken with.
+    by_bank = {}
+    for assessment in assessments:
+        by_bank.setdefault(assessment.bank_id, []).append(assessment)
+    for bank_id, bank_assessments in by_bank.items():
+        catalog = question_catalog(bank_id)
+        for start in range(0, len(bank_assessments), chunk_size):
+            chunk = {assessment.id: assessment for assessment in bank_assessments[start:start + chunk_size]}
+            responses = db.session.query(Response.assessment_id, Response.question_id, Response.score) \
+                .filter(Response.assessment_id.in_(list(chunk))).all()
+            for assessment_id, result in score_assessments(chunk, responses, catalog).items():
+                apply_score(chunk[assessment_id], result)
+    if commit:
+        db.session.commit()
+
+
+def cohort_benchmarks():
+    """Benchmarks of the latest cohort snapshot; its id is their version."""
+    def load_snapshot():
+        snapshot = CohortSnapshot.latest()
+        return ([], None) if snapshot is None else (snapshot.buckets, snapshot.id)
+    return get_benchmarks(load_snapshot, current_app.config['BENCHMARK_CACHE_SECONDS'])
+
+
+def refresh_cohort_snapshot(force=False):
+    """Copy the live histograms into a new cohort snapshot, if the latest one is stale.
+
+    It is stale once the cohort has grown and either the snapshot is
+    BENCHMARK_SNAPSHOT_SECONDS old or the cohort has grown by
+    SNAPSHOT_GROWTH since. Returns whether a snapshot was taken.
+    """
+    rows = db.session.query(ScoreBucket.bank_id, ScoreBucket.metric, ScoreBucket.bucket,
+                            ScoreBucket.assessments).all()
+    cohort_size = sum(count for _, metric, _, count in rows if metric == TOTAL)
+    latest = CohortSnapshot.latest()
+    if latest is not None and not force:
+        age = datetime.now(timezone.utc).replace(tzinfo=None) - latest.created_at.replace(tzinfo=None)
+        if cohort_size <= latest.cohort_size or (
+                age.total_seconds() < current_app.config['BENCHMARK_SNAPSHOT_SECONDS']
+                and cohort_size < latest.cohort_size * (1 + SNAPSHOT_GROWTH)):
+            return False
+    snapshot = CohortSnapshot(cohort_size=cohort_size, buckets=[list(row) for row in rows])
+    db.session.add(snapshot)
+    db.session.flush()
+    CohortSnapshot.query.filter(CohortSnapshot.id < snapshot.id).delete(synchronize_session=False)
+    invalidate_benchmarks()
+    return True
+
+
+def percentile_ranks(assessment):
+    """{metric: percentile rank} of a completed assessment, or None while its bank's cohort is too small."""
+    benchmarks = cohort_benchmarks()
+    if benchmarks.cohort_size(assessment.bank_id) < current_app.config['BENCHMARK_MIN_COHORT']:
+        return None
+    return benchmarks.percentile_ranks(assessment, metric_caps(question_catalog(assessment.bank_id).category_caps))
+
+
+def rebuild_benchmarks(chunk_size=10000):
+    """Recount the score histograms of every bank from its completed assessments."""
+    columns = [getattr(Assessment, METRIC_FIELDS[metric]) for metric in METRICS]
+    complete = Assessment.status == 'Complete'
+    rows = []
+    cohort_size = 0
+    for bank_id, in db.session.query(Assessment.bank_id).filter(complete).distinct().all():
+        caps = metric_caps(question_catalog(bank_id).category_caps)
+        counts = {metric: np.zeros(caps[metric] + 1, dtype=np.int64) for metric in METRICS}
+        result = db.session.execute(db.select(*columns).where(complete, Assessment.bank_id == bank_id)
+                                    .execution_options(yield_per=chunk_size))
+        for partition in result.partitions():
+            scores = np.array(partition, dtype=np.float64).reshape(-1, len(METRICS))
+            for index, metric in enumerate(METRICS):
+                counts[metric] += bucket_counts(metric, scores[:, index], caps)
+        rows.extend({'bank_id': bank_id, 'metric': metric, 'bucket': bucket, 'assessments': int(count)}
+                    for metric in METRICS for bucket, count in enumerate(counts[metric]) if count)
+        cohort_size += int(counts[METRICS[0]].sum())
+    ScoreBucket.query.delete()
+    db.session.bulk_insert_mappings(ScoreBucket, rows)
+    refresh_cohort_snapshot(force=True)
+    db.session.commit()
+    return cohort_size
+
+
+def complete_assessment(assessment):
+    # Scores are materialized once, when the assessment first moves to
+    # Complete; later views read the stored columns. Everything else a
+    # completion sets off runs as a background job, queued in the same
+    # transaction so it happens exactly when the completion does.
+    if assessment.status == 'Complete':
+        return False
+    rescore_assessments([assessment], commit=False)
+    completion_date = datetime.now(timezone.utc)
+    # Compare-and-set, so concurrent first views count the completion once.
+    claimed = Assessment.query.filter(Assessment.id == assessment.id, Assessment.status != 'Complete') \
+        .update({'status': 'Complete', 'completion_date': completion_date}, synchronize_session=False)
+    if not claimed:
+        db.session.rollback()
+        return False
+    assessment.status = 'Complete'
+    assessment.completion_date = completion_date
+    enqueue('assessment_completed', assessment_id=assessment.id)
+    db.session.commit()
+    return True
+
+
+# One at a time, so a user's completions are added to their stats in order.
+@job('assessment_completed', concurrency=1)
+def assessment_completed(assessment_id):
+    """Count a completion in the user's stats and the peer histograms, then queue its PDF report."""
+    assessment = db.session.get(Assessment, assessment_id)
+    UserStats.record_completion(assessment, category_scores(assessment))
+    ScoreBucket.count_completion(assessment)
+    refresh_cohort_snapshot()
+    enqueue('render_report', assessment_id=assessment_id)
+
+
+@job('render_report', max_attempts=3)
+def render_report(assessment_id):
+    """Render the PDF report into the report cache ahead of its download."""
+    data = assessment_report_data(db.session.get(Assessment, assessment_id))
+    if current_app.config['JOBS_INLINE']:
+        # Inline, the job runs inside the completion request, so the render
+        # is handed to the cache's REPORT_RENDER_WORKERS threads instead.
+        report_cache().prerender(data)
+    else:
+        report_cache().get(data)
+
+
+def assessment_report_data(assessment):
+    """ReportData of a completed assessment, with its percentile ranks and its bank's category caps."""
+    return report_data(assessment, percentile_ranks(assessment), question_catalog(assessment.bank_id).category_caps)
+
+
+def answered_question_ids(assessment_id):
+    return {question_id for question_id, in
+            db.session.query(Response.question_id).filter_by(assessment_id=assessment_id)}
+
+
+def advance_past_answered(assessment):
+    """Move current_question to the first page with an unanswered question, never backwards.
+
+    Answers saved through the API can arrive in any order; this keeps the
+    HTML flow resuming at the first page that still has a gap. The position
+    is rounded down to the start of that page, so a partly autosaved page is
+    shown whole rather than from its first gap.
+    """
+    answered = answered_question_ids(assessment.id)
+    catalog = question_catalog(assessment.bank_id)
+    index = next((question.position for question in catalog.questions if question.id not in answered), None)
+    if index is None:
+        position = len(catalog) + 1
+    else:
+        position = index - index % catalog.questions_per_page + 1
+    if position > assessment.current_question:
+        assessment.current_question = position
@@ -0,0 +1,130 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import tempfile
+
+from flask import request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip variants are built
+    brotli = None
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+COMPRESSIBLE = {'.css', '.js', '.json', '.map', '.svg', '.txt'}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def compressed_variants(data):
+    """{suffix: bytes} for the encodings worth serving instead of `data`."""
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    return {suffix: body for suffix, body in variants.items() if len(body) < len(data)}
+
+
+def build_assets(static_folder=STATIC_FOLDER):
+    """Copy static files into static/dist/ under content-hashed names.
+
+    Compressible files also get .gz (and, with brotli installed, .br)
+    siblings. The {logical path: hashed path} manifest is written last,
+    atomically, and files left over from earlier builds are removed.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    manifest = {}
+    written = {os.path.join(dist, MANIFEST)}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist)
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            stem, ext = os.path.splitext(logical)
+            hashed = f'{stem}.{fingerprint(data)}{ext}'
+            target = os.path.join(dist, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+            written.add(target)
+            if ext in COMPRESSIBLE:
+                for suffix, body in compressed_variants(data).items():
+                    with open(target + suffix, 'wb') as f:
+                        f.write(body)
+                    written.add(target + suffix)
+            manifest[logical] = hashed
+
+    fd, tmp_path = tempfile.mkstemp(dir=dist, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(dist, MANIFEST))
+    for root, _, files in os.walk(dist):
+        for name in files:
+            if os.path.join(root, name) not in written:
+                os.remove(os.path.join(root, name))
+    return manifest
+
+
+def load_manifest(static_folder=STATIC_FOLDER):
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class Assets:
+    """Static files, served by fingerprinted URL when a build exists.
+
+    The manifest is read once, when the app is created; without one
+    (a checkout nobody ran `flask build-assets` in) URLs point at the
+    plain files, which are served uncompressed and revalidated.
+    """
+
+    def __init__(self, static_folder=STATIC_FOLDER):
+        self.static_folder = static_folder
+        self.reload()
+
+    def reload(self):
+        """Read the manifest again, after a build."""
+        self.manifest = load_manifest(self.static_folder)
+        self.hashed = {f'{DIST_DIR}/{path}' for path in self.manifest.values()}
+        self.encodings = {}
+        for path in self.hashed:
+            full_path = os.path.join(self.static_folder, path)
+            self.encodings[path] = [(encoding, suffix) for encoding, suffix in (('br', '.br'), ('gzip', '.gz'))
+                                    if os.path.exists(full_path + suffix)]
+
+    def url(self, filename):
+        hashed = self.manifest.get(filename)
+        if hashed is None:
+            return url_for('main.serve_static', filename=filename)
+        return url_for('main.serve_static', filename=f'{DIST_DIR}/{hashed}')
+
+    def send(self, filename):
+        if filename not in self.hashed:
+            response = send_from_directory(self.static_folder, filename, max_age=0)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        encodings = self.encodings[filename]
+        path, encoding = filename, None
+        for candidate, suffix in encodings:
+            if request.accept_encodings[candidate]:
+                path, encoding = filename + suffix, candidate
+                break
+        response = send_from_directory(self.static_folder, path, mimetype=mimetypes.guess_type(filename)[0])
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if encodings:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
@@ -0,0 +1,129 @@
+import hashlib
+import threading
+import time
+
+import numpy as np
+
+from scoring import CATEGORIES, CATEGORY_SCORE_FIELDS
+
+# Percentile ranks are kept for the total and for each category.
+TOTAL = 'Total'
+METRICS = (TOTAL,) + CATEGORIES
+METRIC_FIELDS = dict(CATEGORY_SCORE_FIELDS, **{TOTAL: 'total_score'})
+# The cohort snapshot is retaken early once the cohort grows by this share,
+# so ranks fill in quickly while the cohort is small.
+SNAPSHOT_GROWTH = 0.1
+
+
+def metric_caps(category_caps):
+    """{metric: maximum score} of a question bank, from its category caps."""
+    caps = {category: int(category_caps[category]) for category in CATEGORIES}
+    caps[TOTAL] = sum(caps.values())
+    return caps
+
+
+def score_bucket(metric, score, caps):
+    """Histogram bucket of a score: whole points, clamped to the metric's range in `caps`.
+
+    Option scores are whole numbers, so with one bucket per point the
+    histograms are exact rather than an approximation.
+    """
+    return min(max(int(np.floor(score or 0)), 0), caps[metric])
+
+
+def bucket_counts(metric, scores, caps):
+    """Vectorized histogram of an array of scores for `metric`."""
+    buckets = np.clip(np.floor(np.asarray(scores, dtype=np.float64)), 0, caps[metric])
+    return np.bincount(buckets.astype(np.intp), minlength=caps[metric] + 1)
+
+
+class ScoreDistribution:
+    """Score histogram of one metric with its running totals precomputed."""
+    __slots__ = ('counts', 'below', 'size')
+
+    def __init__(self, counts):
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.below = np.concatenate(([0], np.cumsum(self.counts)[:-1]))
+        self.size = int(self.counts.sum())
+
+    def percentile_rank(self, bucket):
+        """Share of the cohort scoring below `bucket`, counting ties as half."""
+        if not self.size:
+            return None
+        if bucket >= self.counts.size:
+            return 100.0
+        return 100.0 * (self.below[bucket] + 0.5 * self.counts[bucket]) / self.size
+
+
+class Benchmarks:
+    """Score distributions of the completed assessments, per question bank.
+
+    Banks differ in questions and caps, so an assessment is only ranked
+    against assessments taken with the same bank.
+    """
+
+    def __init__(self, rows, version=None, loaded_at=None):
+        buckets = {}
+        for bank_id, metric, bucket, count in rows:
+            if metric in METRIC_FIELDS and bucket >= 0:
+                buckets.setdefault(bank_id, {}).setdefault(metric, {})[bucket] = count
+        self.banks = {}
+        digest = hashlib.sha1()
+        for bank_id in sorted(buckets):
+            distributions = self.banks[bank_id] = {}
+            for metric in METRICS:
+                metric_buckets = buckets[bank_id].get(metric, {})
+                counts = np.zeros(max(metric_buckets, default=-1) + 1, dtype=np.int64)
+                for bucket, count in metric_buckets.items():
+                    counts[bucket] = count
+                distributions[metric] = ScoreDistribution(counts)
+                digest.update(f'{bank_id}:{metric}:'.encode())
+                digest.update(counts.tobytes())
+        self.version = digest.hexdigest()[:12] if version is None else str(version)
+        self.loaded_at = time.monotonic() if loaded_at is None else loaded_at
+
+    def cohort_size(self, bank_id):
+        """Completed assessments of a question bank."""
+        distributions = self.banks.get(bank_id)
+        return distributions[TOTAL].size if distributions else 0
+
+    def percentile_ranks(self, assessment, caps):
+        """{metric: whole-number percentile rank} of an assessment's scores within its bank.
+
+        `caps` are the bank's {metric: maximum score}, as from metric_caps().
+        """
+        distributions = self.banks.get(assessment.bank_id, {})
+        ranks = {}
+        for metric in METRICS:
+            distribution = distributions.get(metric)
+            rank = None if distribution is None else distribution.percentile_rank(
+                score_bucket(metric, getattr(assessment, METRIC_FIELDS[metric]), caps))
+            ranks[metric] = None if rank is None else int(round(rank))
+        return ranks
+
+
+_benchmarks = None
+_benchmarks_lock = threading.Lock()
+
+
+def get_benchmarks(load_snapshot, max_age):
+    """Return the worker's benchmarks, reloading them when older than `max_age` seconds.
+
+    `load_snapshot` returns the histogram rows and their version. They are
+    a few hundred rows at most, so a reload is cheap; the cache only keeps
+    it off every request.
+    """
+    global _benchmarks
+    benchmarks = _benchmarks
+    if benchmarks is None or time.monotonic() - benchmarks.loaded_at > max_age:
+        with _benchmarks_lock:
+            benchmarks = _benchmarks
+            if benchmarks is None or time.monotonic() - benchmarks.loaded_at > max_age:
+                benchmarks = _benchmarks = Benchmarks(*load_snapshot())
+    return benchmarks
+
+
+def invalidate_benchmarks():
+    global _benchmarks
+    with _benchmarks_lock:
+        _benchmarks = None
@@ -0,0 +1,78 @@
+"""Answer-submission throughput against gunicorn at several worker counts.
+
+Starts `gunicorn wsgi:app` once per worker count against a fresh database,
+then has concurrent virtual users answer assessment pages for a fixed
+duration and reports answer pages submitted per second:
+
+    python benchmarks/answer_throughput.py --workers 1 2 4 --users 16 --duration 20
+
+Uses a throwaway SQLite file by default; pass --database-url (for example a
+local PostgreSQL started with `docker run -e POSTGRES_PASSWORD=pw -p 5432:5432
+postgres`) to measure a server database instead; it is migrated but not
+emptied between runs.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from client import Client, answer_page, start_gunicorn  # noqa: E402
+
+
+def run_users(base_url, users, duration):
+    counts = [0] * users
+    errors = [0] * users
+    # Sign everyone in before the clock starts; password hashing is not what
+    # this benchmark measures.
+    window = {}
+    ready = threading.Barrier(users + 1, action=lambda: window.update(started=time.time(),
+                                                                      deadline=time.time() + duration))
+
+    def user(index):
+        client = Client(base_url)
+        client.register_and_login(f'bench{index}-{time.time_ns()}@example.com', 'bench-password')
+        location = client.start_assessment()
+        ready.wait()
+        while time.time() < window['deadline']:
+            try:
+                location = answer_page(client, location)
+                counts[index] += 1
+                if location.endswith('/complete'):
+                    location = client.start_assessment()
+            except Exception:
+                errors[index] += 1
+
+    threads = [threading.Thread(target=user, args=(index,)) for index in range(users)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    for thread in threads:
+        thread.join()
+    return sum(counts), sum(errors), time.time() - window['started']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--users', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--database-url', default=None)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'pages':>7} {'errors':>7} {'pages/s':>9}")
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {'DATABASE_URL': args.database_url or f'sqlite:///{tmp}/bench.db',
+                   'REPORT_CACHE_DIR': os.path.join(tmp, 'reports')}
+            with start_gunicorn(args.port, workers, env):
+                pages, errors, elapsed = run_users(f'http://127.0.0.1:{args.port}', args.users, args.duration)
+        print(f'{workers:>7} {pages:>7} {errors:>7} {pages / elapsed:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""Concurrent-user capacity of the sync and gevent gunicorn workers.
+
+Simulates a workshop. Every user signs in, finishes one assessment
+through the API and opens another, then keeps its question page open:
+between pauses of --think seconds it autosaves an answer over a slow
+connection (the body arrives --upload-delay seconds after the headers),
+reloads the page or downloads the finished assessment's PDF report.
+Users are added in steps, each run for --step-duration seconds with the
+same number of workers per worker class:
+
+    python benchmarks/capacity.py --users 25,50,100,200 --workers 2 --step-duration 30
+
+A step passes while p95 latency (not counting the upload delay) stays
+under --slo-ms and fewer than 1% of requests fail; a worker class's
+capacity is its largest passing step.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from client import Client, start_gunicorn, start_job_worker  # noqa: E402
+from results import latency_summary, save_results  # noqa: E402
+
+WORKER_CLASSES = ('sync', 'gevent')
+# Share of a user's actions, drawn at random after every pause.
+ACTIONS = (('autosave', 0.6), ('page', 0.3), ('pdf', 0.1))
+
+
+class WorkshopUser:
+    def __init__(self, base_url, port, index):
+        self.client = Client(base_url)
+        self.port = port
+        self.index = index
+
+    def set_up(self):
+        """Sign in, complete one assessment and start the one left open."""
+        self.client.register_and_login(f'workshop{self.index}-{time.time_ns()}@example.com', 'bench-password')
+        catalog = self.api('GET', '/api/v1/catalog')
+        self.questions = [(question['id'], len(question['options'])) for question in catalog['questions']]
+        self.done_id = self.api('POST', '/api/v1/assessments', {})['id']
+        self.api('PATCH', f'/api/v1/assessments/{self.done_id}/answers', {'answers': [
+            {'question_id': question_id, 'option_index': random.randrange(options)}
+            for question_id, options in self.questions]})
+        self.api('POST', f'/api/v1/assessments/{self.done_id}/complete', {})
+        self.open_id = self.api('POST', '/api/v1/assessments', {})['id']
+
+    def api(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else None
+        status, _, response = self.client.request(path, body, {'Content-Type': 'application/json'}, method)
+        if status not in (200, 201):
+            raise RuntimeError(f'{method} {path}: {status}')
+        return json.loads(response)
+
+    def act(self, action, upload_delay):
+        if action == 'autosave':
+            question_id, options = random.choice(self.questions)
+            path = f'/api/v1/assessments/{self.open_id}/answers/{question_id}'
+            return self.slow_put(path, json.dumps({'option_index': random.randrange(options)}).encode(), upload_delay)
+        if action == 'page':
+            return self.client.request(f'/assessment/{self.open_id}')[0]
+        return self.client.request(f'/assessment/{self.done_id}/pdf')[0]
+
+    def slow_put(self, path, body, delay):
+        """PUT `body`, sending it `delay` seconds after the headers, as a slow mobile connection would."""
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=120)
+        try:
+            connection.putrequest('PUT', path)
+            connection.putheader('Content-Type', 'application/json')
+            connection.putheader('Content-Length', str(len(body)))
+            connection.putheader('Cookie', '; '.join(f'{cookie.name}={cookie.value}' for cookie in self.client.cookies))
+            connection.endheaders()
+            time.sleep(delay)
+            connection.send(body)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        finally:
+            connection.close()
+        return status
+
+
+def run_step(users, duration, think, upload_delay, record):
+    stop = threading.Event()
+    errors = []
+
+    def loop(user):
+        while not stop.wait(random.uniform(0.5, 1.5) * think):
+            action = random.choices([name for name, _ in ACTIONS], [weight for _, weight in ACTIONS])[0]
+            started = time.perf_counter()
+            try:
+                status = user.act(action, upload_delay)
+            except Exception as error:
+                status = None
+                errors.append(repr(error))
+            elapsed = time.perf_counter() - started
+            # The client's own upload delay isn't the server's latency.
+            record(action, status, elapsed - upload_delay if action == 'autosave' else elapsed)
+
+    threads = [threading.Thread(target=loop, args=(user,), daemon=True) for user in users]
+    for thread in threads:
+        thread.start()
+    stop.wait(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def measure(worker_class, args):
+    steps = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {'DATABASE_URL': args.database_url or f'sqlite:///{tmp}/capacity.db',
+               'REPORT_CACHE_DIR': os.path.join(tmp, 'reports'), 'METRICS_DIR': os.path.join(tmp, 'metrics'),
+               'WEB_WORKER_CLASS': worker_class}
+        base_url = f'http://127.0.0.1:{args.port}'
+        with start_gunicorn(args.port, args.workers, env, timeout=120), start_job_worker(env):
+            lock = threading.Lock()
+            timings = defaultdict(list)
+            statuses = []
+
+            def record(action, status, seconds):
+                with lock:
+                    timings[action].append(seconds)
+                    statuses.append(status)
+
+            users = []
+            for count in args.users:
+                started = time.perf_counter()
+                new_users = [WorkshopUser(base_url, args.port, index) for index in range(len(users), count)]
+                with ThreadPoolExecutor(max_workers=8) as pool:
+                    list(pool.map(lambda user: user.set_up(), new_users))
+                users.extend(new_users)
+                set_up_seconds = time.perf_counter() - started
+
+                with lock:
+                    timings.clear()
+                    statuses.clear()
+                errors = run_step(users, args.step_duration, args.think, args.upload_delay, record)
+                with lock:
+                    summary = latency_summary([value for values in timings.values() for value in values],
+                                              args.step_duration)
+                    actions = {action: latency_summary(values) for action, values in sorted(timings.items())}
+                    failed = sum(1 for status in statuses if status is None or status >= 500)
+                    total = len(statuses)
+                error_rate = failed / total if total else 1.0
+                step = dict(summary, users=count, actions=actions, errors=failed, error_rate=round(error_rate, 4),
+                            set_up_seconds=round(set_up_seconds, 1),
+                            passed=total > 0 and error_rate < 0.01 and summary['p95_ms'] <= args.slo_ms)
+                steps.append(step)
+                print(f"{worker_class:<7} {count:>6} {step['p50_ms']:>9.1f} {step['p95_ms']:>9.1f} "
+                      f"{step['p99_ms']:>9.1f} {step['per_second']:>8.1f} {failed:>7} {'yes' if step['passed'] else 'no':>5}",
+                      flush=True)
+                for error in errors[:3]:
+                    print(f'        {error}')
+                if not step['passed'] and not args.keep_going:
+                    break
+    passing = [step['users'] for step in steps if step['passed']]
+    return {'steps': steps, 'capacity': max(passing) if passing else 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', default='25,50,100,200', type=lambda value: sorted(int(n) for n in value.split(',')),
+                        help='Comma-separated concurrent users per step.')
+    parser.add_argument('--worker-class', action='append', choices=WORKER_CLASSES,
+                        help='Worker classes to compare (default: all).')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers.')
+    parser.add_argument('--step-duration', type=float, default=30)
+    parser.add_argument('--think', type=float, default=2.0, help='Mean seconds between a user\'s actions.')
+    parser.add_argument('--upload-delay', type=float, default=0.2,
+                        help='Seconds between an autosave\'s headers and its body.')
+    parser.add_argument('--slo-ms', type=float, default=300, help='p95 latency a passing step stays under.')
+    parser.add_argument('--keep-going', action='store_true', help='Run every step, even after one fails.')
+    parser.add_argument('--database-url', default=None, help='Defaults to a throwaway SQLite file.')
+    parser.add_argument('--port', type=int, default=8767)
+    parser.add_argument('--output', default=None, help='Where to save the JSON results.')
+    args = parser.parse_args()
+
+    print(f"{'class':<7} {'users':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'errors':>7} {'pass':>5}")
+    results = {worker_class: measure(worker_class, args) for worker_class in args.worker_class or WORKER_CLASSES}
+    print()
+    for worker_class, result in results.items():
+        print(f"{worker_class}: {result['capacity']} concurrent users within a {args.slo_ms:.0f} ms p95")
+    save_results('capacity', dict(results, workers=args.workers, think=args.think, upload_delay=args.upload_delay,
+                                  slo_ms=args.slo_ms), args.output)
+
+
+if __name__ == '__main__':
+    main()
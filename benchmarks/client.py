@@ -0,0 +1,112 @@
+"""Minimal HTTP client and gunicorn launcher shared by the load tests."""
+import contextlib
+import html
+import http.cookiejar
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Client:
+    def __init__(self, base_url, on_request=None):
+        self.base_url = base_url
+        # Called with (method, path, status, seconds) after every request.
+        self.on_request = on_request
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect())
+
+    def request(self, path, data=None, headers=None, method=None):
+        """Return (status, headers, body) without following redirects."""
+        url = path if path.startswith('http') else self.base_url + path
+        body = urllib.parse.urlencode(data).encode('utf-8') if isinstance(data, dict) else data
+        req = urllib.request.Request(url, data=body, headers=headers or {}, method=method)
+        started = time.perf_counter()
+        try:
+            with self.opener.open(req) as response:
+                result = response.status, response.headers, response.read()
+        except urllib.error.HTTPError as error:
+            result = error.code, error.headers, error.read()
+        if self.on_request is not None:
+            self.on_request(req.get_method(), urllib.parse.urlparse(url).path, result[0],
+                            time.perf_counter() - started)
+        return result
+
+    def location(self, path, data=None):
+        status, headers, _ = self.request(path, data)
+        if status not in (301, 302, 303):
+            raise RuntimeError(f'{path}: expected a redirect, got {status}')
+        return urllib.parse.urlparse(headers['Location']).path
+
+    def csrf_token(self, path):
+        _, _, body = self.request(path)
+        return re.search(rb'name="csrf_token" type="hidden" value="([^"]+)"', body).group(1).decode()
+
+    def register_and_login(self, email, password):
+        self.location('/register', {'csrf_token': self.csrf_token('/register'), 'email': email,
+                                    'password': password, 'confirm_password': password})
+        self.location('/login', {'csrf_token': self.csrf_token('/login'), 'email': email, 'password': password})
+
+    def start_assessment(self):
+        return self.location('/start_assessment')
+
+
+def answer_page(client, location, choose=lambda options: options[0]):
+    """Answer the question page at `location`; return where the app redirects next."""
+    status, headers, body = client.request(location)
+    if status in (301, 302, 303):
+        return urllib.parse.urlparse(headers['Location']).path
+    page = body.decode('utf-8')
+    answers = {}
+    for name in dict.fromkeys(re.findall(r'name="(question_\d+)"', page)):
+        options = re.findall(r'name="%s"[^>]*value="([^"]*)"' % name, page)
+        answers[name] = html.unescape(choose(options))
+    return client.location(location, answers)
+
+
+def _wait_for_port(port, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with contextlib.suppress(OSError), socket.create_connection(('127.0.0.1', port), timeout=0.5):
+            return
+        time.sleep(0.2)
+    raise RuntimeError(f'gunicorn did not start listening on {port}')
+
+
+@contextlib.contextmanager
+def start_gunicorn(port, workers, env=None, extra_args=(), timeout=60):
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app',
+         '-b', f'127.0.0.1:{port}', '-w', str(workers), '--log-level', 'warning', *extra_args],
+        cwd=ROOT, env=dict(os.environ, **(env or {})))
+    try:
+        _wait_for_port(port, timeout)
+        yield process
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+@contextlib.contextmanager
+def start_job_worker(env=None, threads=2):
+    """A `flask run-jobs` process alongside gunicorn, as in the Procfile."""
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'flask', '--app', 'main', 'run-jobs', '--threads', str(threads)],
+        cwd=ROOT, env=dict(os.environ, **(env or {})), stdout=subprocess.DEVNULL)
+    try:
+        yield process
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
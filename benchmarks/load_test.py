@@ -0,0 +1,128 @@
+"""End-to-end load test of the assessment flow against a local gunicorn.
+
+Each virtual user repeatedly registers, signs in, answers every page,
+completes the assessment and downloads the PDF report:
+
+    python benchmarks/load_test.py --users 8 --duration 30 --workers 2
+
+Reports p50/p95/p99 latency and requests/s per step and for whole flows,
+and saves them as JSON; compare two runs with benchmarks/results.py.
+Pass --seed-assessments to load the database with synthetic history first,
+so queries run against a realistically sized dataset.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client import Client, answer_page, start_gunicorn, start_job_worker  # noqa: E402
+from results import latency_summary, print_table, save_results  # noqa: E402
+
+
+def step_name(method, path):
+    return f"{method} {re.sub(r'/[0-9]+', '/<id>', path)}"
+
+
+def run_flow(client, email):
+    client.register_and_login(email, 'bench-password')
+    location = client.start_assessment()
+    while not location.endswith('/complete'):
+        location = answer_page(client, location)
+    status, _, _ = client.request(location)
+    if status != 200:
+        raise RuntimeError(f'{location}: {status}')
+    status, _, body = client.request(location.replace('/complete', '/pdf'))
+    if status != 200 or not body.startswith(b'%PDF'):
+        raise RuntimeError(f'PDF download failed with {status}')
+
+
+def run_users(base_url, users, duration, flows_per_user):
+    timings = defaultdict(list)
+    flow_timings = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.time() + duration if duration else None
+
+    def record(method, path, status, seconds):
+        with lock:
+            timings[step_name(method, path)].append(seconds)
+            if status >= 500:
+                errors.append(f'{method} {path}: {status}')
+
+    def user(index):
+        completed = 0
+        while (deadline is None or time.time() < deadline) and (not flows_per_user or completed < flows_per_user):
+            client = Client(base_url, on_request=record)
+            started = time.perf_counter()
+            try:
+                run_flow(client, f'load{index}-{time.time_ns()}@example.com')
+            except Exception as error:
+                with lock:
+                    errors.append(repr(error))
+                continue
+            with lock:
+                flow_timings.append(time.perf_counter() - started)
+            completed += 1
+
+    threads = [threading.Thread(target=user, args=(index,)) for index in range(users)]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - started
+
+    results = {name: latency_summary(values, elapsed) for name, values in sorted(timings.items())}
+    results['all requests'] = latency_summary([value for values in timings.values() for value in values], elapsed)
+    results['flow'] = latency_summary(flow_timings, elapsed)
+    return results, errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=8, help='Concurrent virtual users.')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run; 0 to run --flows only.')
+    parser.add_argument('--flows', type=int, default=0, help='Flows per user (0 for no limit).')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers.')
+    parser.add_argument('--seed-users', type=int, default=0)
+    parser.add_argument('--seed-assessments', type=int, default=0)
+    parser.add_argument('--database-url', default=None, help='Defaults to a throwaway SQLite file.')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--output', default=None, help='Where to save the JSON results.')
+    args = parser.parse_args()
+    if not args.duration and not args.flows:
+        parser.error('give --duration, --flows or both')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f'sqlite:///{tmp}/load.db'
+        if args.seed_assessments:
+            from main import create_app, upgrade_database
+            from seed import seed_database
+            app = create_app({'SQLALCHEMY_DATABASE_URI': database_url})
+            upgrade_database(app)
+            started = time.perf_counter()
+            seed_database(app, max(1, args.seed_users), args.seed_assessments)
+            print(f'Seeded {args.seed_assessments} assessments in {time.perf_counter() - started:.1f}s')
+        env = {'DATABASE_URL': database_url, 'REPORT_CACHE_DIR': os.path.join(tmp, 'reports'),
+               'METRICS_DIR': os.path.join(tmp, 'metrics')}
+        with start_gunicorn(args.port, args.workers, env), start_job_worker(env):
+            results, errors, elapsed = run_users(f'http://127.0.0.1:{args.port}', args.users,
+                                                 args.duration, args.flows)
+
+    print_table(results, title='step')
+    print(f"{results['flow']['count']} flows, {results['all requests']['count']} requests in {elapsed:.1f}s, "
+          f'{len(errors)} errors')
+    for error in errors[:10]:
+        print(f'  {error}')
+    save_results('load_test', dict(results, errors=len(errors), workers=args.workers, users=args.users), args.output)
+
+
+if __name__ == '__main__':
+    main()
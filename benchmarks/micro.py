@@ -0,0 +1,102 @@
+"""Micro-benchmarks of scoring and PDF generation at several dataset sizes.
+
+    python benchmarks/micro.py --sizes 1 100 1000 10000 --repeat 20
+
+Times, for each size N:
+  score/N         score_assessments on N assessments' responses (in memory)
+  rescore/N       rescore_assessments on N stored assessments (database round trips included)
+and independently of size:
+  pdf/render      generate_pdf_report for one report
+  pdf/cached      ReportCache.get for a report already on disk
+  simulate/K      what-if simulation of one assessment, combining up to K answer changes
+
+Uses a throwaway SQLite database seeded through benchmarks/seed.py unless
+--database-url is given. Results are printed and saved as JSON.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from results import latency_summary, print_table, save_results  # noqa: E402
+from seed import seed_database  # noqa: E402
+
+from main import create_app, upgrade_database  # noqa: E402
+from models import db, Assessment, Response, question_catalog  # noqa: E402
+from scoring import score_assessments  # noqa: E402
+from assessments import rescore_assessments, percentile_ranks  # noqa: E402
+from pdf_generator import generate_pdf_report  # noqa: E402
+from report_cache import ReportCache, report_data  # noqa: E402
+from simulator import score_matrix, simulate  # noqa: E402
+
+
+def timed(function, repeat, items=1):
+    """Run `function` `repeat` times after one warm-up call; summarize the timings."""
+    function()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    summary = latency_summary(timings, elapsed=sum(timings))
+    summary['items_per_second'] = round(items * repeat / sum(timings), 1)
+    return summary
+
+
+def synthetic_responses(catalog, size):
+    return [(assessment_id, question.id, random.choice(question.scores))
+            for assessment_id in range(size) for question in catalog.questions]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--database-url', default=None)
+    parser.add_argument('--output', default=None, help='Where to save the JSON results.')
+    args = parser.parse_args()
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': args.database_url or f'sqlite:///{tmp}/bench.db',
+                          'REPORT_CACHE_DIR': os.path.join(tmp, 'reports')})
+        upgrade_database(app)
+        seed_database(app, users=max(1, max(args.sizes) // 10), assessments=max(args.sizes))
+
+        results = {}
+        with app.app_context():
+            catalog = question_catalog()
+            for size in args.sizes:
+                responses = synthetic_responses(catalog, size)
+                results[f'score/{size}'] = timed(lambda: score_assessments(range(size), responses, catalog),
+                                                 args.repeat, items=size)
+            for size in args.sizes:
+                assessments = Assessment.query.order_by(Assessment.id).limit(size).all()
+                results[f'rescore/{size}'] = timed(lambda: rescore_assessments(assessments, commit=False),
+                                                   max(1, args.repeat // 4), items=size)
+                db.session.rollback()
+
+            assessment = Assessment.query.first()
+            data = report_data(assessment, percentile_ranks(assessment))
+            results['pdf/render'] = timed(lambda: generate_pdf_report(data), args.repeat)
+            cache = ReportCache(os.path.join(tmp, 'micro-reports'))
+            results['pdf/cached'] = timed(lambda: cache.get(data), args.repeat)
+
+            answers = db.session.query(Response.question_id, Response.option_index, Response.score) \
+                .filter_by(assessment_id=assessment.id).all()
+            matrix = score_matrix(catalog)
+            for max_changes in (1, 2, 3):
+                results[f'simulate/{max_changes}'] = timed(
+                    lambda: simulate(matrix, answers, max_changes=max_changes), args.repeat)
+
+    print_table(results)
+    save_results('micro', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
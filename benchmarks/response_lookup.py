@@ -0,0 +1,103 @@
+"""Lookup latency on a large response table, with and without the indexes.
+
+Builds a database through the app's migrations, bulk-loads synthetic
+assessments and responses, then times the hot lookups:
+
+    python benchmarks/response_lookup.py --assessments 32000
+
+32,000 assessments x 33 questions is ~1.05M response rows. On SQLite the
+unindexed baseline is measured on the same data with `NOT INDEXED`.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import create_app, upgrade_database  # noqa: E402
+from models import db, User, Assessment, AssessmentQuestion, QuestionBank, Response  # noqa: E402
+
+LOOKUPS = {
+    'responses by assessment': (
+        'SELECT question_id, option_index, score FROM response {hint} WHERE assessment_id = :key', 'assessment'),
+    'assessments by user': (
+        'SELECT id, completion_date, total_score FROM assessment {hint} '
+        'WHERE user_id = :key ORDER BY completion_date DESC', 'user'),
+}
+
+
+def seed(connection, users, assessments, bank_id, questions):
+    connection.execute(User.__table__.insert(), [
+        {'id': user_id, 'email': f'bench{user_id}@example.com', 'password_hash': ''}
+        for user_id in range(1, users + 1)
+    ])
+    connection.execute(Assessment.__table__.insert(), [
+        {'id': assessment_id, 'user_id': random.randint(1, users), 'bank_id': bank_id, 'status': 'Complete',
+         'total_score': 40.0,
+         'completion_date': datetime(2024, 1, 1) + timedelta(minutes=assessment_id)}
+        for assessment_id in range(1, assessments + 1)
+    ])
+    batch = []
+    for assessment_id in range(1, assessments + 1):
+        for question_id, options in questions:
+            batch.append({'assessment_id': assessment_id, 'question_id': question_id,
+                          'option_index': random.randrange(len(options)), 'score': 3.0, 'bank_version': 'bench'})
+        if len(batch) >= 100_000:
+            connection.execute(Response.__table__.insert(), batch)
+            batch = []
+    if batch:
+        connection.execute(Response.__table__.insert(), batch)
+
+
+def time_lookups(connection, sql, keys):
+    timings = []
+    for key in keys:
+        started = time.perf_counter()
+        connection.execute(db.text(sql), {'key': key}).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--assessments', type=int, default=32000)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--lookups', type=int, default=200)
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': args.database_url or f'sqlite:///{tmp}/bench.db'})
+        upgrade_database(app)
+        with app.app_context(), db.engine.begin() as connection:
+            bank_id = connection.execute(db.select(db.func.min(QuestionBank.id))).scalar()
+            questions = [(question.id, question.options) for question in connection.execute(
+                AssessmentQuestion.__table__.select().where(AssessmentQuestion.bank_id == bank_id))]
+            started = time.perf_counter()
+            seed(connection, args.users, args.assessments, bank_id, questions)
+            rows = connection.execute(db.text('SELECT COUNT(*) FROM response')).scalar()
+            print(f'Loaded {rows:,} responses in {time.perf_counter() - started:.1f}s')
+            sqlite = connection.dialect.name == 'sqlite'
+            if sqlite:
+                connection.exec_driver_sql('ANALYZE')
+
+            print(f"{'lookup':<26} {'index':<10} {'p50 ms':>9} {'p95 ms':>9}")
+            for name, (sql, kind) in LOOKUPS.items():
+                upper = args.assessments if kind == 'assessment' else args.users
+                keys = [random.randint(1, upper) for _ in range(args.lookups)]
+                variants = [('indexed', '')] + ([('none', 'NOT INDEXED')] if sqlite else [])
+                for label, hint in variants:
+                    # The unindexed scan is slow; a tenth of the lookups is plenty.
+                    sample = keys if hint == '' else keys[:max(10, len(keys) // 10)]
+                    p50, p95 = time_lookups(connection, sql.format(hint=hint), sample)
+                    print(f'{name:<26} {label:<10} {p50:>9.3f} {p95:>9.3f}')
+
+
+if __name__ == '__main__':
+    main()
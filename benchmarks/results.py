@@ -0,0 +1,112 @@
+"""Latency statistics and JSON result files shared by the benchmarks.
+
+Compare two saved runs with:
+
+    python benchmarks/results.py benchmarks/results/load_test-A.json benchmarks/results/load_test-B.json
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def latency_summary(seconds, elapsed=None):
+    """p50/p95/p99/mean/max in milliseconds, plus a rate when `elapsed` is given."""
+    values = sorted(seconds)
+    summary = {
+        'count': len(values),
+        'p50_ms': _ms(percentile(values, 0.50)),
+        'p95_ms': _ms(percentile(values, 0.95)),
+        'p99_ms': _ms(percentile(values, 0.99)),
+        'mean_ms': _ms(sum(values) / len(values)) if values else None,
+        'max_ms': _ms(values[-1]) if values else None,
+    }
+    if elapsed:
+        summary['per_second'] = round(len(values) / elapsed, 2)
+    return summary
+
+
+def _ms(value):
+    return None if value is None else round(value * 1000, 3)
+
+
+def environment():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'argv': sys.argv[1:],
+    }
+
+
+def save_results(name, results, path=None):
+    """Write `results` with run metadata to `path` (default benchmarks/results/<name>-<time>.json)."""
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump({'benchmark': name, 'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                   'environment': environment(), 'results': results}, f, indent=2)
+    print(f'Results saved to {path}')
+    return path
+
+
+def print_table(summaries, title='measurement'):
+    """Print {name: latency_summary} as a fixed-width table."""
+    print(f"{title:<40} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'per s':>9}")
+    for name, row in summaries.items():
+        print(f"{name:<40} {row['count']:>7} {_cell(row['p50_ms'])} {_cell(row['p95_ms'])} "
+              f"{_cell(row['p99_ms'])} {_cell(row.get('per_second'))}")
+
+
+def _cell(value):
+    return f'{value:>9.2f}' if value is not None else f"{'-':>9}"
+
+
+def _flatten(results, prefix=''):
+    if isinstance(results, dict) and 'p50_ms' in results:
+        yield prefix, results
+    elif isinstance(results, dict):
+        for key, value in results.items():
+            yield from _flatten(value, f'{prefix}/{key}' if prefix else str(key))
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = dict(_flatten(json.load(f)['results']))
+    with open(new_path) as f:
+        new = dict(_flatten(json.load(f)['results']))
+    print(f"{'measurement':<44} {'old p50':>9} {'new p50':>9} {'change':>8} {'old p95':>9} {'new p95':>9} {'change':>8}")
+    for name in sorted(set(old) & set(new)):
+        cells = []
+        for key in ('p50_ms', 'p95_ms'):
+            before, after = old[name].get(key), new[name].get(key)
+            change = f'{(after - before) / before * 100:+.1f}%' if before and after is not None else '-'
+            cells.append(f'{_cell(before)} {_cell(after)} {change:>8}')
+        print(f'{name:<44} ' + ' '.join(cells))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit(__doc__)
+    compare(sys.argv[1], sys.argv[2])
@@ -0,0 +1,96 @@
+"""Seed a database with synthetic users and completed assessments at scale.
+
+    python benchmarks/seed.py --users 1000 --assessments 20000 --database-url sqlite:///instance/bench.db
+
+The database is migrated first. Every seeded user can sign in with the
+password `bench-password` (as bench<N>@example.com). Answers are random, scored
+with the app's scoring code, and bulk inserted in batches. Per-user stats
+and the benchmark histograms are rebuilt at the end.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from main import create_app, upgrade_database  # noqa: E402
+from models import db, User, Assessment, Response, UserStats, question_catalog  # noqa: E402
+from scoring import CATEGORY_SCORE_FIELDS, score_assessments  # noqa: E402
+from assessments import rebuild_benchmarks  # noqa: E402
+
+PASSWORD = 'bench-password'
+
+
+def seed_users(connection, count):
+    first = (connection.execute(db.select(db.func.max(User.id))).scalar() or 0) + 1
+    # One hash shared by every user; hashing is deliberately slow.
+    password_hash = generate_password_hash(PASSWORD)
+    connection.execute(User.__table__.insert(), [
+        {'id': user_id, 'email': f'bench{user_id}@example.com', 'password_hash': password_hash}
+        for user_id in range(first, first + count)
+    ])
+    return list(range(first, first + count))
+
+
+def seed_assessments(connection, user_ids, count, catalog, batch_size=2000, start=datetime(2024, 1, 1)):
+    first = (connection.execute(db.select(db.func.max(Assessment.id))).scalar() or 0) + 1
+    for batch_start in range(first, first + count, batch_size):
+        ids = range(batch_start, min(batch_start + batch_size, first + count))
+        responses = [
+            {'assessment_id': assessment_id, 'question_id': question.id, 'option_index': option_index,
+             'score': question.scores[option_index], 'bank_version': catalog.version}
+            for assessment_id in ids for question in catalog.questions
+            for option_index in (random.randrange(len(question.options)),)
+        ]
+        results = score_assessments(ids, ((row['assessment_id'], row['question_id'], row['score'])
+                                          for row in responses), catalog)
+        connection.execute(Assessment.__table__.insert(), [
+            dict({field: results[assessment_id].category_scores[category]
+                  for category, field in CATEGORY_SCORE_FIELDS.items()},
+                 id=assessment_id, user_id=random.choice(user_ids), bank_id=catalog.bank_id, status='Complete',
+                 start_date=start + timedelta(minutes=assessment_id - 5),
+                 completion_date=start + timedelta(minutes=assessment_id),
+                 current_question=len(catalog) + 1, total_score=results[assessment_id].total_score,
+                 readiness_level=results[assessment_id].readiness_level)
+            for assessment_id in ids
+        ])
+        connection.execute(Response.__table__.insert(), responses)
+    return range(first, first + count)
+
+
+def seed_database(app, users, assessments):
+    """Add `users` users and `assessments` completed assessments; return their id ranges."""
+    with app.app_context():
+        catalog = question_catalog()
+        with db.engine.begin() as connection:
+            user_ids = seed_users(connection, users)
+            assessment_ids = seed_assessments(connection, user_ids, assessments, catalog)
+        UserStats.rebuild(user_ids)
+        db.session.commit()
+        rebuild_benchmarks()
+    return user_ids, assessment_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--assessments', type=int, default=20000)
+    parser.add_argument('--database-url', default=None, help='Defaults to the app configuration.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable data.')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': args.database_url} if args.database_url else None)
+    upgrade_database(app)
+    started = time.perf_counter()
+    seed_database(app, args.users, args.assessments)
+    print(f'Seeded {args.users} users and {args.assessments} assessments in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
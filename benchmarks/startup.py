@@ -0,0 +1,118 @@
+"""Worker start-up cost: import time per module and time to the first response.
+
+Each repeat starts a fresh interpreter that imports the app, creates it,
+serves GET /login and renders one PDF report, timing every step, once
+with an empty Jinja bytecode cache and once with one filled by
+`flask compile-templates`:
+
+    python benchmarks/startup.py --repeat 5 --top 15
+
+Also lists the modules that take longest to import (from
+`python -X importtime`), grouped by top-level package.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from results import latency_summary, print_table, save_results  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STEPS = ('import', 'create_app', 'first_response', 'second_response', 'first_report', 'second_report')
+
+CHILD = '''
+import json, time
+started = time.perf_counter()
+timings = {}
+def step(name):
+    global started
+    now = time.perf_counter()
+    timings[name] = now - started
+    started = now
+import main
+step('import')
+app = main.create_app()
+step('create_app')
+client = app.test_client()
+assert client.get('/login').status_code == 200
+step('first_response')
+client.get('/login')
+step('second_response')
+from report_cache import ReportData
+data = ReportData(19, 17, 20, 17, 73, 'AI Advanced', None)
+from pdf_generator import generate_pdf_report
+generate_pdf_report(data)
+step('first_report')
+generate_pdf_report(data)
+step('second_report')
+print(json.dumps(timings))
+'''
+
+
+def run_child(env):
+    output = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, env=dict(os.environ, **env),
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_profile(top):
+    """[(package, self seconds, modules)] of the `top` slowest top-level packages to import."""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    packages = defaultdict(lambda: [0, 0])
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = packages[name.strip().split('.')[0]]
+        package[0] += int(self_us)
+        package[1] += 1
+    ranked = sorted(packages.items(), key=lambda item: -item[1][0])
+    return [(name, self_us / 1e6, modules) for name, (self_us, modules) in ranked[:top]], \
+        sum(self_us for self_us, _ in packages.values()) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='Slowest packages to list.')
+    parser.add_argument('--output', default=None, help='Where to save the JSON results.')
+    args = parser.parse_args()
+
+    packages, total = import_profile(args.top)
+    print(f"{'package':<30} {'import ms':>10} {'modules':>8}")
+    for name, seconds, modules in packages:
+        print(f'{name:<30} {seconds * 1000:>10.1f} {modules:>8}')
+    print(f"{'all':<30} {total * 1000:>10.1f}\n")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {'DATABASE_URL': f'sqlite:///{tmp}/startup.db', 'METRICS_DIR': os.path.join(tmp, 'metrics'),
+               'REPORT_CACHE_DIR': os.path.join(tmp, 'reports')}
+        for cache in ('cold', 'warm'):
+            timings = defaultdict(list)
+            for repeat in range(args.repeat):
+                cache_dir = os.path.join(tmp, f'jinja-{cache}-{repeat}')
+                if cache == 'warm':
+                    subprocess.run([sys.executable, '-m', 'flask', '--app', 'main', 'compile-templates'], cwd=ROOT,
+                                   env=dict(os.environ, JINJA_CACHE_DIR=cache_dir, **env),
+                                   capture_output=True, check=True)
+                for name, seconds in run_child(dict(env, JINJA_CACHE_DIR=cache_dir)).items():
+                    timings[name].append(seconds)
+            results[f'{cache} templates'] = {name: latency_summary(timings[name]) for name in STEPS}
+
+    for title, steps in results.items():
+        print_table(steps, title=title)
+        print()
+    save_results('startup', dict(results, imports={name: seconds for name, seconds, _ in packages},
+                                 imports_total=total), args.output)
+
+
+if __name__ == '__main__':
+    main()
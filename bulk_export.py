@@ -0,0 +1,217 @@
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as ResultTimeout
+
+
+def _render(item):
+    from pdf_generator import generate_pdf_report
+    name, data = item
+    return name, generate_pdf_report(data).getvalue()
+
+
+class ExportJob:
+    """Progress of one bulk report export, persisted as JSON next to its archive.
+
+    Writing the status to disk lets any gunicorn worker answer progress and
+    download requests, not just the one that started the job.
+    """
+
+    def __init__(self, directory, job_id=None, total=0, owner_id=None):
+        self.directory = directory
+        self.id = job_id or uuid.uuid4().hex
+        self.owner_id = owner_id
+        self.total = total
+        self.done = 0
+        self.status = 'queued'
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def archive_path(self):
+        return os.path.join(self.directory, f'{self.id}.zip')
+
+    @property
+    def status_path(self):
+        return os.path.join(self.directory, f'{self.id}.json')
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self):
+        elapsed = self.elapsed()
+        return {
+            'id': self.id,
+            'owner_id': self.owner_id,
+            'status': self.status,
+            'total': self.total,
+            'done': self.done,
+            'progress': self.done / self.total if self.total else 1.0,
+            'elapsed_seconds': round(elapsed, 3),
+            'reports_per_second': round(self.done / elapsed, 2) if elapsed else 0.0,
+            'error': self.error,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+    @property
+    def partial_path(self):
+        return self.archive_path + '.part'
+
+    def is_stale(self, max_age):
+        """Whether a queued or running job stopped saving its status, its process gone."""
+        if self.status not in ('queued', 'running'):
+            return False
+        try:
+            return time.time() - os.path.getmtime(self.status_path) > max_age
+        except FileNotFoundError:
+            return False
+
+    def abandon(self):
+        """Mark a stale job failed and remove its partial archive."""
+        self.status = 'failed'
+        self.error = 'The export stopped when its worker exited.'
+        self.finished_at = time.time()
+        self.save()
+        _remove(self.partial_path)
+
+    def save(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as tmp:
+            json.dump(self.to_dict(), tmp)
+        os.replace(tmp_path, self.status_path)
+
+    @classmethod
+    def load(cls, directory, job_id):
+        if not re.fullmatch(r'[0-9a-f]{32}', job_id):
+            return None
+        try:
+            with open(os.path.join(directory, f'{job_id}.json')) as status_file:
+                state = json.load(status_file)
+        except (FileNotFoundError, ValueError):
+            return None
+        job = cls(directory, job_id=state['id'], total=state['total'], owner_id=state['owner_id'])
+        job.done = state['done']
+        job.status = state['status']
+        job.error = state['error']
+        job.started_at = state['started_at']
+        job.finished_at = state['finished_at']
+        return job
+
+
+def export_reports(job, items, processes=None, on_progress=None, progress_interval=1.0):
+    """Render `items` ((filename, report data) pairs) into the job's ZIP archive.
+
+    Reports are rendered in a process pool and written to the archive as they
+    finish, with at most a few reports per process in flight, so memory stays
+    bounded however many reports are exported.
+    """
+    processes = processes or os.cpu_count() or 1
+    job.status = 'running'
+    job.started_at = time.time()
+    job.save()
+    last_report = 0.0
+    try:
+        # spawn rather than fork: this may run from a thread inside a web worker.
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool, \
+                zipfile.ZipFile(job.partial_path, 'w', zipfile.ZIP_STORED) as archive:
+            in_flight = deque()
+            items = iter(items)
+            exhausted = False
+            while in_flight or not exhausted:
+                while not exhausted and len(in_flight) < processes * 4:
+                    item = next(items, None)
+                    if item is None:
+                        exhausted = True
+                    else:
+                        in_flight.append(pool.submit(_render, item))
+                if not in_flight:
+                    break
+                # The status is saved at least every progress_interval, even
+                # during a slow render, so a job that stops saving is stale.
+                try:
+                    name, pdf = in_flight[0].result(timeout=progress_interval)
+                except ResultTimeout:
+                    job.save()
+                    continue
+                in_flight.popleft()
+                # PDF streams are already compressed, store them as-is.
+                archive.writestr(name, pdf)
+                job.done += 1
+                if time.time() - last_report >= progress_interval:
+                    last_report = time.time()
+                    job.save()
+                    if on_progress:
+                        on_progress(job)
+        os.replace(job.partial_path, job.archive_path)
+        job.status = 'complete'
+    except Exception as exc:
+        job.status = 'failed'
+        job.error = str(exc)
+        _remove(job.partial_path)
+        raise
+    finally:
+        job.finished_at = time.time()
+        job.save()
+        if on_progress:
+            on_progress(job)
+    return job
+
+
+def reap_stale_exports(directory, max_age):
+    """Fail the jobs in `directory` whose status is older than `max_age` seconds while unfinished.
+
+    Their process died mid-export, leaving the job running forever and a
+    partial archive behind. Returns the reaped jobs.
+    """
+    reaped = []
+    for filename in os.listdir(directory):
+        if filename.endswith('.tmp'):
+            # A status save cut short, unless another worker is mid-save.
+            path = os.path.join(directory, filename)
+            try:
+                if time.time() - os.path.getmtime(path) > max_age:
+                    _remove(path)
+            except FileNotFoundError:
+                pass
+        elif filename.endswith('.json'):
+            job = ExportJob.load(directory, filename[:-len('.json')])
+            if job is not None and job.is_stale(max_age):
+                job.abandon()
+                reaped.append(job)
+    return reaped
+
+
+def start_export(job, items, processes=None):
+    """Run export_reports in a background thread; `items` must already be materialized."""
+    job.save()
+    thread = threading.Thread(target=_run_quietly, args=(job, items, processes),
+                              name=f'export-{job.id}', daemon=True)
+    thread.start()
+    return thread
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _run_quietly(job, items, processes):
+    try:
+        export_reports(job, items, processes)
+    except Exception:
+        # The failure is recorded on the job for the status endpoint.
+        pass
@@ -0,0 +1,187 @@
+import csv
+import json
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from models import db, User, Assessment, Response, UserStats
+from scoring import score_assessments, apply_score
+
+# Columns (CSV) or keys (JSONL) that are not answers.
+RECORD_FIELDS = ('email', 'completion_date')
+
+ImportRow = namedtuple('ImportRow', ['user_id', 'completion_date', 'answers'])
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_records(path, fmt=None):
+    """Yield (line number, raw text, fields or RowError) from a CSV or JSONL file.
+
+    CSV files have one assessment per row: an optional `email` and
+    `completion_date` column, then one column per question subcategory.
+    JSONL files have one object per line with `email`, `completion_date`
+    and an `answers` object keyed by subcategory.
+    """
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if fmt == 'csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                raw = json.dumps(row, ensure_ascii=False)
+                fields = {name: row.pop(name, None) for name in RECORD_FIELDS}
+                fields['answers'] = {key: value for key, value in row.items() if key and value not in (None, '')}
+                yield reader.line_num, raw, fields
+            return
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                fields = json.loads(line)
+                if not isinstance(fields, dict) or not isinstance(fields.get('answers'), dict):
+                    raise ValueError('expected an object with an "answers" object')
+            except ValueError as e:
+                yield line_number, line.rstrip('\n'), RowError(f'Invalid JSON: {e}')
+                continue
+            yield line_number, line.rstrip('\n'), fields
+
+
+class ResponseImporter:
+    """Validates answer records against the question catalog and writes them in batches.
+
+    Each batch is scored in memory with the same rules as live
+    assessments, then written as complete assessments with one bulk insert
+    of their responses.
+    """
+
+    def __init__(self, catalog, owner_email=None, batch_size=1000, dry_run=False):
+        self.catalog = catalog
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.questions = {}
+        for question in catalog.questions:
+            key = question.subcategory.strip().casefold()
+            # Subcategories are unique in the shipped bank; refuse ambiguous keys.
+            self.questions[key] = None if key in self.questions else question
+        self.users = {}
+        self.owner_id = self.user_id(owner_email) if owner_email else None
+        self.user_ids = set()
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.elapsed = 0.0
+
+    def user_id(self, email):
+        email = email.strip().lower()
+        if email not in self.users:
+            user = User.query.filter(db.func.lower(User.email) == email).first()
+            self.users[email] = user.id if user else None
+        if self.users[email] is None:
+            raise RowError(f'No user with email {email!r}')
+        return self.users[email]
+
+    def option_index(self, question, value):
+        text = str(value).strip()
+        if isinstance(value, int) or text.isdigit():
+            # Paper forms number options from 1.
+            number = int(text)
+            if 1 <= number <= len(question.options):
+                return number - 1
+            raise RowError(f'{question.subcategory}: option number must be 1-{len(question.options)}, got {number}')
+        for index, option in enumerate(question.options):
+            if option.strip().casefold() == text.casefold():
+                return index
+        raise RowError(f'{question.subcategory}: {text!r} is not one of its options')
+
+    def resolve(self, fields):
+        email = fields.get('email')
+        if email:
+            user_id = self.user_id(email)
+        elif self.owner_id is not None:
+            user_id = self.owner_id
+        else:
+            raise RowError('No email, and no default owner was given')
+
+        completion_date = fields.get('completion_date')
+        if completion_date:
+            try:
+                completion_date = datetime.fromisoformat(str(completion_date))
+            except ValueError:
+                raise RowError(f'completion_date must be an ISO 8601 date, got {completion_date!r}')
+        else:
+            completion_date = datetime.now(timezone.utc)
+
+        answers = {}
+        for key, value in fields['answers'].items():
+            question = self.questions.get(str(key).strip().casefold())
+            if question is None:
+                reason = 'is ambiguous' if str(key).strip().casefold() in self.questions else 'is not a question subcategory'
+                raise RowError(f'{key!r} {reason}')
+            answers[question.id] = self.option_index(question, value)
+        missing = [question.subcategory for question in self.catalog.questions if question.id not in answers]
+        if missing:
+            raise RowError(f"Missing answers for {len(missing)} questions: {', '.join(missing[:5])}"
+                           + (', ...' if len(missing) > 5 else ''))
+        return ImportRow(user_id, completion_date, answers)
+
+    def run(self, records, error_writer=None, on_progress=None):
+        started = time.perf_counter()
+        batch = []
+        for line, raw, fields in records:
+            self.rows += 1
+            try:
+                if isinstance(fields, RowError):
+                    raise fields
+                batch.append(self.resolve(fields))
+            except RowError as e:
+                self.failed += 1
+                if error_writer is not None:
+                    error_writer.writerow([line, str(e), raw])
+                continue
+            if len(batch) >= self.batch_size:
+                self.write(batch)
+                batch = []
+                self.elapsed = time.perf_counter() - started
+                if on_progress:
+                    on_progress(self)
+        self.write(batch)
+        if self.user_ids and not self.dry_run:
+            UserStats.rebuild(self.user_ids)
+            db.session.commit()
+        self.elapsed = time.perf_counter() - started
+        return self
+
+    def write(self, batch):
+        if not batch:
+            return
+        self.imported += len(batch)
+        if self.dry_run:
+            return
+        catalog = self.catalog
+        results = score_assessments(range(len(batch)), (
+            (index, question_id, catalog.by_id[question_id].scores[option_index])
+            for index, row in enumerate(batch) for question_id, option_index in row.answers.items()
+        ), catalog)
+        assessments = []
+        for index, row in enumerate(batch):
+            assessment = Assessment(user_id=row.user_id, bank_id=catalog.bank_id, start_date=row.completion_date,
+                                    completion_date=row.completion_date, status='Complete',
+                                    current_question=len(catalog) + 1)
+            apply_score(assessment, results[index])
+            assessments.append(assessment)
+        db.session.add_all(assessments)
+        db.session.flush()
+        db.session.execute(Response.__table__.insert(), [
+            {'assessment_id': assessment.id, 'question_id': question_id, 'option_index': option_index,
+             'score': catalog.by_id[question_id].scores[option_index], 'bank_version': catalog.version}
+            for assessment, row in zip(assessments, batch) for question_id, option_index in row.answers.items()
+        ])
+        db.session.commit()
+        # Keep the session from accumulating every imported assessment.
+        db.session.expunge_all()
+        self.user_ids.update(row.user_id for row in batch)
+
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from scoring import CATEGORY_MAX_SCORES, READINESS_THRESHOLDS, ScoringPlan
+
+QUESTIONS_PER_PAGE = 4
+DEFAULT_TENANT = 'default'
+
+
+class CatalogQuestion:
+    __slots__ = ('id', 'category', 'subcategory', 'text', 'options', 'scores',
+                 'max_score', 'option_scores', 'position')
+
+    def __init__(self, id, category, subcategory, text, options, scores, max_score, position):
+        self.id = id
+        self.category = category
+        self.subcategory = subcategory
+        self.text = text
+        self.options = tuple(options)
+        self.scores = tuple(scores)
+        self.max_score = max_score
+        self.option_scores = dict(zip(self.options, self.scores))
+        self.position = position
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError(f'{type(self).__name__} is read-only')
+        object.__setattr__(self, name, value)
+
+
+class QuestionCatalog:
+    """One question bank version, compiled: questions, page layout and scoring plan."""
+    __slots__ = ('version', 'bank_id', 'tenant', 'bank_version', 'category_caps', 'readiness_thresholds',
+                 'questions_per_page', 'questions', 'by_id', 'by_category', 'categories', 'pages', 'plan')
+
+    def __init__(self, questions, bank_id=None, tenant=DEFAULT_TENANT, bank_version=1, category_caps=None,
+                 readiness_thresholds=READINESS_THRESHOLDS, questions_per_page=QUESTIONS_PER_PAGE):
+        questions = tuple(questions)
+        by_category = {}
+        for question in questions:
+            by_category.setdefault(question.category, []).append(question)
+        category_caps = dict(category_caps or CATEGORY_MAX_SCORES)
+        readiness_thresholds = tuple(readiness_thresholds)
+
+        object.__setattr__(self, 'version', _catalog_version(questions))
+        object.__setattr__(self, 'bank_id', bank_id)
+        object.__setattr__(self, 'tenant', tenant)
+        object.__setattr__(self, 'bank_version', bank_version)
+        object.__setattr__(self, 'category_caps', category_caps)
+        object.__setattr__(self, 'readiness_thresholds', readiness_thresholds)
+        object.__setattr__(self, 'questions_per_page', questions_per_page)
+        object.__setattr__(self, 'questions', questions)
+        object.__setattr__(self, 'by_id', {question.id: question for question in questions})
+        object.__setattr__(self, 'by_category', {name: tuple(qs) for name, qs in by_category.items()})
+        object.__setattr__(self, 'categories', tuple(by_category))
+        object.__setattr__(self, 'pages', tuple(
+            questions[start:start + questions_per_page]
+            for start in range(0, len(questions), questions_per_page)
+        ))
+        object.__setattr__(self, 'plan', ScoringPlan(self))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def __len__(self):
+        return len(self.questions)
+
+    def questions_from(self, index):
+        # `Assessment.current_question` is a 1-based position that advances by
+        # however many questions were shown, so slice rather than use `pages`.
+        return self.questions[index:index + self.questions_per_page]
+
+    @classmethod
+    def from_rows(cls, rows, bank=None):
+        settings = {} if bank is None else dict(
+            bank_id=bank.id, tenant=bank.tenant, bank_version=bank.version, category_caps=bank.category_caps,
+            readiness_thresholds=bank.readiness_thresholds, questions_per_page=bank.questions_per_page)
+        return cls((
+            CatalogQuestion(
+                id=row.id,
+                category=row.category,
+                subcategory=row.subcategory,
+                text=row.text,
+                options=row.options,
+                scores=row.scores,
+                max_score=row.max_score,
+                position=position,
+            )
+            for position, row in enumerate(rows)
+        ), **settings)
+
+
+def _catalog_version(questions):
+    # Question ids are unique across banks, so this also tells banks apart.
+    digest = hashlib.sha1()
+    for question in questions:
+        digest.update(json.dumps(
+            [question.id, question.category, question.subcategory, question.text,
+             question.options, question.scores, question.max_score],
+            ensure_ascii=False,
+        ).encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+# Compiled catalogs by bank id, least recently used first. Published banks
+# never change, so entries only leave when evicted or explicitly dropped.
+_catalogs = OrderedDict()
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(bank_id, load_bank, max_entries=64):
+    """Return the worker's compiled catalog of a bank, loading it with `load_bank(bank_id)` on first use.
+
+    `load_bank` returns the bank row and its question rows in page order.
+    """
+    with _catalogs_lock:
+        catalog = _catalogs.get(bank_id)
+        if catalog is not None:
+            _catalogs.move_to_end(bank_id)
+            return catalog
+    bank, rows = load_bank(bank_id)
+    catalog = QuestionCatalog.from_rows(rows, bank)
+    with _catalogs_lock:
+        catalog = _catalogs.setdefault(bank_id, catalog)
+        while len(_catalogs) > max_entries:
+            _catalogs.popitem(last=False)
+    return catalog
+
+
+def invalidate_catalog(bank_id=None):
+    """Drop a bank's cached catalog (all of them by default) so the next access reloads it."""
+    with _catalogs_lock:
+        if bank_id is None:
+            _catalogs.clear()
+        else:
+            _catalogs.pop(bank_id, None)
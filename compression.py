@@ -0,0 +1,67 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: without it responses are only gzipped
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/plain', 'text/csv', 'text/css', 'text/javascript', 'application/javascript',
+    'application/json', 'application/xml', 'image/svg+xml',
+}
+
+
+def init_compression(app, metrics=None):
+    """Compress text responses with brotli or gzip, whichever the client prefers.
+
+    Bodies shorter than COMPRESS_MIN_BYTES are sent as they are. So are
+    responses streamed from a generator or a file, which covers exports,
+    PDF reports and static files (those are compressed at build time), and
+    any response that already has a Content-Encoding. The ETag of a
+    compressed response is made weak, since its bytes depend on the
+    encoding. If-None-Match compares ETags weakly, so clients still get
+    their 304s.
+    """
+    min_bytes = app.config['COMPRESS_MIN_BYTES']
+    gzip_level = app.config['COMPRESS_GZIP_LEVEL']
+    brotli_quality = app.config['COMPRESS_BROTLI_QUALITY']
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in COMPRESSIBLE_TYPES or response.direct_passthrough or response.is_streamed \
+                or 'Content-Encoding' in response.headers or response.status_code < 200 \
+                or response.status_code in (204, 206):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+        if response.status_code == 304:
+            # Revalidated with the ETag the compressed page was sent with.
+            weaken_etag(response)
+            return response
+        data = response.get_data()
+        if len(data) < min_bytes:
+            return response
+        if encoding == 'br':
+            body = brotli.compress(data, quality=brotli_quality)
+        else:
+            body = gzip.compress(data, compresslevel=gzip_level, mtime=0)
+        if len(body) >= len(data):
+            return response
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        weaken_etag(response)
+        if metrics is not None:
+            metrics.increment('http_compressed_bytes_total', (encoding, 'original'), len(data))
+            metrics.increment('http_compressed_bytes_total', (encoding, 'sent'), len(body))
+        return response
+
+
+def weaken_etag(response):
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
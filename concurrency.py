@@ -0,0 +1,30 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+
+def cooperative():
+    """True when gevent has monkey-patched threading in this process, as in gunicorn's gevent workers."""
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('threading')
+
+
+def thread_pool(workers, name):
+    """A ThreadPoolExecutor whose threads are OS threads, even under gevent.
+
+    Once threading is patched, the standard pool runs its tasks as
+    greenlets on the event loop's thread, where CPU-bound work stalls every
+    other request of the worker. gevent's executor runs them on OS threads
+    and lets the greenlet waiting on the result yield meanwhile.
+    """
+    if cooperative():
+        from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+        return GeventThreadPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+
+
+def run_blocking(function, *args):
+    """Call `function`, on an OS thread of gevent's hub pool when serving on greenlets."""
+    if not cooperative():
+        return function(*args)
+    import gevent
+    return gevent.get_hub().threadpool.apply(function, args)
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+
+from concurrency import cooperative
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def database_uri():
+    uri = os.environ.get('DATABASE_URL', 'sqlite:///users.db')
+    # Heroku-style URLs use the scheme SQLAlchemy dropped in 1.4.
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY', '001')
+    SQLALCHEMY_DATABASE_URI = database_uri()
+
+    # Server databases (PostgreSQL, MySQL) share a pool per worker process.
+    DB_POOL_SIZE = env_int('DB_POOL_SIZE', 5)
+    DB_MAX_OVERFLOW = env_int('DB_MAX_OVERFLOW', 10)
+    DB_POOL_TIMEOUT = env_int('DB_POOL_TIMEOUT', 30)
+    DB_POOL_RECYCLE = env_int('DB_POOL_RECYCLE', 1800)
+
+    # SQLite: how long a writer waits on the database lock before failing.
+    SQLITE_BUSY_TIMEOUT_MS = env_int('SQLITE_BUSY_TIMEOUT_MS', 5000)
+
+    REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR')
+    REPORT_CACHE_MAX_BYTES = env_int('REPORT_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+    # Threads per process that render PDF reports queued by inline render_report jobs.
+    REPORT_RENDER_WORKERS = env_int('REPORT_RENDER_WORKERS', 1)
+    # Results models and page fragments each worker keeps in memory.
+    RESULTS_CACHE_SIZE = env_int('RESULTS_CACHE_SIZE', 1024)
+    EXPORT_DIR = os.environ.get('EXPORT_DIR')
+    EXPORT_PROCESSES = env_int('EXPORT_PROCESSES', None)
+    # Seconds an unfinished report export may go without saving its status
+    # before it is taken for dead, failed and its partial archive removed.
+    EXPORT_STALE_SECONDS = env_int('EXPORT_STALE_SECONDS', 300)
+    # Seconds a worker reuses the cohort snapshot before checking for a newer one.
+    BENCHMARK_CACHE_SECONDS = env_int('BENCHMARK_CACHE_SECONDS', 60)
+    # Seconds before a completion retakes the cohort snapshot that percentile ranks are read from.
+    BENCHMARK_SNAPSHOT_SECONDS = env_int('BENCHMARK_SNAPSHOT_SECONDS', 3600)
+    # Percentile ranks are only shown once this many assessments are complete.
+    BENCHMARK_MIN_COHORT = env_int('BENCHMARK_MIN_COHORT', 10)
+    # How long API responses are kept for replay under their Idempotency-Key.
+    IDEMPOTENCY_KEY_TTL_HOURS = env_int('IDEMPOTENCY_KEY_TTL_HOURS', 24)
+    # Run background jobs in the request that queues them, for development without a job worker.
+    JOBS_INLINE = os.environ.get('JOBS_INLINE') == '1'
+    # Threads per job worker process, seconds between polls of an empty queue,
+    # first retry delay (doubled per attempt) and when a running job counts as abandoned.
+    JOB_WORKER_THREADS = env_int('JOB_WORKER_THREADS', 2)
+    JOB_POLL_SECONDS = env_int('JOB_POLL_SECONDS', 1)
+    JOB_RETRY_SECONDS = env_int('JOB_RETRY_SECONDS', 10)
+    JOB_LOCK_TIMEOUT_SECONDS = env_int('JOB_LOCK_TIMEOUT_SECONDS', 600)
+    # Compiled templates shared by the workers; defaults to instance/jinja_cache.
+    JINJA_CACHE_DIR = os.environ.get('JINJA_CACHE_DIR')
+    # Per-worker metric snapshots are summed from here when /metrics is scraped.
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    # Seconds between a worker's snapshot writes; a scrape always writes its own worker's.
+    METRICS_FLUSH_SECONDS = env_int('METRICS_FLUSH_SECONDS', 5)
+    # Text responses at least this long are sent brotli or gzip compressed to clients that accept it.
+    COMPRESS_MIN_BYTES = env_int('COMPRESS_MIN_BYTES', 1024)
+    COMPRESS_GZIP_LEVEL = env_int('COMPRESS_GZIP_LEVEL', 6)
+    COMPRESS_BROTLI_QUALITY = env_int('COMPRESS_BROTLI_QUALITY', 4)
+    # Request bodies up to this size are read in full before the view runs.
+    REQUEST_BUFFER_BYTES = env_int('REQUEST_BUFFER_BYTES', 64 * 1024)
+    # Bearer token required to scrape /metrics; open when unset.
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Log requests slower than this, with their SQL statements; 0 disables it.
+    SLOW_REQUEST_MS = env_int('SLOW_REQUEST_MS', 0)
+    # Test mode: fail any request that runs more SQL statements than its
+    # budget. QUERY_BUDGETS maps endpoints to their own budget.
+    QUERY_BUDGET = None
+    QUERY_BUDGETS = {}
+    # werkzeug hash method for new passwords; older hashes are upgraded at sign-in.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:260000')
+    # Under gevent: threads hashing passwords per worker, and the checks allowed to queue for them.
+    PASSWORD_HASH_WORKERS = env_int('PASSWORD_HASH_WORKERS', 2)
+    PASSWORD_HASH_MAX_PENDING = env_int('PASSWORD_HASH_MAX_PENDING', 32)
+    # Seconds a worker reuses a signed-in user without querying it; 0 disables it.
+    USER_CACHE_SECONDS = env_int('USER_CACHE_SECONDS', 30)
+    # Compiled question banks each worker keeps, least recently used evicted first.
+    QUESTION_BANK_CACHE_SIZE = env_int('QUESTION_BANK_CACHE_SIZE', 64)
+    # New users whose email is at one of these domains join its tenant: "acme.com=acme,example.org=example".
+    TENANT_DOMAINS = dict((part.strip() for part in item.lower().split('=', 1))
+                          for item in os.environ.get('TENANT_DOMAINS', '').split(',') if '=' in item)
+    ADMIN_EMAILS = {email.strip().lower() for email in os.environ.get('ADMIN_EMAILS', '').split(',') if email.strip()}
+
+
+def engine_options(config):
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('sqlite'):
+        options = {'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000}}
+        if cooperative() and uri != 'sqlite://' and ':memory:' not in uri:
+            # SQLite waits for a lock without yielding to other greenlets, so
+            # one waiting on a write its own worker started would stall that
+            # write too. A single connection per gevent worker, which its
+            # greenlets take turns on, keeps them from contending.
+            options.update(pool_size=1, max_overflow=0)
+        return options
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+
+
+def sqlite_pragmas(busy_timeout_ms):
+    def set_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        # WAL lets readers proceed while a writer holds the lock; NORMAL
+        # sync is durable across application crashes in WAL mode.
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout={int(busy_timeout_ms)}')
+        cursor.close()
+    return set_pragmas
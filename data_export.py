@@ -0,0 +1,254 @@
+import base64
+import csv
+import io
+from collections import namedtuple
+from datetime import datetime
+
+from models import db, Assessment, AssessmentQuestion, Response, question_catalog
+
+# Rows fetched per round trip; also the CSV flush and Parquet row group size.
+CHUNK_SIZE = 20000
+
+Column = namedtuple('Column', ['name', 'kind'])
+
+DATASETS = {
+    'assessments': (
+        Column('assessment_id', 'int'), Column('user_id', 'int'), Column('bank_id', 'int'), Column('status', 'str'),
+        Column('start_date', 'datetime'), Column('completion_date', 'datetime'),
+        Column('current_question', 'int'), Column('strategy_score', 'float'),
+        Column('governance_score', 'float'), Column('data_infrastructure_score', 'float'),
+        Column('organization_score', 'float'), Column('total_score', 'float'),
+        Column('readiness_level', 'str'),
+    ),
+    'responses': (
+        Column('assessment_id', 'int'), Column('user_id', 'int'), Column('status', 'str'),
+        Column('completion_date', 'datetime'), Column('question_id', 'int'), Column('category', 'str'),
+        Column('subcategory', 'str'), Column('option_index', 'int'), Column('answer', 'str'),
+        Column('score', 'float'), Column('bank_version', 'str'),
+    ),
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+ExportFilters = namedtuple('ExportFilters', ['status', 'since', 'until', 'after'])
+
+
+class ExportError(ValueError):
+    pass
+
+
+def encode_watermark(batch):
+    return base64.urlsafe_b64encode(f'batch|{batch}'.encode('utf-8')).decode('ascii')
+
+
+def decode_watermark(watermark):
+    try:
+        kind, batch = base64.urlsafe_b64decode(watermark.encode('ascii')).decode('utf-8').split('|')
+        if kind != 'batch':
+            raise ValueError(kind)
+        return int(batch)
+    except ValueError:
+        raise ExportError(f'Invalid watermark: {watermark!r}')
+
+
+def export_filters(status=None, since=None, until=None, after=None):
+    """Validate raw filter values (strings from a query string or the CLI).
+
+    `since` and `until` bound the completion date (inclusive, exclusive).
+    `after` is the watermark returned by a previous export; it restricts
+    the export to assessments completed since then.
+    """
+    def parse_date(name, value):
+        try:
+            return datetime.fromisoformat(value) if value else None
+        except ValueError:
+            raise ExportError(f'{name} must be an ISO 8601 date or datetime, got {value!r}')
+
+    if status and status != 'Complete' and (since or until or after):
+        raise ExportError('Date ranges and watermarks only apply to completed assessments.')
+    return ExportFilters(
+        status=status or None,
+        since=parse_date('since', since),
+        until=parse_date('until', until),
+        after=decode_watermark(after) if after else None,
+    )
+
+
+def _incremental(filters):
+    return bool(filters.status == 'Complete' or filters.after or filters.since or filters.until)
+
+
+def _assessment_conditions(filters):
+    conditions = []
+    if filters.status:
+        conditions.append(Assessment.status == filters.status)
+    if _incremental(filters):
+        conditions.append(Assessment.status == 'Complete')
+        conditions.append(Assessment.completion_date.isnot(None))
+    if filters.since:
+        conditions.append(Assessment.completion_date >= filters.since)
+    if filters.until:
+        conditions.append(Assessment.completion_date < filters.until)
+    if filters.after:
+        conditions.append(Assessment.export_batch > filters.after)
+    return conditions
+
+
+def high_watermark(filters):
+    """Put completed assessments that no export has seen into a new batch; returns the latest batch, or None.
+
+    The watermark is that batch number rather than a completion date:
+    assessments that commit late, or are imported with an earlier
+    completion date, still land in a batch after every watermark handed
+    out so far. Run incremental exports one at a time.
+    """
+    if not _incremental(filters):
+        return None
+    latest = db.session.query(db.func.max(Assessment.export_batch)).scalar() or 0
+    added = Assessment.query.filter(Assessment.status == 'Complete', Assessment.export_batch.is_(None)) \
+        .update({'export_batch': latest + 1}, synchronize_session=False)
+    db.session.commit()
+    if added:
+        return latest + 1
+    return latest or None
+
+
+def _query(dataset, filters, watermark):
+    conditions = _assessment_conditions(filters)
+    if _incremental(filters):
+        # Bound the export by the watermark it reports, so rows completed
+        # while it streams are left for the next incremental run.
+        conditions.append(Assessment.export_batch <= watermark if watermark else db.false())
+    order = [Assessment.export_batch, Assessment.completion_date, Assessment.id] \
+        if _incremental(filters) else [Assessment.id]
+    if dataset == 'assessments':
+        return db.select(
+            Assessment.id, Assessment.user_id, Assessment.bank_id, Assessment.status, Assessment.start_date,
+            Assessment.completion_date, Assessment.current_question, Assessment.strategy_score,
+            Assessment.governance_score, Assessment.data_infrastructure_score,
+            Assessment.organization_score, Assessment.total_score, Assessment.readiness_level,
+        ).where(*conditions).order_by(*order)
+    return db.select(
+        Response.assessment_id, Assessment.user_id, Assessment.status, Assessment.completion_date,
+        Response.question_id, AssessmentQuestion.category, AssessmentQuestion.subcategory,
+        Response.option_index, Response.score, Response.bank_version, Assessment.bank_id,
+    ).join(Assessment, Assessment.id == Response.assessment_id) \
+        .join(AssessmentQuestion, AssessmentQuestion.id == Response.question_id) \
+        .where(*conditions).order_by(*order, Response.question_id)
+
+
+def export_rows(dataset, filters, watermark=None, chunk_size=CHUNK_SIZE):
+    """Yield lists of row tuples, `chunk_size` rows at a time, from a server-side cursor."""
+    result = db.session.execute(
+        _query(dataset, filters, watermark).execution_options(stream_results=True, yield_per=chunk_size))
+    if dataset == 'assessments':
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+        return
+    catalogs = {}
+    for partition in result.partitions():
+        rows = []
+        for (assessment_id, user_id, status, completion_date, question_id, category, subcategory,
+             option_index, score, bank_version, bank_id) in partition:
+            if bank_id not in catalogs:
+                catalogs[bank_id] = question_catalog(bank_id)
+            question = catalogs[bank_id].by_id.get(question_id)
+            answer = question.options[option_index] \
+                if question is not None and 0 <= option_index < len(question.options) else None
+            rows.append((assessment_id, user_id, status, completion_date, question_id, category, subcategory,
+                         option_index, answer, score, bank_version))
+        yield rows
+
+
+def write_csv(columns, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in columns])
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkSink:
+    """Write-only file object that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def writable(self):
+        return True
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _arrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ExportError('Parquet and Arrow exports need pyarrow: pip install pyarrow')
+    return pyarrow
+
+
+def write_arrow(columns, chunks, fmt):
+    pa = _arrow()
+    types = {'int': pa.int64(), 'float': pa.float64(), 'str': pa.string(), 'datetime': pa.timestamp('us')}
+    schema = pa.schema([(column.name, types[column.kind]) for column in columns])
+    sink = _ChunkSink()
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    # Each chunk becomes one row group (Parquet) or record batch (Arrow).
+    for rows in chunks:
+        if rows:
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def stream_export(dataset, fmt, filters, watermark=None, chunk_size=CHUNK_SIZE):
+    """Encoded chunks of an export; memory is bounded by `chunk_size` rows.
+
+    For exports of completed assessments, pass the `high_watermark` taken
+    before streaming starts; the export stops at that batch.
+    """
+    if dataset not in DATASETS:
+        raise ExportError(f"Unknown dataset {dataset!r}; choose from {', '.join(DATASETS)}")
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown format {fmt!r}; choose from {', '.join(FORMATS)}")
+    if fmt != 'csv':
+        _arrow()
+    chunks = export_rows(dataset, filters, watermark, chunk_size)
+    if fmt == 'csv':
+        return write_csv(DATASETS[dataset], chunks)
+    return write_arrow(DATASETS[dataset], chunks, fmt)
@@ -0,0 +1,81 @@
+import gc
+import os
+
+# WEB_WORKER_CLASS=gevent serves each worker's requests on greenlets, so
+# open pages, autosaves and slow clients wait on the network without
+# holding a worker. Patch before anything else is imported (with
+# --preload, the app itself), so every module sees cooperative sockets
+# and locks.
+worker_class = os.environ.get('WEB_WORKER_CLASS', 'sync')
+worker_connections = int(os.environ.get('WEB_WORKER_CONNECTIONS', '1000'))
+if worker_class == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:  # optional: only PostgreSQL queries need it to yield
+        pass
+    else:
+        patch_psycopg()
+
+
+# Set by on_starting, for child_exit.
+metrics_dir = None
+
+
+def on_starting(server):
+    # Runs once in the master process, before any worker is forked, so the
+    # schema and question bank are migrated once per deployment rather than
+    # once per worker. Metric snapshots of the previous run's workers are
+    # dropped here too, and static assets are built if the image wasn't.
+    # Templates are compiled into the shared bytecode cache, so workers
+    # load them instead of each compiling them on first use.
+    from main import create_app, upgrade_database, compile_templates
+    from instrumentation import clear_metrics
+    from assets import build_assets, load_manifest
+    if not load_manifest():
+        build_assets()
+        if server.cfg.preload_app:
+            # The preloaded app was created before this hook ran.
+            server.app.wsgi().extensions['assets'].reload()
+    global metrics_dir
+    app = create_app()
+    metrics_dir = app.config['METRICS_DIR']
+    clear_metrics(metrics_dir)
+    compile_templates(app)
+    if os.environ.get('MIGRATE_ON_START', '1') != '1':
+        return
+    upgrade_database(app)
+
+
+def when_ready(server):
+    # With --preload, load what the workers would otherwise each load on
+    # their own, then move everything allocated so far out of the garbage
+    # collector's reach: collections then never write to those pages, so
+    # they stay shared between the forked workers.
+    if not server.cfg.preload_app:
+        return
+    from main import warm_up
+    warm_up(server.app.wsgi())
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from main import after_fork
+        after_fork(server.app.wsgi())
+
+
+def worker_exit(server, worker):
+    # Metrics are flushed every few seconds; write what came since.
+    app = getattr(worker, 'wsgi', None)
+    if app is not None:
+        app.extensions['metrics'].flush(force=True)
+
+
+def child_exit(server, worker):
+    # Runs in the master. The exited worker's metrics are added to those of
+    # earlier exits, so a restarted worker leaves no snapshot behind.
+    from instrumentation import retire_worker
+    if metrics_dir:
+        retire_worker(metrics_dir, worker.pid)
@@ -0,0 +1,333 @@
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from flask import g, has_request_context, request
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# name: (type, label names, help)
+METRICS = {
+    'http_requests_total': ('counter', ('endpoint', 'method', 'status'),
+                            'Requests handled, by endpoint, method and status.'),
+    'http_request_duration_seconds': ('histogram', ('endpoint',), 'Time to produce a response, by endpoint.'),
+    'db_queries_per_request': ('histogram', ('endpoint',), 'SQL statements executed per request, by endpoint.'),
+    'db_query_duration_seconds_per_request': ('histogram', ('endpoint',), 'Total SQL time per request, by endpoint.'),
+    'db_queries_total': ('counter', (), 'SQL statements executed, inside requests or not.'),
+    'http_compressed_bytes_total': ('counter', ('encoding', 'size'),
+                                    'Body bytes of compressed responses, before (original) and after (sent) compression.'),
+    'pdf_render_duration_seconds': ('histogram', (), 'Time to render one PDF report.'),
+    'report_cache_events_total': ('counter', ('event',), 'Report cache hits, misses, renders and evictions.'),
+    'results_cache_events_total': ('counter', ('event',), 'Results cache hits, misses and evictions.'),
+    'jobs_total': ('counter', ('kind', 'outcome'), 'Background jobs run, by kind and outcome (done, retried, failed, lost).'),
+    'job_duration_seconds': ('histogram', ('kind',), 'Time to run one background job, by kind.'),
+    'job_queue_depth': ('gauge', ('kind', 'status'), 'Background jobs queued, running or failed, by kind.'),
+    'job_queue_oldest_seconds': ('gauge', ('kind', 'status'), 'Age of the oldest queued, running or failed job.'),
+    'worker_startup_seconds': ('histogram', ('stage',),
+                               'Time from process start (a worker\'s fork) to the app being created and to its first response.'),
+}
+
+STARTUP_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 30.0, 60.0)
+
+_imported = time.monotonic()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+# Where the snapshots of exited workers are added up, together with the
+# pids they came from.
+EXITED_SNAPSHOT = 'exited.json'
+
+
+class Metrics:
+    """Counters and histograms of one worker process.
+
+    Each worker writes a snapshot to `directory` at most every
+    `flush_interval` seconds, and a scrape adds up every snapshot there, so
+    whichever gunicorn worker answers /metrics reports totals for the whole
+    server. An exited worker's snapshot is folded into EXITED_SNAPSHOT (see
+    retire_worker), so counters never go backwards and the directory holds
+    one file per live worker.
+    """
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._flushed_at = 0.0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def increment(self, name, labels=(), amount=1):
+        key = (name, tuple(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=(), buckets=LATENCY_BUCKETS):
+        key = (name, tuple(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {'buckets': list(buckets), 'counts': [0] * len(buckets),
+                                                    'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(histogram['buckets']):
+                if value <= bound:
+                    histogram['counts'][index] += 1
+                    break
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return _snapshot(self.counters, self.histograms)
+
+    def flush(self, force=False):
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._flushed_at < self.flush_interval:
+            return
+        self._flushed_at = now
+        _write_snapshot(os.path.join(self.directory, f'{os.getpid()}.json'), self.snapshot())
+
+    def collect(self):
+        """Counters and histograms summed over every worker's snapshot."""
+        if not self.directory:
+            return _combine([self.snapshot()])
+        self.flush(force=True)
+        exited = _read_snapshot(os.path.join(self.directory, EXITED_SNAPSHOT))
+        snapshots = [exited] if exited else []
+        # A worker's own file outlives its folding into the exited snapshot
+        # for a moment; the pids listed there are not counted twice.
+        retired = {f'{pid}.json' for pid in exited['pids']} if exited else set()
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            name = os.path.basename(path)
+            if name == EXITED_SNAPSHOT or name in retired:
+                continue
+            snapshot = _read_snapshot(path)
+            if snapshot:
+                snapshots.append(snapshot)
+        return _combine(snapshots)
+
+    def render(self, gauges=()):
+        """Prometheus text exposition format; `gauges` are (name, labels, value) read at scrape time."""
+        counters, histograms = self.collect()
+        lines = []
+        described = set()
+
+        def describe(name):
+            if name not in described and name in METRICS:
+                kind, _, text = METRICS[name]
+                lines.append(f'# HELP {name} {text}')
+                lines.append(f'# TYPE {name} {kind}')
+                described.add(name)
+
+        def label_text(name, labels, extra=()):
+            pairs = list(zip(METRICS[name][1] if name in METRICS else (), labels)) + list(extra)
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+        for (name, labels), value in sorted(counters.items()):
+            describe(name)
+            lines.append(f'{name}{label_text(name, labels)} {value}')
+        for name, labels, value in sorted(gauges):
+            describe(name)
+            lines.append(f'{name}{label_text(name, labels)} {value}')
+        for (name, labels), histogram in sorted(histograms.items()):
+            describe(name)
+            cumulative = 0
+            for bound, count in zip(histogram['buckets'], histogram['counts']):
+                cumulative += count
+                lines.append(f"{name}_bucket{label_text(name, labels, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{name}_bucket{label_text(name, labels, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{name}_sum{label_text(name, labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{label_text(name, labels)} {histogram['count']}")
+        return '\n'.join(lines) + '\n'
+
+
+def _snapshot(counters, histograms):
+    return {
+        'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+        'histograms': [[name, list(labels), dict(histogram, counts=list(histogram['counts']))]
+                       for (name, labels), histogram in histograms.items()],
+    }
+
+
+def _combine(snapshots):
+    counters, histograms = {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, histogram in snapshot['histograms']:
+            key = (name, tuple(labels))
+            total = histograms.get(key)
+            if total is None:
+                histograms[key] = dict(histogram, counts=list(histogram['counts']))
+                continue
+            total['counts'] = [a + b for a, b in zip(total['counts'], histogram['counts'])]
+            total['sum'] += histogram['sum']
+            total['count'] += histogram['count']
+    return counters, histograms
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_snapshot(path, snapshot):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as tmp:
+        json.dump(snapshot, tmp)
+    os.replace(tmp_path, path)
+
+
+def retire_worker(directory, pid):
+    """Fold the snapshot of exited worker `pid` into EXITED_SNAPSHOT and remove its file.
+
+    Runs in gunicorn's master, one exit at a time.
+    """
+    path = os.path.join(directory, f'{pid}.json')
+    snapshot = _read_snapshot(path)
+    if snapshot is None:
+        return
+    exited_path = os.path.join(directory, EXITED_SNAPSHOT)
+    exited = _read_snapshot(exited_path) or {'counters': [], 'histograms': [], 'pids': []}
+    # Earlier pids whose files are gone need no masking any more.
+    pids = [old for old in exited['pids'] if os.path.exists(os.path.join(directory, f'{old}.json'))]
+    _write_snapshot(exited_path, dict(_snapshot(*_combine([exited, snapshot])), pids=pids + [pid]))
+    os.remove(path)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value))
+
+
+def process_age():
+    """Seconds since this process was created; for a gunicorn worker, since it was forked."""
+    try:
+        with open('/proc/self/stat') as f:
+            # Field 22, counted after the parenthesised command name, which may contain spaces.
+            started_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - started_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        # Not Linux: count from when this module was imported.
+        return time.monotonic() - _imported
+
+
+def record_startup(metrics, stage):
+    age = process_age()
+    metrics.observe('worker_startup_seconds', age, (stage,), STARTUP_BUCKETS)
+    logger.info('Startup: %s %.0f ms after the process started', stage.replace('_', ' '), age * 1000)
+    metrics.flush()
+
+
+def clear_metrics(directory):
+    """Drop snapshots, and snapshot writes cut short, left by a previous server run."""
+    for path in glob.glob(os.path.join(directory, '*.json')) + glob.glob(os.path.join(directory, '*.tmp')):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            logger.warning('Could not remove metrics snapshot %s: %s', path, exc)
+
+
+def init_instrumentation(app):
+    metrics = Metrics(app.config['METRICS_DIR'], app.config['METRICS_FLUSH_SECONDS'])
+    app.extensions['metrics'] = metrics
+    slow_request_ms = app.config['SLOW_REQUEST_MS']
+    query_budget = app.config['QUERY_BUDGET']
+    query_budgets = app.config['QUERY_BUDGETS']
+
+    # The start time is kept on the statement's execution context, which is
+    # dropped with it, so a statement that fails leaves nothing behind.
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_query_started', None)
+        elapsed = time.perf_counter() - started if started is not None else 0.0
+        metrics.increment('db_queries_total')
+        if has_request_context() and 'request_started' in g:
+            g.query_count += 1
+            g.query_seconds += elapsed
+            if slow_request_ms or query_budget is not None or query_budgets:
+                g.queries.append((elapsed, statement))
+
+    with app.app_context():
+        db.event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        db.event.listen(db.engine, 'after_cursor_execute', after_cursor_execute)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.query_count = 0
+        g.query_seconds = 0.0
+        g.queries = []
+
+    first_response = threading.Event()
+
+    @app.after_request
+    def record_request(response):
+        if 'request_started' not in g:
+            return response
+        if not first_response.is_set():
+            first_response.set()
+            record_startup(metrics, 'first_response')
+        elapsed = time.perf_counter() - g.request_started
+        endpoint = request.endpoint or 'unmatched'
+        metrics.increment('http_requests_total', (endpoint, request.method, response.status_code))
+        metrics.observe('http_request_duration_seconds', elapsed, (endpoint,))
+        metrics.observe('db_queries_per_request', g.query_count, (endpoint,), QUERY_COUNT_BUCKETS)
+        metrics.observe('db_query_duration_seconds_per_request', g.query_seconds, (endpoint,))
+        metrics.flush()
+
+        if slow_request_ms and elapsed * 1000 >= slow_request_ms:
+            logger.warning('Slow request: %s %s (%s) took %.0f ms with %d queries (%.0f ms in SQL)\n%s',
+                           request.method, request.path, endpoint, elapsed * 1000, g.query_count,
+                           g.query_seconds * 1000, format_queries(g.queries))
+        budget = query_budgets.get(endpoint, query_budget)
+        if budget is not None and g.query_count > budget:
+            raise QueryBudgetExceeded(f'{request.method} {request.path} ({endpoint}) ran {g.query_count} '
+                                      f'queries, over its budget of {budget}:\n{format_queries(g.queries)}')
+        return response
+
+    return metrics
+
+
+def format_queries(queries, limit=50):
+    lines = [f'  {elapsed * 1000:8.2f} ms  {" ".join(statement.split())}' for elapsed, statement in queries[:limit]]
+    if len(queries) > limit:
+        lines.append(f'  ... {len(queries) - limit} more')
+    return '\n'.join(lines)
@@ -0,0 +1,217 @@
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+
+from models import db, Job
+
+logger = logging.getLogger(__name__)
+
+JobType = namedtuple('JobType', ['handler', 'max_attempts', 'concurrency'])
+
+# kind: JobType, filled in by @job.
+JOB_TYPES = {}
+
+
+def job(kind, max_attempts=5, concurrency=None):
+    """Register the decorated function as the handler of `kind` jobs.
+
+    The handler is called with the job's payload as keyword arguments,
+    inside an app context. It must leave its changes uncommitted: they are
+    committed together with the job's removal from the queue, so a job that
+    fails and is retried never applies them twice. `concurrency` caps how
+    many jobs of this kind a worker runs at once.
+    """
+    def register(handler):
+        JOB_TYPES[kind] = JobType(handler, max_attempts, concurrency)
+        return handler
+    return register
+
+
+def enqueue(kind, **payload):
+    """Queue a `kind` job; it is added to the session and queued when the caller commits.
+
+    With JOBS_INLINE set (development and tests) the handler runs right
+    away instead, inside the caller's transaction.
+    """
+    job_type = JOB_TYPES[kind]
+    if current_app.config['JOBS_INLINE']:
+        job_type.handler(**payload)
+        return None
+    queued = Job(kind=kind, payload=payload, max_attempts=job_type.max_attempts)
+    db.session.add(queued)
+    return queued
+
+
+def queue_depth():
+    """[(kind, status, jobs, age in seconds of the oldest)] of every job waiting, running or failed."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows = db.session.query(Job.kind, Job.status, db.func.count(), db.func.min(Job.created_at)) \
+        .group_by(Job.kind, Job.status).all()
+    return [(kind, status, count, (now - oldest.replace(tzinfo=None)).total_seconds() if oldest else 0.0)
+            for kind, status, count, oldest in rows]
+
+
+def requeue_failed(kind=None):
+    """Give failed jobs (of `kind`) another round of attempts; returns how many."""
+    query = Job.query.filter(Job.status == 'failed')
+    if kind:
+        query = query.filter(Job.kind == kind)
+    requeued = query.update({'status': 'queued', 'attempts': 0, 'run_at': datetime.now(timezone.utc)},
+                            synchronize_session=False)
+    db.session.commit()
+    return requeued
+
+
+class Worker:
+    """Runs queued jobs on `threads` threads until stopped.
+
+    Jobs are claimed with a compare-and-set on their status, so several
+    worker processes can share the queue. Ready jobs run oldest first,
+    skipping kinds already at their concurrency limit in this worker. A
+    failed job is retried after `retry_seconds`, doubling with every
+    attempt, until its max_attempts are used up; it is then kept as
+    failed. Jobs left running by a worker that died are queued again once
+    their lock is `lock_timeout` seconds old.
+    """
+
+    def __init__(self, app, threads=2, poll_interval=1.0, retry_seconds=10, lock_timeout=600, name=None):
+        self.app = app
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.retry_seconds = retry_seconds
+        self.lock_timeout = lock_timeout
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.metrics = app.extensions.get('metrics')
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def run(self, stop=None):
+        """Work until `stop` (a threading.Event) is set."""
+        stop = stop or threading.Event()
+        threads = [threading.Thread(target=self._loop, args=(stop,), name=f'job-worker-{number}', daemon=True)
+                   for number in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        try:
+            while not stop.wait(self.lock_timeout / 4):
+                self.requeue_stale()
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def run_until_empty(self):
+        """Run every ready job in this thread, then return how many ran."""
+        self.requeue_stale()
+        count = 0
+        while self.run_once():
+            count += 1
+        return count
+
+    def _loop(self, stop):
+        while not stop.is_set():
+            try:
+                ran = self.run_once()
+            except Exception:
+                logger.exception('Job worker %s failed to claim a job', self.name)
+                ran = False
+            if not ran:
+                stop.wait(self.poll_interval)
+
+    def run_once(self):
+        """Claim and run one ready job; False when there was none."""
+        with self.app.app_context():
+            claimed = self.claim()
+            if claimed is None:
+                return False
+            try:
+                self.execute(*claimed)
+            finally:
+                with self._lock:
+                    self._running[claimed[1]] -= 1
+            return True
+
+    def claim(self):
+        """(id, kind, payload, attempts, max_attempts, lock) of a job now locked by this worker, or None."""
+        with self._lock:
+            busy = [kind for kind, job_type in JOB_TYPES.items()
+                    if job_type.concurrency is not None and self._running.get(kind, 0) >= job_type.concurrency]
+        now = datetime.now(timezone.utc)
+        candidates = db.session.query(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts) \
+            .filter(Job.status == 'queued', Job.run_at <= now, Job.kind.in_(list(JOB_TYPES)), ~Job.kind.in_(busy)) \
+            .order_by(Job.run_at, Job.id).limit(self.threads + 1).all()
+        db.session.rollback()
+        for job_id, kind, payload, attempts, max_attempts in candidates:
+            job_type = JOB_TYPES[kind]
+            with self._lock:
+                if job_type.concurrency is not None and self._running.get(kind, 0) >= job_type.concurrency:
+                    continue
+                self._running[kind] = self._running.get(kind, 0) + 1
+            # Unique per claim, so a run whose lock timed out can't finish a later run of the same job.
+            lock = f'{self.name}/{uuid.uuid4().hex[:12]}'
+            claimed = Job.query.filter(Job.id == job_id, Job.status == 'queued').update(
+                {'status': 'running', 'attempts': Job.attempts + 1, 'locked_by': lock, 'locked_at': now},
+                synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                return job_id, kind, payload, attempts + 1, max_attempts, lock
+            # Another worker got there first.
+            with self._lock:
+                self._running[kind] -= 1
+        return None
+
+    def execute(self, job_id, kind, payload, attempts, max_attempts, lock):
+        started = time.perf_counter()
+        try:
+            JOB_TYPES[kind].handler(**payload)
+            finished = Job.query.filter(Job.id == job_id, Job.status == 'running', Job.locked_by == lock) \
+                .delete(synchronize_session=False)
+            if finished:
+                db.session.commit()
+                outcome = 'done'
+            else:
+                # The lock timed out and the job was queued again; its next run applies the changes.
+                db.session.rollback()
+                outcome = 'lost'
+        except Exception:
+            db.session.rollback()
+            logger.exception('Job %s (%s) failed on attempt %d of %d', job_id, kind, attempts, max_attempts)
+            outcome = 'failed' if attempts >= max_attempts else 'retried'
+            retry_at = datetime.now(timezone.utc) + timedelta(seconds=self.retry_seconds * 2 ** (attempts - 1))
+            Job.query.filter(Job.id == job_id, Job.locked_by == lock).update(
+                {'status': 'failed' if outcome == 'failed' else 'queued', 'run_at': retry_at,
+                 'locked_by': None, 'locked_at': None, 'last_error': traceback.format_exc()[-4000:]},
+                synchronize_session=False)
+            db.session.commit()
+        self._record(kind, outcome, time.perf_counter() - started)
+
+    def requeue_stale(self):
+        """Queue again the jobs whose worker stopped holding them; returns how many.
+
+        A job that has used up its attempts this way is failed instead, so
+        one that kills its worker is not retried forever.
+        """
+        with self.app.app_context():
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.lock_timeout)
+            requeued = Job.query.filter(Job.status == 'running', Job.locked_at < cutoff).update(
+                {'status': db.case((Job.attempts >= Job.max_attempts, 'failed'), else_='queued'),
+                 'locked_by': None, 'locked_at': None}, synchronize_session=False)
+            db.session.commit()
+        if requeued:
+            logger.warning('Requeued %d jobs whose worker stopped', requeued)
+        return requeued
+
+    def _record(self, kind, outcome, elapsed):
+        if self.metrics is None:
+            return
+        self.metrics.increment('jobs_total', (kind, outcome))
+        self.metrics.observe('job_duration_seconds', elapsed, (kind,))
+        self.metrics.flush()
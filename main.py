@@ -1,575 +1,682 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory, send_file
-from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, SubmitField
-from wtforms.validators import DataRequired, Email, EqualTo
-from werkzeug.security import generate_password_hash, check_password_hash
-from flask_migrate import Migrate
-from datetime import datetime, timezone
-import os
-from pdf_generator import generate_pdf_report
-import io
-
-
-app = Flask(__name__, static_folder='static')
-app.config['SECRET_KEY'] = '001'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
-
-if os.path.exists('users.db'):
-    os.remove('users.db')
-
-with app.app_context():
-    db.create_all()
-
-class User(UserMixin, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128))
-    
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
-        
-    def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-    
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
-
-class RegistrationForm(FlaskForm):
-    email = StringField('Email', validators=[DataRequired(), Email()])
-    password = PasswordField('Password', validators=[DataRequired()])
-    confirm_password = PasswordField('Confirm Password', validators=[DataRequired(), EqualTo('password')])
-    submit = SubmitField('Register')
-    
-class LoginForm(FlaskForm):
-    email = StringField('Email', validators=[DataRequired(), Email()])
-    password = PasswordField('Password', validators=[DataRequired()])
-    submit = SubmitField('Login')
-    
-class AssessmentQuestion(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    category = db.Column(db.String(50), nullable=False)
-    subcategory = db.Column(db.String(50), nullable=False)
-    text = db.Column(db.String(500), nullable=False)
-    options = db.Column(db.JSON, nullable=False)
-    scores = db.Column(db.JSON, nullable=False)
-    max_score = db.Column(db.Float, nullable=False)
-    
-class Assessment(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    start_date = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
-    completion_date = db.Column(db.DateTime)
-    current_question = db.Column(db.Integer, default=1)
-    status = db.Column(db.String(20), default='In Progress')
-    strategy_score = db.Column(db.Float, default=0)
-    governance_score = db.Column(db.Float, default=0)
-    data_infrastructure_score = db.Column(db.Float, default=0)
-    organization_score = db.Column(db.Float, default=0)
-    total_score = db.Column(db.Float, default=0)
-    readiness_level = db.Column(db.String(50))
-    
-class Response(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    assessment_id = db.Column(db.Integer, db.ForeignKey('assessment.id'), nullable=False)
-    question_id = db.Column(db.Integer, db.ForeignKey('assessment_question.id'), nullable=False)
-    answer = db.Column(db.String(500))
-    score = db.Column(db.Float)
-
-    def __init__(self, assessment_id, question_id, answer):
-        self.assessment_id = assessment_id
-        self.question_id = question_id
-        self.answer = answer
-        question = AssessmentQuestion.query.get(question_id)
-        if question and question.options:
-            option_index = question.options.index(answer)
-            self.score = question.scores[option_index]
-    
-def populate_questions():
-    questions = [
-        # Strategy (19 points max)
-        AssessmentQuestion(
-            category='Strategy',
-            subcategory='AI Strategy',
-            text='Does your organization have a well-defined AI strategy?',
-            options=["Yes, we have a detailed AI strategy.", 
-                     "No, we are currently developing an AI strategy.",
-                     "No, we have not started developing an AI strategy.",
-                     "Unsure"],
-            scores=[5, 3, 1, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Strategy',
-            subcategory='Leadership and Ownership',
-            text='Is there clear leadership or a dedicated team responsible for the AI strategy?',
-            options=["Yes, there is a dedicated AI team or leader.",
-                     "No, it is managed in an organic and decentralized manner.",
-                     "Unsure"],
-            scores=[5, 2, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Strategy',
-            subcategory='Impact Measurement',
-            text='Do you have a process to measure the impact of AI deployment?',
-            options=["Yes, we have a process and clearly defined metrics.",
-                     "Yes, we have a process but are still working on actual metrics.",
-                     "No, we don’t have a process or metrics but are likely to develop this within 12 months.",
-                     "No, we don’t have a process or metrics and are unlikely to develop this within 12 months.",
-                     "Unsure"],
-            scores=[5, 4, 2, 1, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Strategy',
-            subcategory='Financial Strategy',
-            text='Has your organization established a financial strategy for sustainable AI funding?',
-            options=["Yes, both short-term and long-term financial strategies are in place.",
-                     "Yes, only a short-term financial strategy is in place.",
-                     "No, but we are currently developing a financial strategy.",
-                     "No, we have no plans to develop a financial strategy.",
-                     "Unsure"],
-            scores=[5, 3, 2, 1, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Strategy',
-            subcategory='Budget Allocation',
-            text='How is your organization prioritizing budget allocation for AI deployment compared to other technological initiatives?',
-            options=["AI deployment is the highest priority with additional budget allocated.",
-                     "AI deployment is given equal priority with some additional funding.",
-                     "AI deployment is important but requires cutting spending in other areas.",
-                     "AI deployment depends on other technical initiatives being in place first.",
-                     "Unsure"],
-            scores=[5, 4, 3, 2, 0],
-            max_score=5
-        ),
-
-        # Governance (17 points max)
-        AssessmentQuestion(
-            category='Governance',
-            subcategory='AI Governance Framework',
-            text='Does your organization have a clearly defined AI governance framework?',
-            options=["Yes", "No", "Developing"],
-            scores=[5, 0, 3],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Governance',
-            subcategory='Ethical AI Policies',
-            text='Are there established policies and procedures for ethical AI development and use?',
-            options=["Yes", "No", "Developing"],
-            scores=[5, 0, 3],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Governance',
-            subcategory='C-suite Engagement',
-            text='How engaged is your C-suite with AI implementation issues?',
-            options=["Excellent", "Very Good", "Good", "Fair", "Poor"],
-            scores=[5, 4, 3, 2, 1],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Governance',
-            subcategory='Resource Allocation',
-            text='How would you rate the allocation of resources (financial, human, technological) to support AI projects?',
-            options=["Excellent", "Very Good", "Solid", "Fair", "Poor"],
-            scores=[5, 4, 3, 2, 1],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Governance',
-            subcategory='Performance Metrics',
-            text='Do you have established metrics and KPIs to measure AI initiatives\' performance and impact?',
-            options=["Yes", "No"],
-            scores=[5, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Governance',
-            subcategory='Change Management',
-            text='Have you developed a change management plan to address organizational impacts from AI implementations?',
-            options=["Yes", "No", "Developing"],
-            scores=[5, 0, 3],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Governance',
-            subcategory='Transparency and Accountability',
-            text='Are there mechanisms to ensure transparency and accountability in AI decision-making processes?',
-            options=["Yes", "No"],
-            scores=[5, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Governance',
-            subcategory='Risk Management',
-            text='How does your organization manage risks associated with AI implementation, such as bias, privacy concerns, and regulatory compliance?',
-            options=["Excellent", "Solid", "Good", "Fair", "Poor"],
-            scores=[5, 4, 3, 2, 1],
-            max_score=5
-        ),
-
-        # Data & Infrastructure (20 points max)
-        AssessmentQuestion(
-            category='Data & Infrastructure',
-            subcategory='Data Availability',
-            text='To what extent is your organization’s data structured and available for AI analysis?',
-            options=["Data is not available.",
-                     "Data is available but with privacy/compliance concerns.",
-                     "Data is mostly prepared with minor access limitations.",
-                     "Data is fully prepared and accessible.",
-                     "Other"],
-            scores=[0, 2, 3, 5, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Data & Infrastructure',
-            subcategory='Data Collection',
-            text='Do you collect data on your services?',
-            options=["Yes", "No"],
-            scores=[5, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Data & Infrastructure',
-            subcategory='Data Accuracy',
-            text='How would you rate the accuracy and reliability of your data?',
-            options=["Excellent", "Good", "Moderate", "Fair", "Poor"],
-            scores=[5, 4, 3, 2, 1],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Data & Infrastructure',
-            subcategory='Data Up-to-Date',
-            text='Do you have a mechanism to ensure your data is up-to-date?',
-            options=["Yes", "No"],
-            scores=[5, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Data & Infrastructure',
-            subcategory='Data Access',
-            text='How easy is it for authorized personnel to access the data needed for AI analysis?',
-            options=["Easy", "Somewhat difficult", "Difficult"],
-            scores=[5, 3, 1],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Data & Infrastructure',
-            subcategory='Data Integration',
-            text='Do you have systems to integrate data from different sources (e.g., CRM, ERP)?',
-            options=["Yes", "No"],
-            scores=[5, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Data & Infrastructure',
-            subcategory='Infrastructure Performance',
-            text='How would you rate the performance of your data storage and computing infrastructure?',
-            options=["Excellent", "Very Good", "Solid", "Fair", "Poor"],
-            scores=[5, 4, 3, 2, 1],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Data & Infrastructure',
-            subcategory='Scalability',
-            text='How would you rate your infrastructure\'s capacity to scale to accommodate changing AI demands?',
-            options=["Excellent", "Very Good", "Solid", "Fair", "Poor"],
-            scores=[5, 4, 3, 2, 1],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Data & Infrastructure',
-            subcategory='Cloud Solutions',
-            text='Have you considered cloud-based solutions for scalability and flexibility?',
-            options=["Yes", "No"],
-            scores=[5, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Data & Infrastructure',
-            subcategory='Security Policies',
-            text='Are there policies to ensure data security and privacy?',
-            options=["Yes", "No"],
-            scores=[5, 0],
-            max_score=5
-        ),
-
-        # Organization (Talent & Culture) (17 points max)
-        AssessmentQuestion(
-            category='Organization (Talent & Culture)',
-            subcategory='Talent Availability',
-            text='Does your organization have a dedicated team with expertise in AI technologies?',
-            options=["Yes", "No"],
-            scores=[5, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Organization (Talent & Culture)',
-            subcategory='Team Capacity',
-            text='How would you rate your team’s capacity to manage and analyze data effectively?',
-            options=["Excellent", "Very Good", "Solid", "Fair", "Poor"],
-            scores=[5, 4, 3, 2, 1],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Organization (Talent & Culture)',
-            subcategory='Training Programs',
-            text='Has your company invested in training programs to upskill employees in AI-related competencies?',
-            options=["Yes, through external vendors.",
-                     "Yes, with comprehensive internal programs.",
-                     "No, but plans to in the future.",
-                     "No, with no plans.",
-                     "Unsure"],
-            scores=[5, 4, 3, 1, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Organization (Talent & Culture)',
-            subcategory='Knowledge Sharing',
-            text='Does your organization have mechanisms for knowledge sharing and documentation of best practices in AI development?',
-            options=["Yes", "No"],
-            scores=[5, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Organization (Talent & Culture)',
-            subcategory='Cross-functional Collaboration',
-            text='Are there opportunities for collaboration between technical teams and domain experts in AI projects?',
-            options=["Yes", "No"],
-            scores=[5, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Organization (Talent & Culture)',
-            subcategory='Cultural Readiness',
-            text='How urgently is your organization looking to embrace AI?',
-            options=["High urgency", "Moderate urgency", "Limited urgency", "No urgency"],
-            scores=[5, 4, 3, 1],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Organization (Talent & Culture)',
-            subcategory='Board Receptiveness',
-            text='How receptive is your Board to changes brought about by AI?',
-            options=["High receptiveness", "Moderate receptiveness", "Limited receptiveness", "Not receptive", "Unsure"],
-            scores=[5, 4, 3, 1, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Organization (Talent & Culture)',
-            subcategory='Leadership Receptiveness',
-            text='How receptive is your Leadership Team to changes brought about by AI?',
-            options=["High receptiveness", "Moderate receptiveness", "Limited receptiveness", "Not receptive", "Unsure"],
-            scores=[5, 4, 3, 1, 0],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Organization (Talent & Culture)',
-            subcategory='Change Management Plan',
-            text='Do you have a change management plan in place to address changes brought about by AI?',
-            options=["Yes", "No", "Developing"],
-            scores=[5, 0, 3],
-            max_score=5
-        ),
-        AssessmentQuestion(
-            category='Organization (Talent & Culture)',
-            subcategory='Employee Receptiveness',
-            text='How receptive are your employees to changes brought about by AI?',
-            options=["High receptiveness", "Moderate receptiveness", "Limited receptiveness", "Not receptive", "Unsure"],
-            scores=[5, 4, 3, 1, 0],
-            max_score=5
-        ),
-    ]
-    db.session.bulk_save_objects(questions)
-    db.session.commit()
-
-
-def calculate_score(assessment):
-    responses = Response.query.filter_by(assessment_id=assessment.id).all()
-    category_scores = {
-        'Strategy': 0,
-        'Governance': 0,
-        'Data & Infrastructure': 0,
-        'Organization (Talent & Culture)': 0
-    }
-    category_max_scores = {
-        'Strategy': 19,
-        'Governance': 17,
-        'Data & Infrastructure': 20,
-        'Organization (Talent & Culture)': 17
-    }
-
-    for response in responses:
-        question = AssessmentQuestion.query.get(response.question_id)
-        if question and question.options:
-            option_index = question.options.index(response.answer)
-            score = question.scores[option_index]
-            category_scores[question.category] += score
-            
-    # Normalize scores to respect maximum categories scores
-    for category in category_scores:
-        category_scores[category] = min(category_scores[category],
-                                        category_max_scores[category])
-
-    assessment.strategy_score = category_scores['Strategy']
-    assessment.governance_score = category_scores['Governance']
-    assessment.data_infrastructure_score = category_scores['Data & Infrastructure']
-    assessment.organization_score = category_scores['Organization (Talent & Culture)']
-
-    total_score = sum(category_scores.values())
-    assessment.total_score = total_score
-
-    if total_score <= 21:
-        assessment.readiness_level = 'AI Novice'
-    elif total_score <= 43:
-        assessment.readiness_level = 'AI Ready'
-    elif total_score <= 65:
-        assessment.readiness_level = 'AI Proficient'
-    else:
-        assessment.readiness_level = 'AI Advanced'
-
-    db.session.commit()
-    
-@app.route('/static/<path:filename>')
-def serve_static(filename):
-    return send_from_directory(app.static_folder, filename)
-    
-@app.route('/')
-def home():
-    return render_template('home.html')
-
-@app.route('/register', methods=['GET', 'POST'])
-def register():
-    form = RegistrationForm()
-    if form.validate_on_submit():
-        user = User.query.filter_by(email=form.email.data).first()
-        if user:
-            flash('Email already registered. Please use a different email.', 'danger')
-            return redirect(url_for('register'))
-        new_user = User(email=form.email.data)
-        new_user.set_password(form.password.data)
-        db.session.add(new_user)
-        db.session.commit()
-        flash('Registration successful. Please log in.', 'success')
-        return redirect(url_for('login'))
-    return render_template('register.html', form=form)
-
-@app.route('/login', methods=['GET', 'POST'])
-def login():
-    form = LoginForm()
-    if form.validate_on_submit():
-        user = User.query.filter_by(email=form.email.data).first()
-        if user and user.check_password(form.password.data):
-            login_user(user)
-            flash('Login successful.', 'success')
-            return redirect(url_for('dashboard'))
-        else:
-            flash('Invalid email or password.', 'danger')
-    return render_template('login.html', form=form)
-
-@app.route('/logout')
-@login_required
-def logout():
-    logout_user()
-    flash('You have been logged out.', 'info')
-    return redirect(url_for('home'))
-
-@app.route('/dashboard')
-@login_required
-def dashboard():
-    return render_template('dashboard.html')
-
-@app.route('/start_assessment')
-@login_required
-def start_assessment():
-    assessment = Assessment(user_id=current_user.id)
-    db.session.add(assessment)
-    db.session.commit()
-    return redirect(url_for('assessment_question', assessment_id=assessment.id))
-
-@app.route('/assessment/<int:assessment_id>', methods=['GET', 'POST'])
-@login_required
-def assessment_question(assessment_id):
-    assessment = Assessment.query.get_or_404(assessment_id)
-    if assessment.user_id != current_user.id:
-        flash('Unauthorized access to assessment', 'danger')
-        return redirect(url_for('dashboard'))
-    
-    questions = AssessmentQuestion.query.all()
-    current_question_index = assessment.current_question - 1
-    
-    if current_question_index >= len(questions):
-        return redirect(url_for('assessment_complete', assessment_id=assessment_id))
-    
-    current_questions = questions[current_question_index:current_question_index+4]
-    
-    if request.method == 'POST':
-        for question in current_questions:
-            answer = request.form.get(f'question_{question.id}')
-            if answer:
-                response = Response(assessment_id=assessment_id, question_id=question.id, answer=answer)
-                db.session.add(response)
-        assessment.current_question += len(current_questions)
-        
-        db.session.commit()
-        return redirect(url_for('assessment_question', assessment_id=assessment_id))
-    return render_template('assessment_questions.html', questions=current_questions, assessment=assessment)
-
-@app.route('/assessment/<int:assessment_id>/complete')
-@login_required
-def assessment_complete(assessment_id):
-    assessment = Assessment.query.get_or_404(assessment_id)
-    if assessment.user_id != current_user.id:
-        flash('Unauthorized access to assessment', 'danger')
-        return redirect(url_for('dashboard'))
-    
-    calculate_score(assessment)
-    assessment.status = 'Complete'
-    assessment.completion_date = datetime.now(timezone.utc)
-    db.session.commit()
-    
-    return render_template('assessment_complete.html', assessment=assessment, strategy_score=assessment.strategy_score,
-                           governance_score=assessment.governance_score,
-                           data_infrastructure_score=assessment.data_infrastructure_score,
-                           organization_score=assessment.organization_score,
-                           total_score=assessment.total_score,
-                           readiness_level=assessment.readiness_level)
-    
-@app.route('/assessment/<int:assessment_id>/pdf')
-@login_required
-def generate_pdf(assessment_id):
-    assessment = Assessment.query.get_or_404(assessment_id)
-    if assessment.user_id != current_user.id:
-        flash('Unauthorized access to assessment', 'danger')
-        return redirect(url_for('dashboard'))
-
-    pdf_buffer = generate_pdf_report(assessment)
-    pdf_buffer.seek(0)
-    return send_file(
-        io.BytesIO(pdf_buffer.getvalue()),
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=f'AI_Readiness_Report_{assessment_id}.pdf'  # Changed from attachment_filename
-    )
-
-with app.app_context():
-    db.drop_all()
-    db.create_all()
-    populate_questions()
-
-if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
-        if not AssessmentQuestion.query.first():
-            populate_questions()
-    app.run(debug=True)
\ No newline at end of file
+from flask import Flask, Blueprint, current_app, render_template, get_template_attribute, request, redirect, url_for, flash, send_file, session, make_response, jsonify, abort, stream_with_context
+from flask_login import LoginManager, login_user, login_required, logout_user, current_user
+from flask_wtf import FlaskForm
+from wtforms import StringField, PasswordField, SubmitField
+from wtforms.validators import DataRequired, Email, EqualTo
+from werkzeug.http import is_resource_modified
+from flask_migrate import Migrate, upgrade
+from jinja2 import FileSystemBytecodeCache
+from datetime import datetime, timedelta, timezone
+import os
+import hashlib
+import base64
+import csv
+import time
+from report_cache import ReportCache
+from assessment_results import ResultsCache, ordinal
+from bulk_export import ExportJob, export_reports, reap_stale_exports, start_export
+from bulk_import import ResponseImporter, RowError, read_records
+from data_export import ExportError, FORMATS, export_filters, high_watermark, encode_watermark, stream_export
+from functools import wraps
+import shutil
+import json
+import signal
+import threading
+import click
+from assets import Assets, build_assets
+from config import Config, engine_options, sqlite_pragmas
+from accounts import HasherBusy, PasswordHasher, UserCache
+from instrumentation import init_instrumentation, record_startup
+from compression import init_compression
+from jobs import JOB_TYPES, Worker, queue_depth, requeue_failed
+from models import db, User, Assessment, Response, UserStats, IdempotencyKey, QuestionBank, question_catalog, \
+    upsert_responses
+from catalog import DEFAULT_TENANT, QUESTIONS_PER_PAGE
+from scoring import CATEGORY_MAX_SCORES, READINESS_THRESHOLDS
+from assessments import rescore_assessments, complete_assessment, report_cache, results_cache, cohort_benchmarks, \
+    assessment_report_data, rebuild_benchmarks
+from api import api
+
+
+migrate = Migrate(render_as_batch=True)
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
+# API clients get a 401 instead of a redirect to the login page.
+login_manager.blueprint_login_views['api'] = None
+bp = Blueprint('main', __name__, cli_group=None)
+
+@login_manager.user_loader
+def load_user(user_id):
+    users = user_cache()
+    user = users.get(int(user_id))
+    if user is not None:
+        return db.session.merge(user, load=False)
+    user = db.session.get(User, int(user_id))
+    if user is not None:
+        users.put(user)
+    return user
+
+@bp.before_app_request
+def buffer_request_body():
+    # Read small bodies before the view opens a database session, so a
+    # client uploading slowly never keeps a pooled connection waiting.
+    length = request.content_length
+    if length and length <= current_app.config['REQUEST_BUFFER_BYTES']:
+        request.get_data(cache=True)
+
+def user_cache():
+    return current_app.extensions['user_cache']
+
+def password_hasher():
+    return current_app.extensions['password_hasher']
+
+def hasher_busy(template, form):
+    flash('We are handling a lot of sign-ins right now. Please try again in a moment.', 'warning')
+    response = make_response(render_template(template, form=form), 503)
+    response.headers['Retry-After'] = '5'
+    return response
+
+def admin_required(view):
+    @wraps(view)
+    @login_required
+    def wrapped(*args, **kwargs):
+        if current_user.email.lower() not in current_app.config['ADMIN_EMAILS']:
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapped
+
+class RegistrationForm(FlaskForm):
+    email = StringField('Email', validators=[DataRequired(), Email()])
+    password = PasswordField('Password', validators=[DataRequired()])
+    confirm_password = PasswordField('Confirm Password', validators=[DataRequired(), EqualTo('password')])
+    submit = SubmitField('Register')
+    
+class LoginForm(FlaskForm):
+    email = StringField('Email', validators=[DataRequired(), Email()])
+    password = PasswordField('Password', validators=[DataRequired()])
+    submit = SubmitField('Login')
+    
+def templates_version():
+    global _templates_version
+    if _templates_version is None:
+        digest = hashlib.sha1()
+        for name in sorted(current_app.jinja_env.list_templates()):
+            source, _, _ = current_app.jinja_loader.get_source(current_app.jinja_env, name)
+            digest.update(name.encode('utf-8'))
+            digest.update(source.encode('utf-8'))
+        # Rendered pages embed fingerprinted asset URLs.
+        digest.update(json.dumps(current_app.extensions['assets'].manifest, sort_keys=True).encode('utf-8'))
+        _templates_version = digest.hexdigest()[:8]
+    return _templates_version
+
+_templates_version = None
+
+
+def conditional_view(etag_parts, render):
+    # The ETag hashes the templates' version and `etag_parts`, which must
+    # cover everything the page shows. A page showing pending flash messages
+    # gets no ETag, so that copy is never revalidated and shown again. No
+    # Last-Modified is sent: a page also changes with the templates and the
+    # cohort snapshot, which no single date tracks.
+    if '_flashes' in session:
+        response = make_response(render())
+    else:
+        digest = hashlib.sha1('|'.join(str(part) for part in etag_parts).encode('utf-8')).hexdigest()[:16]
+        etag = f'{templates_version()}-{digest}'
+        if is_resource_modified(request.environ, etag=etag):
+            response = make_response(render())
+        else:
+            response = current_app.response_class(status=304)
+        response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+@bp.cli.command('rescore-assessments')
+def rescore_assessments_command():
+    """Recompute the stored scores of every completed assessment."""
+    assessments = Assessment.query.filter_by(status='Complete').all()
+    rescore_assessments(assessments)
+    rebuild_benchmarks()
+    print(f'Rescored {len(assessments)} assessments.')
+
+@bp.cli.command('build-assets')
+def build_assets_command():
+    """Write fingerprinted, precompressed copies of static/ into static/dist/."""
+    manifest = build_assets(current_app.extensions['assets'].static_folder)
+    click.echo(f'Built {len(manifest)} assets.')
+
+@bp.cli.command('compile-templates')
+def compile_templates_command():
+    """Compile every template into the Jinja bytecode cache shared by the workers."""
+    click.echo(f"Compiled {compile_templates(current_app)} templates into {current_app.config['JINJA_CACHE_DIR']}.")
+
+@bp.cli.command('rebuild-benchmarks')
+def rebuild_benchmarks_command():
+    """Recount each question bank's score histograms from its completed assessments."""
+    started = time.perf_counter()
+    cohort_size = rebuild_benchmarks()
+    click.echo(f'Rebuilt benchmarks from {cohort_size} assessments in {time.perf_counter() - started:.2f}s.')
+
+@bp.cli.command('purge-idempotency-keys')
+@click.option('--hours', type=int, default=None, help='Keep keys younger than this (defaults to IDEMPOTENCY_KEY_TTL_HOURS).')
+def purge_idempotency_keys_command(hours):
+    """Delete stored API idempotency keys past their retention window."""
+    hours = current_app.config['IDEMPOTENCY_KEY_TTL_HOURS'] if hours is None else hours
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+    deleted = IdempotencyKey.query.filter(IdempotencyKey.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    click.echo(f'Deleted {deleted} idempotency keys older than {hours}h.')
+
+@bp.cli.command('run-jobs')
+@click.option('--threads', type=int, default=None, help='Jobs run at once (defaults to JOB_WORKER_THREADS).')
+@click.option('--until-empty', is_flag=True, help='Run the ready jobs, then exit.')
+def run_jobs_command(threads, until_empty):
+    """Run background jobs from the queue until stopped with SIGTERM or Ctrl-C."""
+    config = current_app.config
+    worker = Worker(current_app._get_current_object(), threads=threads or config['JOB_WORKER_THREADS'],
+                    poll_interval=config['JOB_POLL_SECONDS'], retry_seconds=config['JOB_RETRY_SECONDS'],
+                    lock_timeout=config['JOB_LOCK_TIMEOUT_SECONDS'])
+    if until_empty:
+        click.echo(f'Ran {worker.run_until_empty()} jobs.')
+        return
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *args: stop.set())
+    click.echo(f'Job worker {worker.name} running {", ".join(sorted(JOB_TYPES))} on {worker.threads} threads.')
+    # Running jobs are finished before exiting.
+    worker.run(stop)
+
+@bp.cli.command('requeue-failed-jobs')
+@click.option('--kind', default=None, help='Only jobs of this kind.')
+def requeue_failed_jobs_command(kind):
+    """Queue failed background jobs again, with a fresh set of attempts."""
+    click.echo(f'Requeued {requeue_failed(kind)} failed jobs.')
+    
+def email_at_domain(domain):
+    """Filter for users with an email address at `domain`, ignoring case.
+
+    `%` and `_` in the domain are matched literally, not as wildcards.
+    """
+    escaped = domain.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return User.email.ilike(f'%@{escaped}', escape='\\')
+
+
+def organization_reports_query(domain):
+    return db.session.query(Assessment, User.email) \
+        .join(User, User.id == Assessment.user_id) \
+        .filter(Assessment.status == 'Complete', email_at_domain(domain)) \
+        .order_by(Assessment.id)
+
+
+def organization_reports(domain):
+    for assessment, email in organization_reports_query(domain).yield_per(500):
+        yield f'{email}/AI_Readiness_Report_{assessment.id}.pdf', assessment_report_data(assessment)
+
+
+@bp.cli.command('export-reports')
+@click.argument('domain')
+@click.option('--output', '-o', default=None, help='Where to write the ZIP archive.')
+@click.option('--processes', '-p', type=int, default=None, help='Render processes (defaults to CPU count).')
+def export_reports_command(domain, output, processes):
+    """Render the PDF reports of every completed assessment for an email domain into a ZIP."""
+    os.makedirs(current_app.config['EXPORT_DIR'], exist_ok=True)
+    job = ExportJob(current_app.config['EXPORT_DIR'], total=organization_reports_query(domain).count())
+
+    def report_progress(job):
+        state = job.to_dict()
+        click.echo(f"{state['done']}/{state['total']} reports, "
+                   f"{state['reports_per_second']} reports/s, {state['elapsed_seconds']}s elapsed")
+
+    export_reports(job, organization_reports(domain), processes, on_progress=report_progress)
+    if output:
+        shutil.move(job.archive_path, output)
+    click.echo(f'Archive written to {output or job.archive_path}')
+
+@bp.cli.command('export-data')
+@click.argument('dataset', type=click.Choice(['assessments', 'responses']))
+@click.option('--format', 'fmt', type=click.Choice(list(FORMATS)), default='csv')
+@click.option('--output', '-o', type=click.File('wb'), default='-', help='Defaults to standard output.')
+@click.option('--status', default=None, help='Only assessments with this status.')
+@click.option('--since', default=None, help='Completed on or after this ISO date.')
+@click.option('--until', default=None, help='Completed before this ISO date.')
+@click.option('--after', default=None, help='Watermark printed by a previous export.')
+@click.option('--watermark-file', type=click.Path(dir_okay=False), default=None,
+              help='Read --after from this file and store the new watermark in it; implies --status Complete.')
+def export_data_command(dataset, fmt, output, status, since, until, after, watermark_file):
+    """Stream raw assessment or response rows for analysis."""
+    if watermark_file:
+        status = status or 'Complete'
+        if not after and os.path.exists(watermark_file):
+            with open(watermark_file) as f:
+                after = f.read().strip() or None
+    try:
+        filters = export_filters(status, since, until, after)
+        watermark = high_watermark(filters)
+        for chunk in stream_export(dataset, fmt, filters, watermark):
+            output.write(chunk)
+    except ExportError as e:
+        raise click.UsageError(str(e))
+    output.flush()
+    watermark = encode_watermark(watermark) if watermark else after
+    if watermark:
+        click.echo(f'Watermark: {watermark}', err=True)
+        if watermark_file:
+            with open(watermark_file, 'w') as f:
+                f.write(watermark)
+
+@bp.cli.command('publish-question-bank')
+@click.argument('tenant')
+@click.argument('path', type=click.File(encoding='utf-8'))
+def publish_question_bank_command(tenant, path):
+    """Publish a tenant's next question bank version from a JSON file.
+
+    The file holds "questions" (objects with category, subcategory, text,
+    options and scores) and optionally "category_caps",
+    "readiness_thresholds" and "questions_per_page"; omitted settings are
+    those of the default bank.
+    """
+    spec = json.load(path)
+    try:
+        bank = QuestionBank.publish(
+            tenant, spec.get('questions'), spec.get('category_caps', CATEGORY_MAX_SCORES),
+            spec.get('readiness_thresholds', READINESS_THRESHOLDS), spec.get('questions_per_page', QUESTIONS_PER_PAGE))
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        db.session.rollback()
+        raise click.ClickException(f'Invalid question bank: {e}')
+    db.session.commit()
+    click.echo(f'Published {tenant} question bank version {bank.version} (id {bank.id}).')
+
+@bp.cli.command('set-tenant')
+@click.argument('tenant')
+@click.argument('domain')
+def set_tenant_command(tenant, domain):
+    """Move every user with an email at DOMAIN to TENANT."""
+    moved = User.query.filter(email_at_domain(domain)) \
+        .update({'tenant': tenant}, synchronize_session=False)
+    db.session.commit()
+    click.echo(f'Moved {moved} users to {tenant}.')
+
+@bp.cli.command('import-responses')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default=None,
+              help='Defaults to the file extension.')
+@click.option('--owner', default=None, help='Email of the user who owns rows without an email.')
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False), default=None,
+              help='Where to write rejected rows (defaults to PATH.errors.csv).')
+@click.option('--batch-size', type=int, default=1000, help='Assessments written per transaction.')
+@click.option('--dry-run', is_flag=True, help='Validate only; write nothing.')
+@click.option('--tenant', default=DEFAULT_TENANT, help='Whose latest question bank the answers belong to.')
+def import_responses_command(path, fmt, owner, errors_path, batch_size, dry_run, tenant):
+    """Import completed assessments from a CSV or JSONL file of answers keyed by subcategory."""
+    try:
+        importer = ResponseImporter(question_catalog(tenant=tenant), owner_email=owner, batch_size=batch_size,
+                                    dry_run=dry_run)
+    except RowError as e:
+        raise click.UsageError(str(e))
+    errors_path = errors_path or f'{path}.errors.csv'
+
+    def report_progress(importer):
+        click.echo(f'{importer.rows} rows, {importer.imported} imported, {importer.failed} rejected, '
+                   f'{importer.rows_per_second():.0f} rows/s')
+
+    with open(errors_path, 'w', newline='', encoding='utf-8') as errors_file:
+        error_writer = csv.writer(errors_file)
+        error_writer.writerow(['line', 'error', 'record'])
+        importer.run(read_records(path, fmt), error_writer, on_progress=report_progress)
+    if importer.imported and not dry_run:
+        rebuild_benchmarks()
+    click.echo(f"{'Validated' if dry_run else 'Imported'} {importer.imported} of {importer.rows} rows in "
+               f'{importer.elapsed:.2f}s ({importer.rows_per_second():.0f} rows/s).')
+    if importer.failed:
+        click.echo(f'{importer.failed} rows were rejected; see {errors_path}.')
+    else:
+        os.remove(errors_path)
+
+@bp.route('/metrics')
+def metrics():
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        abort(401)
+    return current_app.response_class(current_app.extensions['metrics'].render(job_queue_gauges()),
+                                      mimetype='text/plain; version=0.0.4')
+
+def job_queue_gauges():
+    depth = {(kind, status): (count, age) for kind, status, count, age in queue_depth()}
+    for kind in JOB_TYPES:
+        depth.setdefault((kind, 'queued'), (0, 0.0))
+    return [gauge for (kind, status), (count, age) in depth.items()
+            for gauge in (('job_queue_depth', (kind, status), count),
+                          ('job_queue_oldest_seconds', (kind, status), round(age, 3)))]
+
+@bp.route('/static/<path:filename>')
+def serve_static(filename):
+    return current_app.extensions['assets'].send(filename)
+    
+@bp.route('/')
+def home():
+    return conditional_view(('home', current_user.get_id()), lambda: render_template('home.html'))
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    form = RegistrationForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(email=form.email.data).first()
+        if user:
+            flash('Email already registered. Please use a different email.', 'danger')
+            return redirect(url_for('main.register'))
+        domain = form.email.data.rsplit('@', 1)[-1].lower()
+        new_user = User(email=form.email.data,
+                        tenant=current_app.config['TENANT_DOMAINS'].get(domain, DEFAULT_TENANT))
+        try:
+            new_user.set_password(form.password.data, password_hasher())
+        except HasherBusy:
+            return hasher_busy('register.html', form)
+        db.session.add(new_user)
+        db.session.commit()
+        flash('Registration successful. Please log in.', 'success')
+        return redirect(url_for('main.login'))
+    return render_template('register.html', form=form)
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    form = LoginForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(email=form.email.data).first()
+        try:
+            matches = user is not None and user.check_password(form.password.data, password_hasher())
+        except HasherBusy:
+            return hasher_busy('login.html', form)
+        if matches:
+            if db.session.is_modified(user):
+                db.session.commit()
+                user_cache().invalidate(user.id)
+            login_user(user)
+            flash('Login successful.', 'success')
+            return redirect(url_for('main.dashboard'))
+        else:
+            flash('Invalid email or password.', 'danger')
+    return render_template('login.html', form=form)
+
+@bp.route('/logout')
+@login_required
+def logout():
+    user_cache().invalidate(current_user.id)
+    logout_user()
+    flash('You have been logged out.', 'info')
+    return redirect(url_for('main.home'))
+
+@bp.route('/dashboard')
+@login_required
+def dashboard():
+    return conditional_view(('dashboard', current_user.id, current_user.email),
+                            lambda: render_template('dashboard.html'))
+
+HISTORY_PAGE_SIZE = 20
+
+def encode_cursor(assessment):
+    value = f'{assessment.completion_date.isoformat()}|{assessment.id}'
+    return base64.urlsafe_b64encode(value.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    try:
+        completion_date, assessment_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(completion_date), int(assessment_id)
+    except ValueError:
+        return None
+
+@bp.route('/history')
+@login_required
+def history():
+    # Keyset pagination on (completion_date, id), served by the
+    # (user_id, completion_date) index, so deep pages cost no OFFSET scan.
+    query = Assessment.query.filter(Assessment.user_id == current_user.id, Assessment.status == 'Complete')
+    cursor = decode_cursor(request.args.get('before', ''))
+    if cursor:
+        query = query.filter(db.tuple_(Assessment.completion_date, Assessment.id) < cursor)
+    assessments = query.order_by(Assessment.completion_date.desc(), Assessment.id.desc()) \
+        .limit(HISTORY_PAGE_SIZE + 1).all()
+    next_cursor = encode_cursor(assessments[HISTORY_PAGE_SIZE - 1]) if len(assessments) > HISTORY_PAGE_SIZE else None
+    return render_template('history.html', assessments=assessments[:HISTORY_PAGE_SIZE],
+                           stats=db.session.get(UserStats, current_user.id),
+                           next_cursor=next_cursor, first_page=cursor is None)
+
+@bp.route('/start_assessment')
+@login_required
+def start_assessment():
+    assessment = Assessment(user_id=current_user.id, bank_id=QuestionBank.latest_id(current_user.tenant))
+    db.session.add(assessment)
+    db.session.commit()
+    return redirect(url_for('main.assessment_question', assessment_id=assessment.id))
+
+@bp.route('/assessment/<int:assessment_id>', methods=['GET', 'POST'])
+@login_required
+def assessment_question(assessment_id):
+    assessment = Assessment.query.get_or_404(assessment_id)
+    if assessment.user_id != current_user.id:
+        flash('Unauthorized access to assessment', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    catalog = question_catalog(assessment.bank_id)
+    current_question_index = assessment.current_question - 1
+    
+    if current_question_index >= len(catalog) or assessment.status == 'Complete':
+        return redirect(url_for('main.assessment_complete', assessment_id=assessment_id))
+    
+    current_questions = catalog.questions_from(current_question_index)
+    
+    if request.method == 'POST':
+        # The form echoes the position it was rendered at, so a resubmitted
+        # page overwrites its answers without advancing past the next page.
+        position = request.form.get('position', assessment.current_question, type=int)
+        submitted_questions = catalog.questions_from(position - 1)
+        answers = []
+        for question in submitted_questions:
+            option_index = request.form.get(f'question_{question.id}', type=int)
+            if option_index is not None and 0 <= option_index < len(question.options):
+                answers.append({'assessment_id': assessment_id, 'question_id': question.id,
+                                'option_index': option_index})
+        upsert_responses(answers, catalog)
+        # A stale tab may post after the assessment was completed elsewhere;
+        # its answers are rolled back rather than changing the results.
+        in_progress = Assessment.query.filter_by(id=assessment_id, status='In Progress')
+        if not in_progress.filter_by(current_question=position) \
+                .update({'current_question': position + len(submitted_questions)}) and not in_progress.count():
+            db.session.rollback()
+            return redirect(url_for('main.assessment_complete', assessment_id=assessment_id))
+        db.session.commit()
+        return redirect(url_for('main.assessment_question', assessment_id=assessment_id))
+    saved_answers = dict(db.session.query(Response.question_id, Response.option_index).filter(
+        Response.assessment_id == assessment_id,
+        Response.question_id.in_([question.id for question in current_questions])))
+    # Autosaves change the answers without moving the page, so they are part of its ETag.
+    return conditional_view(
+        ('question', assessment.id, catalog.version, assessment.current_question, sorted(saved_answers.items())),
+        lambda: render_template('assessment_questions.html', questions=current_questions, assessment=assessment,
+                                saved_answers=saved_answers))
+
+@bp.route('/assessment/<int:assessment_id>/complete')
+@login_required
+def assessment_complete(assessment_id):
+    assessment = Assessment.query.get_or_404(assessment_id)
+    if assessment.user_id != current_user.id:
+        flash('Unauthorized access to assessment', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    complete_assessment(assessment)
+    
+    return conditional_view(
+        ('complete', assessment.id, assessment.total_score, assessment.completion_date.timestamp(),
+         cohort_benchmarks().version),
+        lambda: render_template('assessment_complete.html', assessment=assessment,
+                                fragments=results_cache().fragments(
+                                    assessment_report_data(assessment), render_result_fragments)))
+
+def render_result_fragments(results):
+    return {name: get_template_attribute('_results.html', name)(results)
+            for name in ('scores', 'gaps', 'recommendations')}
+    
+@bp.route('/assessment/<int:assessment_id>/pdf')
+@login_required
+def generate_pdf(assessment_id):
+    assessment = Assessment.query.get_or_404(assessment_id)
+    if assessment.user_id != current_user.id:
+        flash('Unauthorized access to assessment', 'danger')
+        return redirect(url_for('main.dashboard'))
+
+    return send_file(
+        report_cache().open(assessment_report_data(assessment)),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f'AI_Readiness_Report_{assessment_id}.pdf'  # Changed from attachment_filename
+    )
+
+@bp.route('/admin/exports', methods=['POST'])
+@admin_required
+def start_report_export():
+    domain = (request.get_json(silent=True) or request.form).get('domain', '').strip().lstrip('@')
+    if not domain:
+        return jsonify(error='domain is required'), 400
+    os.makedirs(current_app.config['EXPORT_DIR'], exist_ok=True)
+    reap_stale_exports(current_app.config['EXPORT_DIR'], current_app.config['EXPORT_STALE_SECONDS'])
+    items = list(organization_reports(domain))
+    job = ExportJob(current_app.config['EXPORT_DIR'], total=len(items), owner_id=current_user.id)
+    start_export(job, items, current_app.config['EXPORT_PROCESSES'])
+    return jsonify(dict(job.to_dict(), status_url=url_for('main.report_export_status', job_id=job.id))), 202
+
+def owned_export_job(job_id):
+    job = ExportJob.load(current_app.config['EXPORT_DIR'], job_id)
+    if job is None or job.owner_id != current_user.id:
+        abort(404)
+    if job.is_stale(current_app.config['EXPORT_STALE_SECONDS']):
+        job.abandon()
+    return job
+
+@bp.route('/admin/exports/<job_id>')
+@admin_required
+def report_export_status(job_id):
+    job = owned_export_job(job_id)
+    state = job.to_dict()
+    if job.status == 'complete':
+        state['download_url'] = url_for('main.download_report_export', job_id=job.id)
+    return jsonify(state)
+
+@bp.route('/admin/exports/<job_id>/download')
+@admin_required
+def download_report_export(job_id):
+    job = owned_export_job(job_id)
+    if job.status != 'complete':
+        return jsonify(job.to_dict()), 409
+    return send_file(job.archive_path, mimetype='application/zip', as_attachment=True,
+                     download_name=f'AI_Readiness_Reports_{job.id}.zip')
+
+@bp.route('/admin/data/<dataset>.<fmt>')
+@admin_required
+def export_data(dataset, fmt):
+    # Streams straight from a server-side cursor; pass the X-Export-Watermark
+    # of this response as ?after= to fetch only what completed since.
+    try:
+        filters = export_filters(request.args.get('status'), request.args.get('since'),
+                                 request.args.get('until'), request.args.get('after'))
+        watermark = high_watermark(filters)
+        chunks = stream_export(dataset, fmt, filters, watermark)
+    except ExportError as e:
+        return jsonify(error=str(e)), 400
+    response = current_app.response_class(stream_with_context(chunks), mimetype=FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={dataset}.{fmt}'
+    watermark = encode_watermark(watermark) if watermark else request.args.get('after')
+    if watermark:
+        response.headers['X-Export-Watermark'] = watermark
+    return response
+
+def create_app(config=None):
+    # Static files are served by main.serve_static, with caching headers.
+    app = Flask(__name__, static_folder=None, instance_relative_config=True)
+    app.config.from_object(Config)
+    app.config.from_pyfile('config.py', silent=True)
+    if config:
+        app.config.update(config)
+    app.config['REPORT_CACHE_DIR'] = app.config['REPORT_CACHE_DIR'] or os.path.join(app.instance_path, 'report_cache')
+    app.config['EXPORT_DIR'] = app.config['EXPORT_DIR'] or os.path.join(app.instance_path, 'exports')
+    app.config['METRICS_DIR'] = app.config['METRICS_DIR'] or os.path.join(app.instance_path, 'metrics')
+    app.config['JINJA_CACHE_DIR'] = app.config['JINJA_CACHE_DIR'] or os.path.join(app.instance_path, 'jinja_cache')
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+
+    db.init_app(app)
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        with app.app_context():
+            db.event.listen(db.engine, 'connect', sqlite_pragmas(app.config['SQLITE_BUSY_TIMEOUT_MS']))
+    migrate.init_app(app, db)
+    login_manager.init_app(app)
+    metrics = init_instrumentation(app)
+    # Registered after instrumentation, so it runs first and request timings include it.
+    init_compression(app, metrics)
+    app.extensions['report_cache'] = ReportCache(
+        app.config['REPORT_CACHE_DIR'],
+        max_bytes=app.config['REPORT_CACHE_MAX_BYTES'],
+        workers=app.config['REPORT_RENDER_WORKERS'],
+        metrics=metrics
+    )
+    app.extensions['password_hasher'] = PasswordHasher(
+        app.config['PASSWORD_HASH_METHOD'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=app.config['PASSWORD_HASH_MAX_PENDING']
+    )
+    app.extensions['user_cache'] = UserCache(app.config['USER_CACHE_SECONDS'])
+    app.extensions['assets'] = Assets()
+    app.add_template_global(app.extensions['assets'].url, 'asset_url')
+    app.add_template_filter(ordinal)
+    app.extensions['results_cache'] = ResultsCache(app.config['RESULTS_CACHE_SIZE'], metrics=metrics)
+    # Workers load compiled templates from here instead of each compiling them on first use.
+    os.makedirs(app.config['JINJA_CACHE_DIR'], exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['JINJA_CACHE_DIR'])
+    app.register_blueprint(bp)
+    app.register_blueprint(api)
+    record_startup(metrics, 'app_created')
+    return app
+
+
+def compile_templates(app):
+    """Load every template, filling the bytecode cache and this process's template cache."""
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def warm_up(app):
+    """Load, in gunicorn's master, what each --preload worker would otherwise load for itself.
+
+    Forked workers then share the compiled templates and ReportLab
+    copy-on-write instead of paying for them on their first requests.
+    """
+    compile_templates(app)
+    import pdf_generator  # noqa: F401
+
+
+def after_fork(app):
+    """Give a worker forked from a --preload master its own connections and metrics."""
+    with app.app_context():
+        # Leave connections the master opened to the master.
+        db.engine.dispose(close=False)
+    app.extensions['metrics'].reset()
+
+
+def upgrade_database(app):
+    """Bring the schema and seeded question bank up to date.
+
+    Runs Alembic migrations, which are recorded in the database and so only
+    ever apply once. Call it once per deployment (gunicorn's master process
+    or a release step), never from the workers.
+    """
+    with app.app_context():
+        upgrade(directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations'))
+        db.engine.dispose()
+
+
+if __name__ == '__main__':
+    # The debug server runs without a job worker.
+    app = create_app({'JOBS_INLINE': True})
+    upgrade_database(app)
+    app.run(debug=True)
@@ -0,0 +1,97 @@
+"""score buckets per bank
+
+Revision ID: a68ef3cf0cee
+Revises: bb38f6dc8d8c
+Create Date: 2026-10-17 14:06:21.402118
+
+"""
+import math
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a68ef3cf0cee'
+down_revision = 'bb38f6dc8d8c'
+branch_labels = None
+depends_on = None
+
+# Frozen copies of benchmarking's metrics and default caps at this
+# revision; migrations don't import application code.
+METRIC_FIELDS = {
+    'Total': 'total_score',
+    'Strategy': 'strategy_score',
+    'Governance': 'governance_score',
+    'Data & Infrastructure': 'data_infrastructure_score',
+    'Organization (Talent & Culture)': 'organization_score',
+}
+DEFAULT_CAPS = {'Strategy': 19, 'Governance': 17, 'Data & Infrastructure': 20, 'Organization (Talent & Culture)': 17}
+
+
+def metric_caps(category_caps):
+    caps = {category: int(cap) for category, cap in category_caps.items()}
+    caps['Total'] = sum(caps.values())
+    return caps
+
+
+def upgrade():
+    # The primary key gains bank_id, so the table is recreated rather than altered.
+    op.drop_table('score_bucket')
+    op.create_table('score_bucket',
+    sa.Column('bank_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('metric', sa.String(length=50), nullable=False),
+    sa.Column('bucket', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('assessments', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['bank_id'], ['question_bank.id'], name='fk_score_bucket_bank_id'),
+    sa.PrimaryKeyConstraint('bank_id', 'metric', 'bucket')
+    )
+
+    # Recount the histograms per bank, clamped to each bank's own caps.
+    bind = op.get_bind()
+    question_bank = sa.table('question_bank', sa.column('id', sa.Integer), sa.column('category_caps', sa.JSON))
+    caps = {bank_id: metric_caps(category_caps) for bank_id, category_caps in bind.execute(sa.select(question_bank))}
+    assessment = sa.table(
+        'assessment',
+        sa.column('status', sa.String),
+        sa.column('bank_id', sa.Integer),
+        *(sa.column(field, sa.Float) for field in METRIC_FIELDS.values()),
+    )
+    counts = {}
+    for row in bind.execute(sa.select(assessment).where(assessment.c.status == 'Complete')):
+        for metric, field in METRIC_FIELDS.items():
+            bucket = min(max(int(math.floor(getattr(row, field) or 0)), 0), caps[row.bank_id][metric])
+            key = (row.bank_id, metric, bucket)
+            counts[key] = counts.get(key, 0) + 1
+    insert_score_buckets(counts, ('bank_id', 'metric', 'bucket'))
+
+
+def downgrade():
+    # Back to one histogram for every bank, clamped to the default caps.
+    caps = metric_caps(DEFAULT_CAPS)
+    score_bucket = sa.table(
+        'score_bucket',
+        sa.column('bank_id', sa.Integer),
+        sa.column('metric', sa.String),
+        sa.column('bucket', sa.Integer),
+        sa.column('assessments', sa.Integer),
+    )
+    counts = {}
+    for row in op.get_bind().execute(sa.select(score_bucket)):
+        key = (row.metric, min(row.bucket, caps.get(row.metric, row.bucket)))
+        counts[key] = counts.get(key, 0) + row.assessments
+
+    op.drop_table('score_bucket')
+    op.create_table('score_bucket',
+    sa.Column('metric', sa.String(length=50), nullable=False),
+    sa.Column('bucket', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('assessments', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('metric', 'bucket')
+    )
+    insert_score_buckets(counts, ('metric', 'bucket'))
+
+
+def insert_score_buckets(counts, keys):
+    table = sa.table('score_bucket', *(sa.column(key) for key in keys), sa.column('assessments', sa.Integer))
+    if counts:
+        op.bulk_insert(table, [dict(zip(keys, key), assessments=count) for key, count in sorted(counts.items())])
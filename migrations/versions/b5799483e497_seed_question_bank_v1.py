@@ -0,0 +1,346 @@
+"""seed question bank v1
+
+Revision ID: b5799483e497
+Revises: 2773463cbfbc
+Create Date: 2026-10-17 11:15:21.946721
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5799483e497'
+down_revision = '2773463cbfbc'
+branch_labels = None
+depends_on = None
+
+assessment_question = sa.table(
+    'assessment_question',
+    sa.column('id', sa.Integer),
+    sa.column('category', sa.String),
+    sa.column('subcategory', sa.String),
+    sa.column('text', sa.String),
+    sa.column('options', sa.JSON),
+    sa.column('scores', sa.JSON),
+    sa.column('max_score', sa.Float),
+)
+
+# Frozen copy of question_bank.QUESTIONS_V1 as this revision seeded it;
+# migrations don't import application code, which keeps changing.
+QUESTIONS_V1 = [
+    # Strategy (19 points max)
+    dict(
+        category='Strategy',
+        subcategory='AI Strategy',
+        text='Does your organization have a well-defined AI strategy?',
+        options=["Yes, we have a detailed AI strategy.", 
+                 "No, we are currently developing an AI strategy.",
+                 "No, we have not started developing an AI strategy.",
+                 "Unsure"],
+        scores=[5, 3, 1, 0],
+        max_score=5
+    ),
+    dict(
+        category='Strategy',
+        subcategory='Leadership and Ownership',
+        text='Is there clear leadership or a dedicated team responsible for the AI strategy?',
+        options=["Yes, there is a dedicated AI team or leader.",
+                 "No, it is managed in an organic and decentralized manner.",
+                 "Unsure"],
+        scores=[5, 2, 0],
+        max_score=5
+    ),
+    dict(
+        category='Strategy',
+        subcategory='Impact Measurement',
+        text='Do you have a process to measure the impact of AI deployment?',
+        options=["Yes, we have a process and clearly defined metrics.",
+                 "Yes, we have a process but are still working on actual metrics.",
+                 "No, we don’t have a process or metrics but are likely to develop this within 12 months.",
+                 "No, we don’t have a process or metrics and are unlikely to develop this within 12 months.",
+                 "Unsure"],
+        scores=[5, 4, 2, 1, 0],
+        max_score=5
+    ),
+    dict(
+        category='Strategy',
+        subcategory='Financial Strategy',
+        text='Has your organization established a financial strategy for sustainable AI funding?',
+        options=["Yes, both short-term and long-term financial strategies are in place.",
+                 "Yes, only a short-term financial strategy is in place.",
+                 "No, but we are currently developing a financial strategy.",
+                 "No, we have no plans to develop a financial strategy.",
+                 "Unsure"],
+        scores=[5, 3, 2, 1, 0],
+        max_score=5
+    ),
+    dict(
+        category='Strategy',
+        subcategory='Budget Allocation',
+        text='How is your organization prioritizing budget allocation for AI deployment compared to other technological initiatives?',
+        options=["AI deployment is the highest priority with additional budget allocated.",
+                 "AI deployment is given equal priority with some additional funding.",
+                 "AI deployment is important but requires cutting spending in other areas.",
+                 "AI deployment depends on other technical initiatives being in place first.",
+                 "Unsure"],
+        scores=[5, 4, 3, 2, 0],
+        max_score=5
+    ),
+
+    # Governance (17 points max)
+    dict(
+        category='Governance',
+        subcategory='AI Governance Framework',
+        text='Does your organization have a clearly defined AI governance framework?',
+        options=["Yes", "No", "Developing"],
+        scores=[5, 0, 3],
+        max_score=5
+    ),
+    dict(
+        category='Governance',
+        subcategory='Ethical AI Policies',
+        text='Are there established policies and procedures for ethical AI development and use?',
+        options=["Yes", "No", "Developing"],
+        scores=[5, 0, 3],
+        max_score=5
+    ),
+    dict(
+        category='Governance',
+        subcategory='C-suite Engagement',
+        text='How engaged is your C-suite with AI implementation issues?',
+        options=["Excellent", "Very Good", "Good", "Fair", "Poor"],
+        scores=[5, 4, 3, 2, 1],
+        max_score=5
+    ),
+    dict(
+        category='Governance',
+        subcategory='Resource Allocation',
+        text='How would you rate the allocation of resources (financial, human, technological) to support AI projects?',
+        options=["Excellent", "Very Good", "Solid", "Fair", "Poor"],
+        scores=[5, 4, 3, 2, 1],
+        max_score=5
+    ),
+    dict(
+        category='Governance',
+        subcategory='Performance Metrics',
+        text='Do you have established metrics and KPIs to measure AI initiatives\' performance and impact?',
+        options=["Yes", "No"],
+        scores=[5, 0],
+        max_score=5
+    ),
+    dict(
+        category='Governance',
+        subcategory='Change Management',
+        text='Have you developed a change management plan to address organizational impacts from AI implementations?',
+        options=["Yes", "No", "Developing"],
+        scores=[5, 0, 3],
+        max_score=5
+    ),
+    dict(
+        category='Governance',
+        subcategory='Transparency and Accountability',
+        text='Are there mechanisms to ensure transparency and accountability in AI decision-making processes?',
+        options=["Yes", "No"],
+        scores=[5, 0],
+        max_score=5
+    ),
+    dict(
+        category='Governance',
+        subcategory='Risk Management',
+        text='How does your organization manage risks associated with AI implementation, such as bias, privacy concerns, and regulatory compliance?',
+        options=["Excellent", "Solid", "Good", "Fair", "Poor"],
+        scores=[5, 4, 3, 2, 1],
+        max_score=5
+    ),
+
+    # Data & Infrastructure (20 points max)
+    dict(
+        category='Data & Infrastructure',
+        subcategory='Data Availability',
+        text='To what extent is your organization’s data structured and available for AI analysis?',
+        options=["Data is not available.",
+                 "Data is available but with privacy/compliance concerns.",
+                 "Data is mostly prepared with minor access limitations.",
+                 "Data is fully prepared and accessible.",
+                 "Other"],
+        scores=[0, 2, 3, 5, 0],
+        max_score=5
+    ),
+    dict(
+        category='Data & Infrastructure',
+        subcategory='Data Collection',
+        text='Do you collect data on your services?',
+        options=["Yes", "No"],
+        scores=[5, 0],
+        max_score=5
+    ),
+    dict(
+        category='Data & Infrastructure',
+        subcategory='Data Accuracy',
+        text='How would you rate the accuracy and reliability of your data?',
+        options=["Excellent", "Good", "Moderate", "Fair", "Poor"],
+        scores=[5, 4, 3, 2, 1],
+        max_score=5
+    ),
+    dict(
+        category='Data & Infrastructure',
+        subcategory='Data Up-to-Date',
+        text='Do you have a mechanism to ensure your data is up-to-date?',
+        options=["Yes", "No"],
+        scores=[5, 0],
+        max_score=5
+    ),
+    dict(
+        category='Data & Infrastructure',
+        subcategory='Data Access',
+        text='How easy is it for authorized personnel to access the data needed for AI analysis?',
+        options=["Easy", "Somewhat difficult", "Difficult"],
+        scores=[5, 3, 1],
+        max_score=5
+    ),
+    dict(
+        category='Data & Infrastructure',
+        subcategory='Data Integration',
+        text='Do you have systems to integrate data from different sources (e.g., CRM, ERP)?',
+        options=["Yes", "No"],
+        scores=[5, 0],
+        max_score=5
+    ),
+    dict(
+        category='Data & Infrastructure',
+        subcategory='Infrastructure Performance',
+        text='How would you rate the performance of your data storage and computing infrastructure?',
+        options=["Excellent", "Very Good", "Solid", "Fair", "Poor"],
+        scores=[5, 4, 3, 2, 1],
+        max_score=5
+    ),
+    dict(
+        category='Data & Infrastructure',
+        subcategory='Scalability',
+        text='How would you rate your infrastructure\'s capacity to scale to accommodate changing AI demands?',
+        options=["Excellent", "Very Good", "Solid", "Fair", "Poor"],
+        scores=[5, 4, 3, 2, 1],
+        max_score=5
+    ),
+    dict(
+        category='Data & Infrastructure',
+        subcategory='Cloud Solutions',
+        text='Have you considered cloud-based solutions for scalability and flexibility?',
+        options=["Yes", "No"],
+        scores=[5, 0],
+        max_score=5
+    ),
+    dict(
+        category='Data & Infrastructure',
+        subcategory='Security Policies',
+        text='Are there policies to ensure data security and privacy?',
+        options=["Yes", "No"],
+        scores=[5, 0],
+        max_score=5
+    ),
+
+    # Organization (Talent & Culture) (17 points max)
+    dict(
+        category='Organization (Talent & Culture)',
+        subcategory='Talent Availability',
+        text='Does your organization have a dedicated team with expertise in AI technologies?',
+        options=["Yes", "No"],
+        scores=[5, 0],
+        max_score=5
+    ),
+    dict(
+        category='Organization (Talent & Culture)',
+        subcategory='Team Capacity',
+        text='How would you rate your team’s capacity to manage and analyze data effectively?',
+        options=["Excellent", "Very Good", "Solid", "Fair", "Poor"],
+        scores=[5, 4, 3, 2, 1],
+        max_score=5
+    ),
+    dict(
+        category='Organization (Talent & Culture)',
+        subcategory='Training Programs',
+        text='Has your company invested in training programs to upskill employees in AI-related competencies?',
+        options=["Yes, through external vendors.",
+                 "Yes, with comprehensive internal programs.",
+                 "No, but plans to in the future.",
+                 "No, with no plans.",
+                 "Unsure"],
+        scores=[5, 4, 3, 1, 0],
+        max_score=5
+    ),
+    dict(
+        category='Organization (Talent & Culture)',
+        subcategory='Knowledge Sharing',
+        text='Does your organization have mechanisms for knowledge sharing and documentation of best practices in AI development?',
+        options=["Yes", "No"],
+        scores=[5, 0],
+        max_score=5
+    ),
+    dict(
+        category='Organization (Talent & Culture)',
+        subcategory='Cross-functional Collaboration',
+        text='Are there opportunities for collaboration between technical teams and domain experts in AI projects?',
+        options=["Yes", "No"],
+        scores=[5, 0],
+        max_score=5
+    ),
+    dict(
+        category='Organization (Talent & Culture)',
+        subcategory='Cultural Readiness',
+        text='How urgently is your organization looking to embrace AI?',
+        options=["High urgency", "Moderate urgency", "Limited urgency", "No urgency"],
+        scores=[5, 4, 3, 1],
+        max_score=5
+    ),
+    dict(
+        category='Organization (Talent & Culture)',
+        subcategory='Board Receptiveness',
+        text='How receptive is your Board to changes brought about by AI?',
+        options=["High receptiveness", "Moderate receptiveness", "Limited receptiveness", "Not receptive", "Unsure"],
+        scores=[5, 4, 3, 1, 0],
+        max_score=5
+    ),
+    dict(
+        category='Organization (Talent & Culture)',
+        subcategory='Leadership Receptiveness',
+        text='How receptive is your Leadership Team to changes brought about by AI?',
+        options=["High receptiveness", "Moderate receptiveness", "Limited receptiveness", "Not receptive", "Unsure"],
+        scores=[5, 4, 3, 1, 0],
+        max_score=5
+    ),
+    dict(
+        category='Organization (Talent & Culture)',
+        subcategory='Change Management Plan',
+        text='Do you have a change management plan in place to address changes brought about by AI?',
+        options=["Yes", "No", "Developing"],
+        scores=[5, 0, 3],
+        max_score=5
+    ),
+    dict(
+        category='Organization (Talent & Culture)',
+        subcategory='Employee Receptiveness',
+        text='How receptive are your employees to changes brought about by AI?',
+        options=["High receptiveness", "Moderate receptiveness", "Limited receptiveness", "Not receptive", "Unsure"],
+        scores=[5, 4, 3, 1, 0],
+        max_score=5
+    ),
+]
+
+
+def upgrade():
+    connection = op.get_bind()
+    existing = {
+        (row.category, row.subcategory)
+        for row in connection.execute(sa.select(assessment_question.c.category, assessment_question.c.subcategory))
+    }
+    missing = [question for question in QUESTIONS_V1
+               if (question['category'], question['subcategory']) not in existing]
+    if missing:
+        op.bulk_insert(assessment_question, missing)
+
+
+def downgrade():
+    op.execute(assessment_question.delete().where(
+        assessment_question.c.subcategory.in_([question['subcategory'] for question in QUESTIONS_V1])
+    ))
@@ -0,0 +1,119 @@
+"""compact response answers
+
+Revision ID: bbea3749936e
+Revises: 7212341a03e8
+Create Date: 2026-10-17 11:19:59.011861
+
+"""
+import hashlib
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bbea3749936e'
+down_revision = '7212341a03e8'
+branch_labels = None
+depends_on = None
+
+assessment_question = sa.table(
+    'assessment_question',
+    sa.column('id', sa.Integer),
+    sa.column('category', sa.String),
+    sa.column('subcategory', sa.String),
+    sa.column('text', sa.String),
+    sa.column('options', sa.JSON),
+    sa.column('scores', sa.JSON),
+    sa.column('max_score', sa.Float),
+)
+
+response = sa.table(
+    'response',
+    sa.column('question_id', sa.Integer),
+    sa.column('answer', sa.String),
+    sa.column('option_index', sa.SmallInteger),
+    sa.column('score', sa.Float),
+    sa.column('bank_version', sa.String),
+)
+
+
+def load_questions(connection):
+    """({id: question row}, catalog version) of the question bank.
+
+    The version is computed as catalog.py did at this revision (a frozen
+    copy: migrations don't import application code, which keeps changing),
+    so backfilled responses carry the version the app then compared with.
+    """
+    rows = connection.execute(sa.select(assessment_question).order_by(assessment_question.c.id)).all()
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update(json.dumps(
+            [row.id, row.category, row.subcategory, row.text, list(row.options), list(row.scores), row.max_score],
+            ensure_ascii=False,
+        ).encode('utf-8'))
+    return {row.id: row for row in rows}, digest.hexdigest()[:12]
+
+
+def upgrade():
+    with op.batch_alter_table('response', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('option_index', sa.SmallInteger(), nullable=True))
+        batch_op.add_column(sa.Column('bank_version', sa.String(length=12), nullable=True))
+
+    # Backfill once per distinct (question, answer text) pair rather than per row.
+    connection = op.get_bind()
+    questions, version = load_questions(connection)
+    pairs = connection.execute(sa.select(response.c.question_id, response.c.answer).distinct()).all()
+    updates = []
+    for question_id, answer in pairs:
+        question = questions.get(question_id)
+        if question is not None and answer in question.options:
+            index = question.options.index(answer)
+            updates.append({'q': question_id, 'a': answer, 'index': index,
+                            'score': question.scores[index], 'version': version})
+    if updates:
+        connection.execute(
+            response.update()
+            .where(response.c.question_id == sa.bindparam('q'), response.c.answer == sa.bindparam('a'))
+            .values(option_index=sa.bindparam('index'), score=sa.bindparam('score'),
+                    bank_version=sa.bindparam('version')),
+            updates
+        )
+    # Answers that match no option never scored and cannot be represented.
+    connection.execute(response.delete().where(response.c.option_index.is_(None)))
+
+    with op.batch_alter_table('response', schema=None) as batch_op:
+        batch_op.alter_column('option_index', existing_type=sa.SmallInteger(), nullable=False)
+        batch_op.alter_column('bank_version', existing_type=sa.String(length=12), nullable=False)
+        batch_op.alter_column('score',
+               existing_type=sa.FLOAT(),
+               nullable=False)
+        batch_op.drop_column('answer')
+
+
+def downgrade():
+    with op.batch_alter_table('response', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('answer', sa.VARCHAR(length=500), nullable=True))
+        batch_op.alter_column('score',
+               existing_type=sa.FLOAT(),
+               nullable=True)
+
+    connection = op.get_bind()
+    questions, _ = load_questions(connection)
+    updates = [
+        {'q': question.id, 'index': index, 'a': option}
+        for question in questions.values()
+        for index, option in enumerate(question.options)
+    ]
+    if updates:
+        connection.execute(
+            response.update()
+            .where(response.c.question_id == sa.bindparam('q'), response.c.option_index == sa.bindparam('index'))
+            .values(answer=sa.bindparam('a')),
+            updates
+        )
+
+    with op.batch_alter_table('response', schema=None) as batch_op:
+        batch_op.drop_column('bank_version')
+        batch_op.drop_column('option_index')
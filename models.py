@@ -0,0 +1,341 @@
+from flask import current_app, has_app_context
+from flask_sqlalchemy import SQLAlchemy
+from flask_login import UserMixin
+from datetime import datetime, timezone
+from catalog import DEFAULT_TENANT, QUESTIONS_PER_PAGE, get_catalog, invalidate_catalog
+from benchmarking import METRICS, METRIC_FIELDS, metric_caps, score_bucket
+from scoring import CATEGORIES, READINESS_LEVELS, category_scores
+
+db = SQLAlchemy()
+
+
+class User(UserMixin, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.String(128))
+    # Picks the question bank of new assessments; see QuestionBank.
+    tenant = db.Column(db.String(100), nullable=False, default=DEFAULT_TENANT, server_default=DEFAULT_TENANT)
+    
+    def set_password(self, password, hasher):
+        self.password_hash = hasher.hash(password)
+        
+    def check_password(self, password, hasher):
+        """Whether `password` matches; an outdated hash is replaced (uncommitted) when it does."""
+        matches, new_hash = hasher.check(self.password_hash, password)
+        if new_hash:
+            self.password_hash = new_hash
+        return matches
+
+class QuestionBank(db.Model):
+    """One published version of a tenant's questions and scoring rules.
+
+    Banks and their questions are never edited once published: changes go
+    out as the tenant's next version, which new assessments pick up while
+    existing ones keep the bank they were started with.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    tenant = db.Column(db.String(100), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    category_caps = db.Column(db.JSON, nullable=False)
+    readiness_thresholds = db.Column(db.JSON, nullable=False)
+    questions_per_page = db.Column(db.Integer, nullable=False, default=QUESTIONS_PER_PAGE)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.UniqueConstraint('tenant', 'version', name='uq_question_bank_tenant_version'),
+    )
+
+    @classmethod
+    def latest_id(cls, tenant=DEFAULT_TENANT):
+        """Id of the tenant's newest bank, falling back to the default tenant's."""
+        bank_id = db.session.query(db.func.max(cls.id)).filter_by(tenant=tenant).scalar()
+        if bank_id is None and tenant != DEFAULT_TENANT:
+            return cls.latest_id()
+        return bank_id
+
+    @classmethod
+    def publish(cls, tenant, questions, category_caps, readiness_thresholds, questions_per_page=QUESTIONS_PER_PAGE):
+        """Add the tenant's next bank version; `questions` are dicts like question_bank.QUESTIONS_V1."""
+        if set(category_caps) != set(CATEGORIES):
+            raise ValueError(f'category_caps must have exactly these categories: {", ".join(CATEGORIES)}')
+        thresholds = list(readiness_thresholds)
+        if len(thresholds) != len(READINESS_LEVELS) - 1 or thresholds != sorted(thresholds):
+            raise ValueError(f'readiness_thresholds must be {len(READINESS_LEVELS) - 1} ascending totals')
+        if not questions:
+            raise ValueError('a question bank needs at least one question')
+        for number, question in enumerate(questions, 1):
+            if question.get('category') not in CATEGORIES:
+                raise ValueError(f'question {number}: unknown category {question.get("category")!r}')
+            if not question.get('options') or len(question['options']) != len(question.get('scores') or ()):
+                raise ValueError(f'question {number}: needs one score per option')
+        version = (db.session.query(db.func.max(cls.version)).filter_by(tenant=tenant).scalar() or 0) + 1
+        bank = cls(tenant=tenant, version=version, category_caps=dict(category_caps),
+                   readiness_thresholds=thresholds, questions_per_page=questions_per_page)
+        db.session.add(bank)
+        db.session.flush()
+        db.session.add_all(AssessmentQuestion(
+            bank_id=bank.id, category=question['category'], subcategory=question['subcategory'],
+            text=question['text'], options=list(question['options']), scores=list(question['scores']),
+            max_score=question.get('max_score', max(question['scores'])))
+            for question in questions)
+        return bank
+
+class AssessmentQuestion(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    bank_id = db.Column(db.Integer, db.ForeignKey('question_bank.id'), nullable=False, index=True)
+    category = db.Column(db.String(50), nullable=False)
+    subcategory = db.Column(db.String(50), nullable=False)
+    text = db.Column(db.String(500), nullable=False)
+    options = db.Column(db.JSON, nullable=False)
+    scores = db.Column(db.JSON, nullable=False)
+    max_score = db.Column(db.Float, nullable=False)
+
+@db.event.listens_for(AssessmentQuestion, 'after_insert')
+@db.event.listens_for(AssessmentQuestion, 'after_update')
+@db.event.listens_for(AssessmentQuestion, 'after_delete')
+def question_bank_changed(mapper, connection, target):
+    invalidate_catalog(target.bank_id)
+
+def load_bank(bank_id):
+    return (db.session.get(QuestionBank, bank_id),
+            AssessmentQuestion.query.filter_by(bank_id=bank_id).order_by(AssessmentQuestion.id).all())
+
+def question_catalog(bank_id=None, tenant=DEFAULT_TENANT):
+    """Compiled catalog of a question bank; by default the tenant's latest one."""
+    if bank_id is None:
+        bank_id = QuestionBank.latest_id(tenant)
+    max_entries = current_app.config['QUESTION_BANK_CACHE_SIZE'] if has_app_context() else 64
+    return get_catalog(bank_id, load_bank, max_entries)
+    
+class Assessment(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    bank_id = db.Column(db.Integer, db.ForeignKey('question_bank.id'), nullable=False)
+    start_date = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    completion_date = db.Column(db.DateTime)
+    current_question = db.Column(db.Integer, default=1)
+    status = db.Column(db.String(20), default='In Progress')
+    strategy_score = db.Column(db.Float, default=0)
+    governance_score = db.Column(db.Float, default=0)
+    data_infrastructure_score = db.Column(db.Float, default=0)
+    organization_score = db.Column(db.Float, default=0)
+    total_score = db.Column(db.Float, default=0)
+    readiness_level = db.Column(db.String(50))
+    # Incremental data exports number the completed assessments they pick up; see data_export.py.
+    export_batch = db.Column(db.Integer, index=True)
+
+    __table_args__ = (
+        db.Index('ix_assessment_user_id_completion_date', 'user_id', 'completion_date'),
+    )
+    
+class UserStats(db.Model):
+    """Per-user aggregates, updated as each assessment completes."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    assessments_completed = db.Column(db.Integer, nullable=False, default=0)
+    latest_assessment_id = db.Column(db.Integer, db.ForeignKey('assessment.id'))
+    latest_score = db.Column(db.Float)
+    latest_readiness_level = db.Column(db.String(50))
+    latest_completion_date = db.Column(db.DateTime)
+    best_assessment_id = db.Column(db.Integer, db.ForeignKey('assessment.id'))
+    best_score = db.Column(db.Float)
+    # {category: score} of the latest and the one before it, for trends.
+    latest_category_scores = db.Column(db.JSON)
+    previous_category_scores = db.Column(db.JSON)
+
+    @classmethod
+    def record_completion(cls, assessment, category_scores):
+        stats = db.session.get(cls, assessment.user_id, with_for_update=True)
+        if stats is None:
+            stats = cls(user_id=assessment.user_id, assessments_completed=0)
+            db.session.add(stats)
+        stats.add(assessment, category_scores)
+        return stats
+
+    @classmethod
+    def rebuild(cls, user_ids, chunk_size=500):
+        """Recompute the aggregates of `user_ids` from their completed assessments, oldest first."""
+        user_ids = list(user_ids)
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            cls.query.filter(cls.user_id.in_(chunk)).delete(synchronize_session='fetch')
+            stats = {}
+            assessments = Assessment.query.filter(
+                Assessment.user_id.in_(chunk), Assessment.status == 'Complete', Assessment.completion_date.isnot(None)
+            ).order_by(Assessment.completion_date, Assessment.id)
+            for assessment in assessments.yield_per(1000):
+                if assessment.user_id not in stats:
+                    stats[assessment.user_id] = cls(user_id=assessment.user_id, assessments_completed=0)
+                stats[assessment.user_id].add(assessment, category_scores(assessment))
+            db.session.add_all(stats.values())
+
+    def add(self, assessment, category_scores):
+        self.assessments_completed += 1
+        self.previous_category_scores = self.latest_category_scores
+        self.latest_category_scores = category_scores
+        self.latest_assessment_id = assessment.id
+        self.latest_score = assessment.total_score
+        self.latest_readiness_level = assessment.readiness_level
+        self.latest_completion_date = assessment.completion_date
+        if self.best_score is None or assessment.total_score > self.best_score:
+            self.best_score = assessment.total_score
+            self.best_assessment_id = assessment.id
+
+    def category_trends(self):
+        """Yield (category, latest score, change since the previous assessment or None)."""
+        previous = self.previous_category_scores or {}
+        for category, score in (self.latest_category_scores or {}).items():
+            yield category, score, score - previous[category] if category in previous else None
+    
+class ScoreBucket(db.Model):
+    """How many completed assessments of a question bank scored `bucket` points on `metric`."""
+    bank_id = db.Column(db.Integer, db.ForeignKey('question_bank.id'), primary_key=True, autoincrement=False)
+    metric = db.Column(db.String(50), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    assessments = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def count_completion(cls, assessment):
+        """Add a newly completed assessment to its bank's histograms."""
+        caps = metric_caps(question_catalog(assessment.bank_id).category_caps)
+        rows = [{'bank_id': assessment.bank_id, 'metric': metric,
+                 'bucket': score_bucket(metric, getattr(assessment, METRIC_FIELDS[metric]), caps),
+                 'assessments': 1} for metric in METRICS]
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(cls).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['bank_id', 'metric', 'bucket'],
+                set_={'assessments': cls.assessments + 1}
+            )
+            db.session.execute(stmt)
+            return
+        for row in rows:
+            bucket = db.session.get(cls, (row['bank_id'], row['metric'], row['bucket']), with_for_update=True)
+            if bucket is None:
+                db.session.add(cls(**row))
+            else:
+                bucket.assessments += 1
+
+class CohortSnapshot(db.Model):
+    """A copy of the score histograms, which percentile ranks are read from.
+
+    The live histograms change with every completion. Ranks only move when
+    a new snapshot is taken, so cached reports and pages that show them
+    stay valid in between.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    cohort_size = db.Column(db.Integer, nullable=False)
+    # [[bank_id, metric, bucket, assessments], ...], as in score_bucket.
+    buckets = db.Column(db.JSON, nullable=False)
+
+    @classmethod
+    def latest(cls):
+        return cls.query.order_by(cls.id.desc()).first()
+
+class IdempotencyKey(db.Model):
+    """Stored outcome of an API write, replayed when a client retries with the same key."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    request_fingerprint = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer, nullable=False)
+    response_body = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc), index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key', name='uq_idempotency_key_user_key'),
+    )
+
+class Job(db.Model):
+    """Background work waiting for, or being run by, a job worker; see jobs.py."""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    # queued -> running -> deleted when done; back to queued for a retry,
+    # failed once max_attempts are used up.
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False)
+    run_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+
+class Response(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    assessment_id = db.Column(db.Integer, db.ForeignKey('assessment.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('assessment_question.id'), nullable=False)
+    option_index = db.Column(db.SmallInteger, nullable=False)
+    # Frozen when the answer is given, so editing the question bank never
+    # changes the score of an existing answer.
+    score = db.Column(db.Float, nullable=False)
+    bank_version = db.Column(db.String(12), nullable=False)
+
+    __table_args__ = (
+        # Also serves lookups by assessment_id, its leading column.
+        db.UniqueConstraint('assessment_id', 'question_id', name='uq_response_assessment_question'),
+        db.Index('ix_response_question_id', 'question_id'),
+    )
+
+    def __init__(self, assessment_id, question_id, option_index, catalog):
+        self.assessment_id = assessment_id
+        self.question_id = question_id
+        self.option_index = option_index
+        self.score = catalog.by_id[question_id].scores[option_index]
+        self.bank_version = catalog.version
+
+
+def upsert_responses(rows, catalog):
+    """Insert or overwrite answers keyed by (assessment_id, question_id).
+
+    `rows` are dicts with assessment_id, question_id and option_index, all
+    for assessments of `catalog`'s bank; the score and bank version are
+    filled in from the catalog.
+    Resubmitting a page therefore updates the existing rows instead of adding
+    duplicates.
+    """
+    if not rows:
+        return
+    rows = [dict(row, score=catalog.by_id[row['question_id']].scores[row['option_index']],
+                 bank_version=catalog.version) for row in rows]
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(Response).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['assessment_id', 'question_id'],
+            set_={'option_index': stmt.excluded.option_index, 'score': stmt.excluded.score,
+                  'bank_version': stmt.excluded.bank_version}
+        )
+        db.session.execute(stmt)
+        return
+
+    keys = {(row['assessment_id'], row['question_id']) for row in rows}
+    existing = {
+        (response.assessment_id, response.question_id): response
+        for response in Response.query.filter(
+            Response.assessment_id.in_({assessment_id for assessment_id, _ in keys}),
+            Response.question_id.in_({question_id for _, question_id in keys}))
+    }
+    for row in rows:
+        response = existing.get((row['assessment_id'], row['question_id']))
+        if response is None:
+            db.session.add(Response(row['assessment_id'], row['question_id'], row['option_index'], catalog))
+        else:
+            response.option_index = row['option_index']
+            response.score = row['score']
+            response.bank_version = row['bank_version']
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+from concurrency import run_blocking, thread_pool
+
+# Bump whenever the report layout in pdf_generator.py changes so cached PDFs are re-rendered.
+REPORT_TEMPLATE_VERSION = 5
+
+ReportData = namedtuple('ReportData', [
+    'strategy_score', 'governance_score', 'data_infrastructure_score',
+    'organization_score', 'total_score', 'readiness_level', 'percentile_ranks', 'category_caps'
+], defaults=(None,))
+
+
+def report_data(assessment, percentile_ranks=None, category_caps=None):
+    """Report inputs of an assessment; `percentile_ranks` is {metric: rank} or None.
+
+    `category_caps` are the maximum category scores of the assessment's
+    question bank, or None for the default caps.
+    """
+    return ReportData(*(getattr(assessment, field) for field in ReportData._fields[:-2]),
+                      percentile_ranks=percentile_ranks, category_caps=category_caps)
+
+
+class ReportCache:
+    """Rendered PDF reports on local disk, keyed by report content.
+
+    Files are named after a hash of the report inputs and the template
+    version, so identical score sets share one file and a template change
+    never serves a stale layout. Total size is bounded by evicting the
+    least recently used files (tracked through mtime, which a cache hit
+    refreshes).
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, workers=1, metrics=None):
+        self.directory = directory
+        self.metrics = metrics
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, data):
+        payload = json.dumps([REPORT_TEMPLATE_VERSION, list(data)], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}.pdf')
+
+    def get(self, data):
+        """Return the path of the rendered report, rendering it now if needed."""
+        key = self.key(data)
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._record('miss')
+            self._render(key, data).result()
+        else:
+            self._record('hit')
+        return path
+
+    def open(self, data):
+        """Open the rendered report for streaming, re-rendering if it was evicted meanwhile."""
+        while True:
+            path = self.get(data)
+            try:
+                return open(path, 'rb')
+            except FileNotFoundError:
+                continue
+
+    def prerender(self, data):
+        """Queue a background render unless the report is cached or in flight."""
+        key = self.key(data)
+        if not os.path.exists(self.path(key)):
+            self._render(key, data, background=True)
+
+    def _record(self, event):
+        if self.metrics is not None:
+            self.metrics.increment('report_cache_events_total', (event,))
+
+    def _render(self, key, data, background=False):
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            if background:
+                if self._executor is None:
+                    self._executor = thread_pool(self.workers, 'report-render')
+                future = self._executor.submit(self._write, key, data)
+            else:
+                future = Future()
+            self._pending[key] = future
+
+        if not background:
+            try:
+                # Off the event loop under gevent, so a render doesn't hold up the worker's other requests.
+                future.set_result(run_blocking(self._write, key, data))
+            except Exception as exc:
+                future.set_exception(exc)
+        return future
+
+    def _write(self, key, data):
+        try:
+            # Imported here, so workers load ReportLab on their first render rather than at start-up.
+            from pdf_generator import generate_pdf_report
+            started = time.perf_counter()
+            buffer = generate_pdf_report(data)
+            if self.metrics is not None:
+                self.metrics.observe('pdf_render_duration_seconds', time.perf_counter() - started)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(buffer.getbuffer())
+            os.replace(tmp_path, self.path(key))
+            self._record('render')
+            self._evict()
+            return self.path(key)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _evict(self):
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith('.pdf'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        # Never evict the newest file, it is the one just written.
+        for _, size, path in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self._record('eviction')
@@ -0,0 +1,101 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Category caps and readiness thresholds of the default question bank;
+# each bank stores its own, compiled into its catalog's ScoringPlan.
+CATEGORY_MAX_SCORES = {
+    'Strategy': 19,
+    'Governance': 17,
+    'Data & Infrastructure': 20,
+    'Organization (Talent & Culture)': 17
+}
+
+CATEGORY_SCORE_FIELDS = {
+    'Strategy': 'strategy_score',
+    'Governance': 'governance_score',
+    'Data & Infrastructure': 'data_infrastructure_score',
+    'Organization (Talent & Culture)': 'organization_score'
+}
+
+CATEGORIES = tuple(CATEGORY_MAX_SCORES)
+
+# Upper bound (inclusive) of each readiness level's total score.
+READINESS_THRESHOLDS = (21, 43, 65)
+READINESS_LEVELS = ('AI Novice', 'AI Ready', 'AI Proficient', 'AI Advanced')
+
+ScoreResult = namedtuple('ScoreResult', ['category_scores', 'total_score', 'readiness_level'])
+
+
+class ScoringPlan:
+    """A question bank's scoring rules as lookups and arrays, compiled once per bank.
+
+    Holds the question_id -> category index map, the category caps and
+    the readiness thresholds, so scoring never consults the catalog again.
+    """
+    __slots__ = ('version', 'categories', 'caps', 'thresholds')
+
+    def __init__(self, catalog):
+        category_index = {category: index for index, category in enumerate(CATEGORIES)}
+        self.version = catalog.version
+        self.categories = {
+            question.id: category_index[question.category]
+            for question in catalog.questions
+            if question.category in category_index
+        }
+        self.caps = np.array([catalog.category_caps[category] for category in CATEGORIES], dtype=np.float64)
+        self.thresholds = np.array(catalog.readiness_thresholds, dtype=np.float64)
+
+
+def score_assessments(assessment_ids, responses, catalog):
+    """Score many assessments in one pass.
+
+    `responses` is an iterable of (assessment_id, question_id, score) rows for
+    any of `assessment_ids`, with the score frozen on the response when it was
+    answered. Returns a dict of assessment id -> ScoreResult.
+    """
+    assessment_ids = list(assessment_ids)
+    row_index = {assessment_id: index for index, assessment_id in enumerate(assessment_ids)}
+    plan = catalog.plan
+    categories = plan.categories
+
+    rows, columns, values = [], [], []
+    for assessment_id, question_id, score in responses:
+        column = categories.get(question_id)
+        if column is None or score is None or assessment_id not in row_index:
+            continue
+        rows.append(row_index[assessment_id])
+        columns.append(column)
+        values.append(score)
+
+    raw = np.zeros((len(assessment_ids), len(CATEGORIES)), dtype=np.float64)
+    np.add.at(raw, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)),
+              np.asarray(values, dtype=np.float64))
+    return _results(assessment_ids, raw, plan)
+
+
+def _results(assessment_ids, raw, plan):
+    # Normalize scores to respect maximum categories scores
+    capped = np.minimum(raw, plan.caps)
+    totals = capped.sum(axis=1)
+    levels = np.searchsorted(plan.thresholds, totals, side='left')
+
+    results = {}
+    for index, assessment_id in enumerate(assessment_ids):
+        results[assessment_id] = ScoreResult(
+            category_scores=dict(zip(CATEGORIES, capped[index].tolist())),
+            total_score=totals[index].item(),
+            readiness_level=READINESS_LEVELS[levels[index]],
+        )
+    return results
+
+
+def apply_score(assessment, result):
+    for category, field in CATEGORY_SCORE_FIELDS.items():
+        setattr(assessment, field, result.category_scores[category])
+    assessment.total_score = result.total_score
+    assessment.readiness_level = result.readiness_level
+
+
+def category_scores(assessment):
+    return {category: getattr(assessment, field) for category, field in CATEGORY_SCORE_FIELDS.items()}
@@ -0,0 +1,186 @@
+import itertools
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from scoring import CATEGORIES, READINESS_LEVELS
+
+Change = namedtuple('Change', ['question_id', 'category', 'from_option', 'to_option', 'answer', 'score_change'])
+Scenario = namedtuple('Scenario', ['changes', 'total_score', 'gain', 'readiness_level'])
+Simulation = namedtuple('Simulation', [
+    'total_score', 'readiness_level', 'next_level', 'next_threshold', 'changes', 'combinations', 'path'
+])
+
+
+class ScoreMatrix:
+    """A catalog's option scores as a question x option array, and its scoring rules, for what-if scoring.
+
+    Rows are padded to the longest option list; `valid` marks real options.
+    """
+    __slots__ = ('version', 'questions', 'rows', 'categories', 'scores', 'valid', 'caps', 'thresholds')
+
+    def __init__(self, catalog):
+        category_index = {category: index for index, category in enumerate(CATEGORIES)}
+        questions = tuple(question for question in catalog.questions if question.category in category_index)
+        width = max((len(question.scores) for question in questions), default=0)
+        self.version = catalog.version
+        self.questions = questions
+        self.rows = {question.id: row for row, question in enumerate(questions)}
+        self.categories = np.array([category_index[question.category] for question in questions], dtype=np.intp)
+        self.scores = np.zeros((len(questions), width), dtype=np.float64)
+        self.valid = np.zeros((len(questions), width), dtype=bool)
+        for row, question in enumerate(questions):
+            self.scores[row, :len(question.scores)] = question.scores
+            self.valid[row, :len(question.scores)] = True
+        self.caps = catalog.plan.caps
+        self.thresholds = catalog.plan.thresholds
+
+    def level(self, total):
+        return int(np.searchsorted(self.thresholds, total, side='left'))
+
+    def capped_totals(self, raw):
+        return np.minimum(raw, self.caps).sum(axis=-1)
+
+
+_score_matrices = OrderedDict()
+_score_matrices_lock = threading.Lock()
+
+
+def score_matrix(catalog, max_entries=16):
+    """The ScoreMatrix of `catalog`, kept for the `max_entries` most recently used banks."""
+    with _score_matrices_lock:
+        matrix = _score_matrices.get(catalog.version)
+        if matrix is not None:
+            _score_matrices.move_to_end(catalog.version)
+            return matrix
+    matrix = ScoreMatrix(catalog)
+    with _score_matrices_lock:
+        _score_matrices[catalog.version] = matrix
+        while len(_score_matrices) > max_entries:
+            _score_matrices.popitem(last=False)
+    return matrix
+
+
+def simulate(matrix, answers, max_changes=2, limit=10, candidates=24):
+    """Score every answer change of an assessment in one batch.
+
+    `answers` are its (question_id, option_index, score) rows, scored as
+    stored so the baseline matches the assessment's total. Returns the
+    `limit` single changes and `max_changes`-answer combinations (drawn from
+    the best `candidates` single changes) that raise the total the most, and
+    the cheapest path to the next readiness level: the fewest changed
+    answers, then the smallest rise in raw score. When no combination that
+    small gets there the path is built greedily, one best change at a time.
+    """
+    current_option = np.full(len(matrix.questions), -1, dtype=np.intp)
+    current_score = np.zeros(len(matrix.questions), dtype=np.float64)
+    for question_id, option_index, score in answers:
+        row = matrix.rows.get(question_id)
+        if row is not None:
+            current_option[row] = option_index
+            current_score[row] = score or 0
+    raw = np.bincount(matrix.categories, weights=current_score, minlength=len(CATEGORIES))
+    total = float(matrix.capped_totals(raw))
+    level = matrix.level(total)
+
+    # Every alternative answer that adds raw points, with the capped total it gives.
+    delta = matrix.scores - current_score[:, None]
+    delta[~matrix.valid] = 0
+    rows, options = np.nonzero(delta > 0)
+    deltas = np.zeros((len(rows), len(CATEGORIES)), dtype=np.float64)
+    deltas[np.arange(len(rows)), matrix.categories[rows]] = delta[rows, options]
+    gains = matrix.capped_totals(raw + deltas) - total
+    useful = gains > 0
+    rows, options, deltas, gains = rows[useful], options[useful], deltas[useful], gains[useful]
+    order = np.lexsort((deltas.sum(axis=1), -gains))
+    rows, options, deltas, gains = rows[order], options[order], deltas[order], gains[order]
+
+    def change(index):
+        question = matrix.questions[rows[index]]
+        return Change(question.id, question.category,
+                      int(current_option[rows[index]]) if current_option[rows[index]] >= 0 else None,
+                      int(options[index]), question.options[options[index]], round(float(deltas[index].sum()), 2))
+
+    def scenario(indexes, new_total):
+        return Scenario([change(index) for index in indexes], round(float(new_total), 2),
+                        round(float(new_total - total), 2), READINESS_LEVELS[matrix.level(new_total)])
+
+    singles = [scenario([index], total + gains[index]) for index in range(min(limit, len(rows)))]
+
+    # Scenarios reaching the next level, as (answers changed, raw rise, -gain, change indexes).
+    threshold = matrix.thresholds[level] if level < len(matrix.thresholds) else np.inf
+    reaching = [(1, float(deltas[index].sum()), -float(gains[index]), (index,))
+                for index in np.nonzero(total + gains > threshold)[0]]
+
+    # Combinations of distinct questions among the strongest single changes.
+    pool = min(candidates, len(rows))
+    combinations = []
+    for size in range(2, max_changes + 1):
+        if pool < size:
+            break
+        combos = np.array(list(itertools.combinations(range(pool), size)), dtype=np.intp)
+        combo_rows = np.sort(rows[combos], axis=1)
+        combos = combos[np.all(np.diff(combo_rows, axis=1) != 0, axis=1)]
+        if not len(combos):
+            continue
+        new_totals = matrix.capped_totals(raw + deltas[combos].sum(axis=1))
+        combo_gains = new_totals - total
+        # Drop combinations in which some change adds nothing over the others.
+        combos_useful = combo_gains > gains[combos].max(axis=1)
+        combos, new_totals, combo_gains = combos[combos_useful], new_totals[combos_useful], combo_gains[combos_useful]
+        raised = deltas[combos].sum(axis=(1, 2))
+        order = np.lexsort((raised, -combo_gains))
+        combinations.extend((combo_gains[index], raised[index], combos[index], new_totals[index])
+                            for index in order[:limit])
+        reaching.extend((size, float(raised[index]), -float(combo_gains[index]), tuple(combos[index]))
+                        for index in np.nonzero(new_totals > threshold)[0])
+    combinations.sort(key=lambda item: (-item[0], item[1]))
+    combinations = [scenario(combo, new_total) for _, _, combo, new_total in combinations[:limit]]
+
+    path = None
+    if reaching:
+        best = list(min(reaching)[3])
+        path = scenario(best, matrix.capped_totals(raw + deltas[best].sum(axis=0)))
+    elif level < len(matrix.thresholds):
+        path = _greedy_path(matrix, raw, total, threshold, rows, deltas, scenario)
+
+    return Simulation(
+        total_score=round(total, 2),
+        readiness_level=READINESS_LEVELS[level],
+        next_level=READINESS_LEVELS[level + 1] if level < len(matrix.thresholds) else None,
+        next_threshold=float(matrix.thresholds[level]) if level < len(matrix.thresholds) else None,
+        changes=singles,
+        combinations=combinations,
+        path=path,
+    )
+
+
+def _greedy_path(matrix, raw, total, threshold, rows, deltas, scenario):
+    """Take the change adding most to the capped total until past `threshold`; None if it can't be reached."""
+    chosen = []
+    available = np.ones(len(rows), dtype=bool)
+    new_total = total
+    while new_total <= threshold and available.any():
+        gains = np.where(available, matrix.capped_totals(raw + deltas) - new_total, 0)
+        best = int(np.argmax(gains))
+        if gains[best] <= 0:
+            return None
+        chosen.append(best)
+        raw = raw + deltas[best]
+        new_total = float(matrix.capped_totals(raw))
+        available &= rows != rows[best]
+    return scenario(chosen, new_total) if new_total > threshold else None
+
+
+def scenario_json(scenario):
+    return dict(scenario._asdict(), changes=[change._asdict() for change in scenario.changes])
+
+
+def simulation_json(simulation):
+    return dict(
+        simulation._asdict(),
+        changes=[scenario_json(scenario) for scenario in simulation.changes],
+        combinations=[scenario_json(scenario) for scenario in simulation.combinations],
+        path=scenario_json(simulation.path) if simulation.path else None,
+    )
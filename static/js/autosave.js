@@ -0,0 +1,44 @@
+// Saves the question page's answers in the background as they are chosen.
+(function () {
+    // Changes made in quick succession are sent together in one request.
+    var form = document.getElementById('assessment-form');
+    var status = document.getElementById('autosave-status');
+    var pending = {};
+    var timer = null;
+
+    function flush() {
+        timer = null;
+        var answers = Object.keys(pending).map(function (id) {
+            return {question_id: Number(id), option_index: pending[id]};
+        });
+        if (!answers.length) {
+            return;
+        }
+        pending = {};
+        fetch(form.dataset.autosaveUrl, {
+            method: 'PATCH',
+            credentials: 'same-origin',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({answers: answers})
+        }).then(function (response) {
+            status.textContent = response.ok ? 'Saved' : '';
+        }).catch(function () {
+            status.textContent = '';
+        });
+    }
+
+    form.addEventListener('change', function (event) {
+        var input = event.target;
+        if (!input.dataset.questionId) {
+            return;
+        }
+        pending[input.dataset.questionId] = Number(input.value);
+        status.textContent = 'Saving\u2026';
+        clearTimeout(timer);
+        timer = setTimeout(flush, 600);
+    });
+    form.addEventListener('submit', function () {
+        clearTimeout(timer);
+        pending = {};
+    });
+})();
@@ -0,0 +1,88 @@
+// Draws the results page charts from the assessment's result JSON.
+(function() {
+    const script = document.currentScript;
+
+    function drawCharts(chart) {
+        new Chart(document.getElementById('radarChart').getContext('2d'), {
+            type: 'radar',
+            data: {
+                labels: chart.labels,
+                datasets: [{
+                    label: 'Your Scores',
+                    data: chart.scores,
+                    backgroundColor: 'rgba(54, 162, 235, 0.2)',
+                    borderColor: 'rgb(54, 162, 235)',
+                    pointBackgroundColor: 'rgb(54, 162, 235)',
+                    pointBorderColor: '#fff',
+                    pointHoverBackgroundColor: '#fff',
+                    pointHoverBorderColor: 'rgb(54, 162, 235)'
+                }]
+            },
+            options: {
+                responsive: true,
+                scales: {
+                    r: {
+                        angleLines: {
+                            display: false
+                        },
+                        suggestedMin: 0,
+                        suggestedMax: chart.scale_max
+                    }
+                }
+            }
+        });
+
+        new Chart(document.getElementById('barChart').getContext('2d'), {
+            type: 'bar',
+            data: {
+                labels: chart.labels,
+                datasets: [{
+                    label: 'Scores',
+                    data: chart.scores,
+                    backgroundColor: [
+                        'rgba(255, 99, 132, 0.2)',
+                        'rgba(54, 162, 235, 0.2)',
+                        'rgba(255, 206, 86, 0.2)',
+                        'rgba(75, 192, 192, 0.2)'
+                    ],
+                    borderColor: [
+                        'rgba(255, 99, 132, 1)',
+                        'rgba(54, 162, 235, 1)',
+                        'rgba(255, 206, 86, 1)',
+                        'rgba(75, 192, 192, 1)'
+                    ],
+                    borderWidth: 1
+                }]
+            },
+            options: {
+                responsive: true,
+                scales: {
+                    y: {
+                        beginAtZero: true,
+                        max: chart.scale_max
+                    }
+                }
+            }
+        });
+    }
+
+    function showError(error) {
+        console.error('An error occurred:', error);
+        ['radarChart', 'barChart'].forEach(function(id) {
+            const message = document.createElement('p');
+            message.className = 'text-muted';
+            message.textContent = 'Error loading chart: ' + error.message;
+            document.getElementById(id).replaceWith(message);
+        });
+    }
+
+    fetch(script.dataset.resultsUrl, { credentials: 'same-origin', headers: { 'Accept': 'application/json' } })
+        .then(function(response) {
+            if (!response.ok) {
+                throw new Error('HTTP ' + response.status);
+            }
+            return response.json();
+        })
+        .then(function(result) { drawCharts(result.chart); })
+        .catch(showError);
+})();
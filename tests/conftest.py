@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarking import invalidate_benchmarks  # noqa: E402
+from catalog import invalidate_catalog  # noqa: E402
+from main import create_app, upgrade_database  # noqa: E402
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Build an app on a fresh SQLite database, with the given config on top of the test settings."""
+    def make(**config):
+        # Catalogs and benchmarks are cached per process, not per app.
+        invalidate_catalog()
+        invalidate_benchmarks()
+        app = create_app(dict({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+            'REPORT_CACHE_DIR': str(tmp_path / 'report_cache'),
+            'EXPORT_DIR': str(tmp_path / 'exports'),
+            'METRICS_DIR': str(tmp_path / 'metrics'),
+            'JINJA_CACHE_DIR': str(tmp_path / 'jinja_cache'),
+            'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+            'JOBS_INLINE': True,
+        }, **config))
+        upgrade_database(app)
+        return app
+    yield make
+    invalidate_catalog()
+    invalidate_benchmarks()
+
+
+def sign_in(client, email='user@example.com', password='test-password'):
+    client.post('/register', data={'email': email, 'password': password, 'confirm_password': password})
+    client.post('/login', data={'email': email, 'password': password})
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from accounts import PasswordHasher
+
+
+@pytest.mark.parametrize('method, stored, outdated', [
+    ('pbkdf2:sha256:1000', 'pbkdf2:sha256:1000', False),
+    ('pbkdf2:sha256:2000', 'pbkdf2:sha256:1000', True),
+    ('pbkdf2:sha256', 'pbkdf2:sha256', False),
+    ('pbkdf2:sha256', 'pbkdf2:sha256:1000', True),
+    ('pbkdf2:sha512:1000', 'pbkdf2:sha256:1000', True),
+])
+def test_needs_rehash_compares_parameters(method, stored, outdated):
+    hasher = PasswordHasher(method)
+    password_hash = generate_password_hash('secret', stored)
+    assert hasher.needs_rehash(password_hash) is outdated
+    matches, new_hash = hasher.check(password_hash, 'secret')
+    assert matches and (new_hash is not None) is outdated
+    assert new_hash is None or not hasher.needs_rehash(new_hash)
+
+
+def test_needs_rehash_fills_in_scrypt_defaults():
+    hasher = PasswordHasher('scrypt')
+    assert not hasher.needs_rehash('scrypt:32768:8:1$salt$hash')
+    assert hasher.needs_rehash('scrypt:16384:8:1$salt$hash')
+
+
+def test_gevent_hashing_leaves_the_hub_free():
+    pytest.importorskip('gevent')
+    script = textwrap.dedent('''
+        from gevent import monkey
+        monkey.patch_all()
+
+        import gevent
+        from accounts import HasherBusy, PasswordHasher
+
+        hasher = PasswordHasher('pbkdf2:sha256:400000', workers=1, max_pending=1)
+        ticks = []
+
+        def tick():
+            while True:
+                ticks.append(1)
+                gevent.sleep(0.005)
+
+        ticker = gevent.spawn(tick)
+        hashing = gevent.spawn(hasher.hash, 'secret')
+        gevent.sleep(0.01)
+        try:
+            hasher.hash('other')
+        except HasherBusy:
+            print('busy')
+        hashing.get()
+        ticker.kill()
+        print('ticks', len(ticks))
+    ''')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', script], cwd=root, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    busy, ticks = result.stdout.split('\n')[:2]
+    assert busy == 'busy'
+    # The hash takes tens of milliseconds; the ticker kept running throughout.
+    assert int(ticks.split()[1]) > 5
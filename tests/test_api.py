@@ -0,0 +1,58 @@
+import re
+
+from conftest import sign_in
+
+
+def page_questions(client, assessment_id):
+    page = client.get(f'/assessment/{assessment_id}').get_data(as_text=True)
+    return [int(question_id) for question_id in dict.fromkeys(re.findall(r'name="question_(\d+)"', page))]
+
+
+def test_autosave_keeps_page_boundaries(make_app):
+    client = make_app().test_client()
+    sign_in(client)
+    assessment = client.post('/api/v1/assessments', json={}).get_json()
+    first_page = page_questions(client, assessment['id'])
+
+    # Autosaving part of a page leaves the whole page to be shown again.
+    answers = [{'question_id': question_id, 'option_index': 0} for question_id in first_page[:2]]
+    saved = client.patch(assessment['links']['answers'], json={'answers': answers}).get_json()
+    assert saved['current_question'] == 1
+    assert page_questions(client, assessment['id']) == first_page
+
+    # Once a page is fully answered, the next one starts where it ends.
+    answers = [{'question_id': question_id, 'option_index': 0} for question_id in first_page]
+    saved = client.patch(assessment['links']['answers'], json={'answers': answers}).get_json()
+    assert saved['current_question'] == len(first_page) + 1
+    second_page = page_questions(client, assessment['id'])
+    assert len(second_page) == len(first_page) and not set(second_page) & set(first_page)
+
+
+def test_results_page_revalidates_on_etag_only(make_app):
+    client = make_app().test_client()
+    sign_in(client)
+    assessment = client.post('/api/v1/assessments', json={}).get_json()
+    client.post(assessment['links']['complete'], json={})
+    client.get('/dashboard')  # shows the sign-in's flash message
+
+    for url in (f"/assessment/{assessment['id']}/complete", assessment['links']['result']):
+        response = client.get(url)
+        assert response.status_code == 200 and response.last_modified is None
+        # A snapshot refresh or template change leaves the completion date alone.
+        assert client.get(url, headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'}).status_code == 200
+        assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_stale_tab_cannot_change_a_completed_assessment(make_app):
+    client = make_app().test_client()
+    sign_in(client)
+    assessment = client.post('/api/v1/assessments', json={}).get_json()
+    first_page = page_questions(client, assessment['id'])
+    answers = [{'question_id': question_id, 'option_index': 0} for question_id in first_page]
+    client.patch(assessment['links']['answers'], json={'answers': answers})
+    completed = client.post(assessment['links']['complete'], json={}).get_json()
+
+    form = {'position': 1, **{f'question_{question_id}': 1 for question_id in first_page}}
+    response = client.post(f"/assessment/{assessment['id']}", data=form)
+    assert response.status_code == 302 and response.location.endswith(f"/assessment/{assessment['id']}/complete")
+    assert client.get(assessment['links']['result']).get_json() == completed
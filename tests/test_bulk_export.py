@@ -0,0 +1,33 @@
+import os
+import time
+
+from bulk_export import ExportJob, reap_stale_exports
+
+
+def running_job(directory, age):
+    job = ExportJob(str(directory), total=10)
+    job.status = 'running'
+    job.started_at = time.time() - age
+    job.save()
+    with open(job.partial_path, 'wb') as partial:
+        partial.write(b'PK')
+    os.utime(job.status_path, (job.started_at, job.started_at))
+    return job
+
+
+def test_reap_fails_exports_whose_worker_died(tmp_path):
+    dead = running_job(tmp_path, age=600)
+    alive = running_job(tmp_path, age=5)
+    done = running_job(tmp_path, age=600)
+    done.status = 'complete'
+    done.save()
+    os.utime(done.status_path, (done.started_at, done.started_at))
+
+    assert [job.id for job in reap_stale_exports(str(tmp_path), max_age=300)] == [dead.id]
+
+    dead = ExportJob.load(str(tmp_path), dead.id)
+    assert dead.status == 'failed' and dead.error and dead.finished_at
+    assert not os.path.exists(dead.partial_path)
+    assert ExportJob.load(str(tmp_path), alive.id).status == 'running' and os.path.exists(alive.partial_path)
+    assert ExportJob.load(str(tmp_path), done.id).status == 'complete'
+    assert reap_stale_exports(str(tmp_path), max_age=300) == []
@@ -0,0 +1,40 @@
+import csv
+import io
+
+from conftest import sign_in
+from question_bank import QUESTIONS_V1
+
+
+def export_ids(runner, tmp_path):
+    output = tmp_path / 'assessments.csv'
+    result = runner.invoke(args=['export-data', 'assessments', '--output', str(output),
+                                 '--watermark-file', str(tmp_path / 'assessments.watermark')])
+    assert result.exit_code == 0, result.output
+    return [int(row['assessment_id']) for row in csv.DictReader(io.StringIO(output.read_text()))]
+
+
+def test_incremental_export_includes_backdated_imports(make_app, tmp_path):
+    app = make_app()
+    client = app.test_client()
+    sign_in(client, 'owner@example.com')
+    assessment = client.post('/api/v1/assessments', json={}).get_json()
+    catalog = client.get('/api/v1/catalog').get_json()
+    answers = [{'question_id': question['id'], 'option_index': 0} for question in catalog['questions']]
+    client.patch(assessment['links']['answers'], json={'answers': answers})
+    client.post(assessment['links']['complete'], json={})
+
+    runner = app.test_cli_runner()
+    assert export_ids(runner, tmp_path) == [assessment['id']]
+
+    # Completed years before the assessment already exported.
+    path = tmp_path / 'backdated.csv'
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['email', 'completion_date'] + [question['subcategory'] for question in QUESTIONS_V1])
+        writer.writerow(['owner@example.com', '2020-01-01T00:00:00'] + [1] * len(QUESTIONS_V1))
+    result = runner.invoke(args=['import-responses', str(path)])
+    assert result.exit_code == 0, result.output
+
+    imported = export_ids(runner, tmp_path)
+    assert len(imported) == 1 and imported != [assessment['id']]
+    assert export_ids(runner, tmp_path) == []
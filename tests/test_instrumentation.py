@@ -0,0 +1,44 @@
+import json
+import os
+
+from instrumentation import EXITED_SNAPSHOT, Metrics, clear_metrics, retire_worker
+
+
+def worker_snapshot(directory, pid, requests):
+    with open(os.path.join(directory, f'{pid}.json'), 'w') as f:
+        json.dump({'counters': [['http_requests_total', ['main.home', 'GET', 200], requests]],
+                   'histograms': [['pdf_render_duration_seconds', [], {
+                       'buckets': [1.0], 'counts': [requests], 'sum': 0.5 * requests, 'count': requests}]]}, f)
+
+
+def requests_total(metrics):
+    counters, histograms = metrics.collect()
+    return counters[('http_requests_total', ('main.home', 'GET', 200))], \
+        histograms[('pdf_render_duration_seconds', ())]['count']
+
+
+def test_exited_workers_are_folded_into_one_snapshot(tmp_path):
+    directory = str(tmp_path)
+    metrics = Metrics(directory)
+    metrics.increment('http_requests_total', ('main.home', 'GET', 200), 2)
+    metrics.observe('pdf_render_duration_seconds', 0.5)
+    worker_snapshot(directory, 101, 3)
+    worker_snapshot(directory, 102, 4)
+    assert requests_total(metrics) == (9, 8)
+
+    retire_worker(directory, 101)
+    assert requests_total(metrics) == (9, 8)
+    # Folded into the exited snapshot but not yet removed: still counted once.
+    worker_snapshot(directory, 101, 3)
+    assert requests_total(metrics) == (9, 8)
+    os.remove(os.path.join(directory, '101.json'))
+
+    retire_worker(directory, 102)
+    retire_worker(directory, 103)
+    assert requests_total(metrics) == (9, 8)
+    assert set(os.listdir(directory)) == {EXITED_SNAPSHOT, f'{os.getpid()}.json'}
+    with open(os.path.join(directory, EXITED_SNAPSHOT)) as f:
+        assert json.load(f)['pids'] == [102]
+
+    clear_metrics(directory)
+    assert os.listdir(directory) == []
@@ -0,0 +1,62 @@
+import re
+
+import pytest
+
+from conftest import sign_in
+from instrumentation import QueryBudgetExceeded
+
+# Completing runs the completion job inline: user stats, score histograms,
+# the cohort snapshot, and queuing the PDF prerender.
+QUERY_BUDGETS = {
+    'main.assessment_complete': 15,
+    'api.complete': 15,
+}
+
+
+def answer_pages(client, location):
+    """Answer every question page of an assessment with its first option; returns the results URL."""
+    while True:
+        response = client.get(location)
+        if response.status_code == 302:
+            return response.location
+        page = response.get_data(as_text=True)
+        form = {'position': re.search(r'name="position" value="(\d+)"', page).group(1)}
+        for name in set(re.findall(r'name="(question_\d+)"', page)):
+            form[name] = '0'
+        client.post(location, data=form)
+
+
+def test_routes_stay_within_query_budget(make_app):
+    app = make_app(QUERY_BUDGET=5, QUERY_BUDGETS=QUERY_BUDGETS)
+    client = app.test_client()
+    for path in ('/', '/register', '/login'):
+        assert client.get(path).status_code == 200
+    sign_in(client)
+
+    # Query counts must not grow with the number of assessments.
+    for _ in range(3):
+        results_url = answer_pages(client, client.get('/start_assessment').location)
+        assert client.get(results_url).status_code == 200
+        assert client.get(results_url.replace('/complete', '/pdf')).status_code == 200
+        assert client.get('/dashboard').status_code == 200
+        assert client.get('/history').status_code == 200
+
+        catalog = client.get('/api/v1/catalog').get_json()
+        assessment = client.post('/api/v1/assessments', json={}).get_json()
+        assert client.get(f"/api/v1/assessments/{assessment['id']}").status_code == 200
+        question_id = catalog['questions'][0]['id']
+        assert client.put(f"/api/v1/assessments/{assessment['id']}/answers/{question_id}",
+                          json={'option_index': 1}).status_code == 200
+        answers = [{'question_id': question['id'], 'option_index': 0} for question in catalog['questions']]
+        assert client.patch(assessment['links']['answers'], json={'answers': answers}).status_code == 200
+        assert client.post(assessment['links']['complete'], json={}).status_code == 200
+        assert client.get(assessment['links']['result']).status_code == 200
+        assert client.get(f"/api/v1/assessments/{assessment['id']}/simulation").status_code == 200
+
+
+def test_request_over_budget_fails(make_app):
+    app = make_app(QUERY_BUDGETS={'main.history': 0})
+    client = app.test_client()
+    sign_in(client)
+    with pytest.raises(QueryBudgetExceeded, match='main.history'):
+        client.get('/history')
@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from catalog import QuestionCatalog, CatalogQuestion
+from question_bank import QUESTIONS_V1
+from scoring import CATEGORIES, READINESS_LEVELS, score_assessments
+
+
+def make_catalog(category_caps=None, readiness_thresholds=(21, 43, 65)):
+    return QuestionCatalog((
+        CatalogQuestion(id=position + 1, position=position, **question)
+        for position, question in enumerate(QUESTIONS_V1)
+    ), category_caps=category_caps, readiness_thresholds=readiness_thresholds)
+
+
+def reference_score(answers, catalog):
+    """Score one assessment answer by answer, as the app did before scoring was vectorized."""
+    raw = dict.fromkeys(CATEGORIES, 0.0)
+    for question_id, score in answers:
+        question = catalog.by_id.get(question_id)
+        if question is None or score is None or question.category not in raw:
+            continue
+        raw[question.category] += score
+    category_scores = {category: min(raw[category], catalog.category_caps[category]) for category in CATEGORIES}
+    total = sum(category_scores.values())
+    level = next((index for index, threshold in enumerate(catalog.readiness_thresholds) if total <= threshold),
+                 len(catalog.readiness_thresholds))
+    return category_scores, total, READINESS_LEVELS[level]
+
+
+def rounded(scores):
+    return {category: round(score, 6) for category, score in scores.items()}
+
+
+def random_answers(rng, catalog):
+    """Responses to a random subset of questions, with the odd unknown question or missing score."""
+    answers = []
+    for question in rng.sample(catalog.questions, rng.randint(0, len(catalog))):
+        answers.append((question.id, rng.choice(question.scores)))
+    if rng.random() < 0.2:
+        answers.append((9999, 5))
+    if answers and rng.random() < 0.2:
+        answers[0] = (answers[0][0], None)
+    return answers
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('category_caps', [None, dict.fromkeys(CATEGORIES, 8)])
+def test_score_assessments_matches_reference(seed, category_caps):
+    rng = random.Random(seed)
+    catalog = make_catalog(category_caps)
+    answers = {assessment_id: random_answers(rng, catalog) for assessment_id in range(1, 201)}
+    responses = [(assessment_id, question_id, score)
+                 for assessment_id, rows in answers.items() for question_id, score in rows]
+    # Responses of assessments that weren't asked for are ignored.
+    responses.append((1000, catalog.questions[0].id, 5))
+    rng.shuffle(responses)
+
+    results = score_assessments(answers, responses, catalog)
+
+    assert set(results) == set(answers)
+    for assessment_id, rows in answers.items():
+        category_scores, total, level = reference_score(rows, catalog)
+        result = results[assessment_id]
+        assert rounded(result.category_scores) == rounded(category_scores)
+        assert round(result.total_score, 6) == round(total, 6)
+        assert result.readiness_level == level
+
+
+def test_readiness_thresholds_are_inclusive():
+    catalog = make_catalog(readiness_thresholds=(5, 10, 15))
+    strategy = [question for question in catalog.questions if question.category == 'Strategy']
+    responses = [(1, strategy[0].id, 5), (2, strategy[0].id, 5), (2, strategy[1].id, 2)]
+    results = score_assessments([1, 2], responses, catalog)
+    assert results[1].readiness_level == READINESS_LEVELS[0]
+    assert results[2].readiness_level == READINESS_LEVELS[1]